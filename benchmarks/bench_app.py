@@ -0,0 +1,374 @@
+"""Drives the whole client headless against the stub backend and times it.
+
+Starts `stub_server` with an encrypted vault of the given size and runs the
+application under the Qt offscreen platform: signing in up to the first
+rows, reloading the vault, typing a search query (`filter_table`), exporting
+the vault (`export_data`) and adding, editing and deleting entries through
+their dialogs. Each scenario runs `--repeat` times.
+
+The results, with the latency histograms recorded by `telemetry` along the
+way, are written as JSON to `--json` so runs of different releases can be
+compared. The application's settings are kept in a temporary directory and
+its vault cache in Qt's test locations, so an installed Passify is left
+alone.
+
+Usage:
+    python benchmarks/bench_app.py [--entries 5000] [--page-size 0]
+        [--latency 20] [--repeat 5] [--query "entry 123"] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from stub_server import start_server  # noqa: E402
+from temporary_settings import temporary_settings  # noqa: E402
+
+EMAIL = "bench@example.com"
+PASSWORD = "correct horse battery staple"
+# Longest wait for one step of a scenario before the run is given up.
+TIMEOUT = 120
+
+
+class Harness:
+    """Runs the scenarios against one application instance.
+
+    Args:
+        app (QApplication): The running application.
+        repeat (int): Number of timed runs of every scenario.
+    """
+
+    def __init__(self, app, repeat):
+        self.app = app
+        self.repeat = repeat
+        self.results = {}  # scenario -> list of seconds
+        self.database = None
+
+    def wait_for(self, condition, what):
+        """Runs the event loop until `condition()` is true.
+
+        The loop sleeps between the checks, a millisecond apart, instead of
+        spinning, so the background workers get the CPU.
+        """
+        from PyQt5.QtCore import QEventLoop, QTimer
+
+        if condition():
+            return
+        loop = QEventLoop()
+        timer = QTimer()
+        timer.setInterval(1)
+        timer.timeout.connect(lambda: condition() and loop.quit())
+        deadline = QTimer()
+        deadline.setSingleShot(True)
+        deadline.timeout.connect(loop.quit)
+        timer.start()
+        deadline.start(TIMEOUT * 1000)
+        loop.exec_()
+        timer.stop()
+        if not condition():
+            raise TimeoutError(f"Timed out waiting for {what}.")
+
+    def record(self, scenario, seconds):
+        self.results.setdefault(scenario, []).append(seconds)
+
+    def find_window(self, window_class):
+        from PyQt5.QtWidgets import QApplication
+
+        for widget in QApplication.topLevelWidgets():
+            if isinstance(widget, window_class) and widget.isVisible():
+                return widget
+        return None
+
+    def sign_in(self):
+        """Signs in from the sign in window until the first rows are shown,
+        the vault key derivation included. Signs out and deletes the local
+        vault cache between the runs, so every run starts without it."""
+        import vault_cache
+        from database import Database
+        from sign_in import SignIn
+
+        window = SignIn()
+        window.show()
+        for run in range(self.repeat):
+            if run:
+                self.database.sign_out()
+                vault_cache.clear_cache()
+                window = self.find_window(SignIn)
+            window.ui.le_email.setText(EMAIL)
+            window.ui.le_password.setText(PASSWORD)
+            start = time.perf_counter()
+            window.sign_in()
+            self.wait_for(lambda: self.find_window(Database), "the database window")
+            self.database = self.find_window(Database)
+            self.wait_for(self.is_loaded, "the first rows")
+            self.record("sign_in", time.perf_counter() - start)
+
+    def is_loaded(self):
+        database = self.database
+        return database.reload_task is None and database.model.rowCount() > 0
+
+    def all_pages(self):
+        """Loads the pages left of a paginated vault, once."""
+        if not self.database.model.next_page:
+            return
+        loaded = []
+        start = time.perf_counter()
+        self.database.after_all_pages(lambda: loaded.append(True))
+        self.wait_for(lambda: loaded, "the remaining pages")
+        self.record("all_pages", time.perf_counter() - start)
+
+    def reload(self):
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            self.database.reload()
+            self.wait_for(self.is_loaded, "the reload")
+            self.record("reload", time.perf_counter() - start)
+
+    def filter_table(self, query):
+        """Types the query one character at a time, each keystroke is one
+        sample. The debounce delay is skipped, it is idle time by design."""
+        database = self.database
+        finished = []
+        database.search_pipeline.finished.connect(
+            lambda query, rows: finished.append(query)
+        )
+        for _ in range(self.repeat):
+            for end in list(range(1, len(query) + 1)) + [0]:
+                finished.clear()
+                start = time.perf_counter()
+                database.ui.searchBar.setText(query[:end])
+                database.search_pipeline.debounce_timer.stop()
+                database.search_pipeline.start()
+                self.wait_for(lambda: finished, "the search results")
+                if end:
+                    self.record("filter_table", time.perf_counter() - start)
+
+    def export_data(self, directory):
+        from PyQt5.QtWidgets import QFileDialog
+
+        database = self.database
+        path = os.path.join(directory, "export.json")
+        get_save_file_name = QFileDialog.getSaveFileName
+        QFileDialog.getSaveFileName = staticmethod(lambda *args, **kwargs: (path, ""))
+        try:
+            for _ in range(self.repeat):
+                if os.path.exists(path):
+                    os.remove(path)
+                start = time.perf_counter()
+                database.export_data()
+                self.wait_for(
+                    lambda: os.path.exists(path) and database.cancel_event is None,
+                    "the export",
+                )
+                self.record("export_data", time.perf_counter() - start)
+        finally:
+            QFileDialog.getSaveFileName = get_save_file_name
+
+    def add_entries(self):
+        """Adds entries through the add dialog, returns their ids."""
+        from add_entry import AddEntry
+        from custom_widgets import dialog_pool
+
+        database = self.database
+        added = []
+        for run in range(self.repeat):
+            rows = database.model.rowCount()
+            start = time.perf_counter()
+            database.add_entry()
+            dialog = dialog_pool.dialogs[AddEntry]
+            dialog.ui.le_title.setText(f"Benchmark {run}")
+            dialog.ui.le_username.setText(f"bench{run}@example.com")
+            dialog.ui.le_password.setText(f"Bench-{run}-x7#Qe9!vK2")
+            dialog.ui.te_notes.setPlainText("Added by the benchmark")
+            dialog.add_entry()
+            self.wait_for(lambda: database.model.rowCount() > rows, "the new entry")
+            self.record("add_entry", time.perf_counter() - start)
+            added.append(database.model.id_url(database.model.rowCount() - 1))
+        return added
+
+    def edit_entries(self, id_urls):
+        """Renames entries through the edit dialog, from opening the dialog
+        to the new title in the table."""
+        from custom_widgets import dialog_pool
+        from edit_entry import EditEntry
+        from vault_model import TITLE_COLUMN
+
+        database = self.database
+        for run, id_url in enumerate(id_urls):
+            title = f"Edited {run}"
+            start = time.perf_counter()
+            self.select(id_url)
+            database.edit_entry()
+            dialog = dialog_pool.dialogs[EditEntry]
+            self.wait_for(lambda: not dialog.tasks, "the entry's fields")
+            dialog.ui.le_title.setText(title)
+            dialog.edit_entry()
+            self.wait_for(
+                lambda: database.model.text(database.model.row(id_url), TITLE_COLUMN)
+                == title,
+                "the edited entry",
+            )
+            self.record("edit_entry", time.perf_counter() - start)
+
+    def delete_entries(self, id_urls):
+        from PyQt5.QtWidgets import QMessageBox
+
+        database = self.database
+        question = QMessageBox.question
+        QMessageBox.question = staticmethod(lambda *args: QMessageBox.Yes)
+        try:
+            for id_url in id_urls:
+                start = time.perf_counter()
+                self.select(id_url)
+                database.delete_entry()
+                self.wait_for(
+                    lambda: database.model.row(id_url) is None
+                    and database.cancel_event is None,
+                    "the deletion",
+                )
+                self.record("delete_entry", time.perf_counter() - start)
+        finally:
+            QMessageBox.question = question
+
+    def select(self, id_url):
+        database = self.database
+        index = database.model.index(database.model.row(id_url), 0)
+        database.ui.tableView.selectRow(database.proxy.mapFromSource(index).row())
+
+
+def configure(base_url):
+    """Loads the application settings and points the endpoints to the stub."""
+    from urllib.parse import urljoin, urlsplit
+
+    import main
+
+    settings = main.load_settings()
+    settings.setValue("DOMAIN", base_url)
+    for key in settings.allKeys():
+        if key.endswith("_ENDPOINT"):
+            path = urlsplit(settings.value(key)).path
+            settings.setValue(key, urljoin(base_url, path))
+    return settings
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    return {
+        "runs": len(samples),
+        "min": samples[0],
+        "median": statistics.median(samples),
+        "p95": samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))],
+        "max": samples[-1],
+    }
+
+
+def run(args):
+    """Runs every scenario, returns the results."""
+    from PyQt5.QtCore import PYQT_VERSION_STR, QT_VERSION_STR
+    from PyQt5.QtWidgets import QApplication, QMessageBox
+
+    import telemetry
+    from vault_crypto import VaultCipher, derive_account_keys
+
+    telemetry.enable()
+    app = QApplication([])
+    # a message box would block the run, errors are reported instead
+    QMessageBox.warning = staticmethod(
+        lambda parent, title, text, *args: print(
+            f"warning: {title}: {text}", file=sys.stderr
+        )
+    )
+    QMessageBox.information = staticmethod(lambda *args: QMessageBox.Ok)
+    server = start_server(
+        entries=args.entries,
+        page_size=args.page_size,
+        latency=args.latency / 1000,
+        cipher=VaultCipher(derive_account_keys(EMAIL, PASSWORD).vault_key),
+    )
+    configure(f"http://127.0.0.1:{server.server_address[1]}")
+
+    harness = Harness(app, args.repeat)
+    started = time.perf_counter()
+    harness.sign_in()
+    harness.all_pages()
+    harness.reload()
+    harness.filter_table(args.query)
+    with tempfile.TemporaryDirectory() as directory:
+        harness.export_data(directory)
+    added = harness.add_entries()
+    harness.edit_entries(added)
+    harness.delete_entries(added)
+    total = time.perf_counter() - started
+    harness.database.sign_out()
+    server.shutdown()
+
+    results = {
+        "benchmark": "bench_app",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "qt": QT_VERSION_STR,
+            "pyqt": PYQT_VERSION_STR,
+            "platform": platform.platform(),
+        },
+        "parameters": {
+            "entries": args.entries,
+            "page_size": args.page_size,
+            "latency_ms": args.latency,
+            "repeat": args.repeat,
+            "query": args.query,
+        },
+        "total_seconds": total,
+        "scenarios": {
+            scenario: summarize(samples)
+            for scenario, samples in harness.results.items()
+        },
+        "telemetry": telemetry.snapshot(),
+    }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=5000)
+    parser.add_argument("--page-size", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=20, help="milliseconds per response"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--query", default="entry 123")
+    parser.add_argument("--json", help="file the results are written to, - for stdout")
+    args = parser.parse_args()
+    # before the application modules create their settings
+    with temporary_settings(test_locations=True):
+        results = run(args)
+
+    # stdout is left to the JSON when it is written there
+    table = sys.stderr if args.json == "-" else sys.stdout
+    print(
+        f"{'scenario':<14} {'runs':>5} {'min ms':>9} {'median ms':>10} {'max ms':>9}",
+        file=table,
+    )
+    for scenario, summary in results["scenarios"].items():
+        print(
+            f"{scenario:<14} {summary['runs']:>5} {summary['min'] * 1000:>9.1f} "
+            f"{summary['median'] * 1000:>10.1f} {summary['max'] * 1000:>9.1f}",
+            file=table,
+        )
+    if args.json == "-":
+        print(json.dumps(results, indent=4))
+    elif args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Measures the security audit of a large vault.
+
+"full" audits every entry at once, as the worker does when the audit is
+opened, "again" repeats it with the strengths of the first pass, as after a
+reload, and "incremental" times the updates applied to it when single entries
+are added, edited or deleted.
+
+Passwords are a mix like real vaults hold: mostly generated ones, some reused
+across entries and some variations of the same base password.
+
+Usage:
+    python benchmarks/bench_audit.py [--entries 50000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from temporary_settings import temporary_settings  # noqa: E402
+
+
+def vault_passwords(size):
+    from generator import generate_passwords, get_alphabet
+
+    generated = generate_passwords(
+        size, 16, get_alphabet(("upper", "lower", "numbers", "symbols"))
+    )
+    reused = generate_passwords(50, 12, get_alphabet(("lower", "numbers")))
+    bases = ["Summer", "Football", "Passify", "Dragon", "Sunshine"]
+    passwords = []
+    for n, password in enumerate(generated):
+        kind = n % 10
+        if kind == 0:
+            password = random.choice(reused)
+        elif kind == 1:
+            password = f"{random.choice(bases)}{random.randint(1990, 2030)}!"
+        passwords.append(password)
+    return passwords
+
+
+def run(args):
+    import audit
+    from main import load_settings
+
+    load_settings()
+    id_urls = [f"http://127.0.0.1:8000/my/database/{n}/" for n in range(args.entries)]
+    passwords = vault_passwords(args.entries)
+
+    start = time.perf_counter()
+    result = audit.audit_entries(id_urls, passwords)
+    print(f"full: {time.perf_counter() - start:.2f} s for {args.entries} entries")
+    print(
+        f"  {len(result.reused_groups())} reused groups, {len(result.weak)} weak, "
+        f"{len(result.similar_groups())} similar groups"
+    )
+
+    start = time.perf_counter()
+    result = audit.audit_entries(id_urls, passwords, result.strengths)
+    print(f"again: {time.perf_counter() - start:.2f} s")
+
+    operations = 1000
+    new_passwords = vault_passwords(operations)
+    start = time.perf_counter()
+    for n, password in enumerate(new_passwords):
+        result.add(f"new/{n}", password)
+        result.update(id_urls[n], password)
+        result.remove(id_urls[-n - 1])
+    elapsed = (time.perf_counter() - start) / (3 * operations)
+    print(f"incremental: {elapsed * 1000:.3f} ms per added, edited or deleted entry")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50000)
+    args = parser.parse_args()
+    # before the application modules create their settings
+    with temporary_settings():
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
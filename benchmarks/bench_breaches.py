@@ -0,0 +1,67 @@
+"""Measures the breached password index: building it and looking passwords up.
+
+A dump of random hashes, plus the hashes of a few known passwords, is written
+in the "ordered by hash" format and converted with `breaches.build_index`.
+Lookups are then timed for passwords in the dump and passwords that are not.
+The index is memory-mapped, so the lookup time barely moves with its size.
+
+Usage:
+    python benchmarks/bench_breaches.py [--hashes 2000000] [--lookups 20000]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import breaches  # noqa: E402
+
+KNOWN_PASSWORDS = ["password", "123456", "qwerty", "letmein", "dragon"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hashes", type=int, default=2000000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    digests = {random.randbytes(20) for _ in range(args.hashes)}
+    digests.update(hashlib.sha1(p.encode()).digest() for p in KNOWN_PASSWORDS)
+    with tempfile.TemporaryDirectory() as directory:
+        dump_path = os.path.join(directory, "dump.txt")
+        index_path = os.path.join(directory, "breaches.bin")
+        with open(dump_path, "w", encoding="ascii") as dump:
+            for digest in sorted(digests):
+                dump.write(f"{digest.hex().upper()}:{random.randint(1, 1000)}\n")
+
+        start = time.perf_counter()
+        with open(index_path, "wb") as output:
+            written = breaches.build_index(breaches.read_dump(dump_path), output)
+        elapsed = time.perf_counter() - start
+        size = os.path.getsize(index_path)
+        print(
+            f"build: {elapsed:.2f} s for {written} hashes, "
+            f"{size / 2**20:.1f} MiB index"
+        )
+
+        index = breaches.BreachIndex(index_path)
+        assert all(index.count_password(p) for p in KNOWN_PASSWORDS)
+        for name, passwords in (
+            ("hit", [random.choice(KNOWN_PASSWORDS) for _ in range(args.lookups)]),
+            ("miss", [f"not-breached-{n}" for n in range(args.lookups)]),
+        ):
+            start = time.perf_counter()
+            for password in passwords:
+                index.count_password(password)
+            elapsed = (time.perf_counter() - start) / args.lookups
+            print(f"{name}: {elapsed * 1e6:.1f} us per lookup")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Measures requests per second with and without the shared keep-alive session.
+
+"before" issues one module-level `requests.get` per call, the way the request
+helpers used to; "after" goes through `utils.auth_get_request`.
+
+Usage:
+    python benchmarks/bench_http_session.py [--requests 500] [--threads 1 4]
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from stub_server import start_server  # noqa: E402
+
+
+def before(endpoint):
+    return requests.get(endpoint, headers={"Authorization": "JWT benchmark"})
+
+
+def after(endpoint):
+    from utils import auth_get_request
+
+    return auth_get_request(endpoint)
+
+
+def requests_per_second(fn, endpoint, count, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for response in pool.map(lambda _: fn(endpoint), range(count)):
+            response.raise_for_status()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--entries", type=int, default=20)
+    args = parser.parse_args()
+
+    server = start_server(entries=args.entries)
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}/my/database/"
+
+    print(f"{'threads':>7} {'before (req/s)':>15} {'after (req/s)':>14}")
+    for threads in args.threads:
+        rps_before = requests_per_second(before, endpoint, args.requests, threads)
+        rps_after = requests_per_second(after, endpoint, args.requests, threads)
+        print(f"{threads:>7} {rps_before:>15.1f} {rps_after:>14.1f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
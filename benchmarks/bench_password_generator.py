@@ -0,0 +1,70 @@
+"""Measures passwords generated per second.
+
+"before" is the dialog's old `random.choices` over an alphabet rebuilt for
+every password; "single" calls `generator.generate_password` once per
+password and "batch" asks `generator.generate_passwords` for all of them.
+
+Usage:
+    python benchmarks/bench_password_generator.py [--count 100000] [--lengths 12 20]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import generator  # noqa: E402
+
+ALPHABET = generator.get_alphabet(tuple(generator.CHARACTER_CLASSES))
+
+
+def before(count, length):
+    for _ in range(count):
+        alphabet = (
+            string.ascii_uppercase
+            + string.ascii_lowercase
+            + string.digits
+            + string.punctuation
+        )
+        "".join(random.choices(alphabet, k=length))
+
+
+def single(count, length):
+    for _ in range(count):
+        generator.generate_password(length, ALPHABET)
+
+
+def batch(count, length):
+    generator.generate_passwords(count, length, ALPHABET)
+
+
+def passwords_per_second(fn, count, length):
+    start = time.perf_counter()
+    fn(count, length)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=100000)
+    parser.add_argument("--lengths", type=int, nargs="+", default=[12, 20, 50])
+    args = parser.parse_args()
+
+    print(
+        f"{'length':>6} {'before (pw/s)':>14} {'single (pw/s)':>14} "
+        f"{'batch (pw/s)':>13}"
+    )
+    for length in args.lengths:
+        rates = [
+            passwords_per_second(fn, args.count, length)
+            for fn in (before, single, batch)
+        ]
+        print(f"{length:>6} {rates[0]:>14.0f} {rates[1]:>14.0f} {rates[2]:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
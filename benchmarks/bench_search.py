@@ -0,0 +1,71 @@
+"""Measures how the search bar filter behaves while typing.
+
+Types a query one character at a time into a populated table. For every
+keystroke it reports how long the ranked result took to reach the screen and
+the longest single stall of the event loop along the way, which is what the
+user feels as lag.
+
+Usage:
+    python benchmarks/bench_search.py [--entries 50000] [--query "entry 123"]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from stub_server import synthetic_entries  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--query", default="entry 123")
+    args = parser.parse_args()
+
+    from PyQt5.QtWidgets import QApplication, QTableView
+
+    from search import SearchPipeline, VaultFilterProxyModel
+    from vault_model import VaultTableModel
+
+    app = QApplication([])
+    model = VaultTableModel()
+    model.set_entries(synthetic_entries(args.entries))
+    proxy = VaultFilterProxyModel()
+    proxy.setSourceModel(model)
+    pipeline = SearchPipeline(proxy.search_index)
+    pipeline.finished.connect(proxy.set_result)
+    done = []
+    pipeline.finished.connect(lambda *_: done.append(True))
+    view = QTableView()
+    view.setModel(proxy)
+    view.resize(800, 600)
+    view.show()
+    app.processEvents()
+
+    print(f"{'query':>12} {'rows':>7} {'result ms':>10} {'max stall ms':>13}")
+    for end in range(1, len(args.query) + 1):
+        query = args.query[:end]
+        done.clear()
+        start = time.perf_counter()
+        pipeline.submit(query)
+        pipeline.debounce_timer.stop()
+        pipeline.start()  # skip the debounce delay
+        stall = 0.0
+        while not done:
+            step_start = time.perf_counter()
+            app.processEvents()
+            stall = max(stall, time.perf_counter() - step_start)
+        app.processEvents()  # repaint
+        elapsed = (time.perf_counter() - start) * 1000
+        print(
+            f"{query!r:>12} {proxy.rowCount():>7} {elapsed:>10.1f} "
+            f"{stall * 1000:>13.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
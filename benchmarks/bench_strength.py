@@ -0,0 +1,63 @@
+"""Measures how long a password strength estimate takes.
+
+"cold" estimates passwords never seen before, "typing" estimates every prefix
+of a password in turn, the way the strength meter does while it is typed, and
+reports the slowest keystroke.
+
+Usage:
+    python benchmarks/bench_strength.py [--count 300] [--length 64]
+"""
+
+import argparse
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from temporary_settings import temporary_settings  # noqa: E402
+
+
+def run(args):
+    import strength
+    from main import load_settings
+
+    load_settings()
+    start = time.perf_counter()
+    strength.get_tables()
+    print(f"tables: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    characters = string.ascii_letters + string.digits + string.punctuation
+    passwords = [
+        "".join(random.choices(characters, k=args.length)) for _ in range(args.count)
+    ]
+    start = time.perf_counter()
+    for password in passwords:
+        strength.estimate(password)
+    cold = (time.perf_counter() - start) * 1000 / args.count
+    print(f"cold: {cold:.3f} ms per {args.length} character password")
+
+    slowest = 0.0
+    for password in passwords:
+        estimator = strength.Estimator()
+        for end in range(1, len(password) + 1):
+            start = time.perf_counter()
+            estimator.estimate(password[:end])
+            slowest = max(slowest, time.perf_counter() - start)
+    print(f"typing: {slowest * 1000:.3f} ms for the slowest keystroke")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=300)
+    parser.add_argument("--length", type=int, default=64)
+    args = parser.parse_args()
+    # before the application modules create their settings
+    with temporary_settings():
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
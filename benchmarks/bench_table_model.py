@@ -0,0 +1,129 @@
+"""Compares filling the entries table with QTableWidgetItems against the model.
+
+Each case runs in a fresh interpreter so the resident memory figures are not
+polluted by the previous case.
+
+Usage:
+    python benchmarks/bench_table_model.py [--sizes 1000 10000 100000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+SRC_DIRECTORY = os.path.join(os.path.dirname(__file__), "..", "src")
+
+
+def rss_kib():
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except OSError:
+        import resource
+
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def synthetic_entries(size):
+    return [
+        {
+            "id": f"http://127.0.0.1:8000/my/database/{n}/",
+            "title": f"Entry {n}",
+            "username": f"user{n}@example.com",
+            "password": f"p@ssw0rd-{n:08d}",
+            "url": f"https://site{n % 997}.example.com/login",
+            "notes": f"Synthetic note number {n}",
+        }
+        for n in range(size)
+    ]
+
+
+def fill_widget(entries):
+    from PyQt5.QtWidgets import QTableWidget, QTableWidgetItem
+
+    table = QTableWidget(0, 6)
+    table.resize(800, 600)
+    table.show()
+    table.setRowCount(len(entries))
+    for row, entry in enumerate(entries):
+        table.setItem(row, 0, QTableWidgetItem(entry["title"]))
+        table.setItem(row, 1, QTableWidgetItem(entry["username"]))
+        table.setItem(row, 2, QTableWidgetItem(entry["password"]))
+        table.setItem(row, 3, QTableWidgetItem(entry["url"]))
+        table.setItem(row, 4, QTableWidgetItem(entry["notes"]))
+        table.setItem(row, 5, QTableWidgetItem(entry["id"]))
+    return table
+
+
+def fill_model(entries):
+    from PyQt5.QtWidgets import QTableView
+
+    from vault_model import VaultTableModel
+
+    table = QTableView()
+    model = VaultTableModel(table)
+    table.setModel(model)
+    table.resize(800, 600)
+    table.show()
+    model.set_entries(entries)
+    return table
+
+
+def run_case(path, size):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    sys.path.insert(0, SRC_DIRECTORY)
+    from PyQt5.QtWidgets import QApplication
+
+    app = QApplication([])
+    entries = synthetic_entries(size)
+    fill = fill_widget if path == "widget" else fill_model
+    rss_before = rss_kib()
+    start = time.perf_counter()
+    table = fill(entries)
+    app.processEvents()  # first paint of the viewport
+    elapsed = time.perf_counter() - start
+    rss_after = rss_kib()
+    print(
+        json.dumps(
+            {
+                "path": path,
+                "size": size,
+                "seconds": round(elapsed, 4),
+                "rss_delta_kib": rss_after - rss_before,
+            }
+        )
+    )
+    table.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--case", nargs=2, metavar=("PATH", "SIZE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.case:
+        run_case(args.case[0], int(args.case[1]))
+        return
+
+    print(f"{'entries':>8} {'path':>7} {'seconds':>9} {'rss delta (KiB)':>16}")
+    for size in args.sizes:
+        for path in ("widget", "model"):
+            output = subprocess.run(
+                [sys.executable, __file__, "--case", path, str(size)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(
+                f"{size:>8} {path:>7} {result['seconds']:>9.4f} "
+                f"{result['rss_delta_kib']:>16}"
+            )
+
+
+if __name__ == "__main__":
+    main()
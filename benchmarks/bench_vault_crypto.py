@@ -0,0 +1,56 @@
+"""Measures the client side encryption of the vault.
+
+"kdf" is the one-off derivation of the account keys at sign in, "encrypt" and
+"decrypt" time the password and notes of every entry of a vault, decrypted
+one entry after the other and then in batch as a fetched vault is.
+
+Usage:
+    python benchmarks/bench_vault_crypto.py [--entries 10000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+import vault_crypto  # noqa: E402
+from stub_server import synthetic_entries  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=10000)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    keys = vault_crypto.derive_account_keys(
+        "user@example.com", "correct horse battery"
+    )
+    print(f"kdf: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    cipher = vault_crypto.VaultCipher(keys.vault_key)
+    entries = synthetic_entries(args.entries)
+    start = time.perf_counter()
+    encrypted = [cipher.encrypt_entry(entry) for entry in entries]
+    elapsed = time.perf_counter() - start
+    print(f"encrypt: {elapsed * 1000:.0f} ms for {args.entries} entries")
+
+    start = time.perf_counter()
+    decrypted = [cipher.decrypt_entry(entry) for entry in encrypted]
+    elapsed = time.perf_counter() - start
+    print(f"decrypt one by one: {elapsed * 1000:.0f} ms")
+
+    start = time.perf_counter()
+    decrypted = cipher.decrypt_entries(encrypted)
+    elapsed = time.perf_counter() - start
+    print(
+        f"decrypt batch: {elapsed * 1000:.0f} ms, "
+        f"{args.entries / elapsed:.0f} entries/s on {os.cpu_count()} CPUs"
+    )
+    assert decrypted == entries
+
+
+if __name__ == "__main__":
+    main()
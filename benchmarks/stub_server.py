@@ -0,0 +1,280 @@
+"""Minimal local stand-in for the Passify backend used by the benchmarks.
+
+The server speaks HTTP/1.1 so clients can keep connections alive. With
+--page-size the entries list is paginated like Django REST framework's
+PageNumberPagination. Besides the entries it serves the JWT sign in and
+refresh endpoints and the user profile; any credentials are accepted, but an
+expired access token is answered with a 401 like the real backend does.
+Entries that are added, edited or deleted are kept until the server stops.
+--latency delays every response, to stand in for a remote server.
+
+Usage:
+    python benchmarks/stub_server.py [--port 8000] [--entries 100] [--page-size 0]
+        [--latency 0] [--token-lifetime 3600]
+"""
+
+import argparse
+import base64
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SIGN_IN_PATH = "/auth/jwt/create/"
+REFRESH_TOKEN_PATH = "/auth/jwt/refresh/"
+PROFILE_PATH = "/auth/users/me/"
+PROFILE = {
+    "id": "1",
+    "first_name": "Bench",
+    "last_name": "Mark",
+    "email": "bench@example.com",
+    "last_login": "2024-01-01T00:00:00Z",
+    "date_joined": "2024-01-01T00:00:00Z",
+}
+
+
+def make_token(lifetime):
+    """Returns an unsigned JWT whose `exp` claim is `lifetime` seconds away."""
+
+    def encode(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).decode().rstrip("=")
+
+    payload = {"exp": int(time.time() + lifetime), "jti": next(_token_ids)}
+    return f"{encode({'alg': 'none'})}.{encode(payload)}.stub"
+
+
+_token_ids = itertools.count()
+
+
+def is_expired(authorization):
+    """Tells whether the Authorization header carries an expired stub token.
+
+    Headers that hold no stub token at all are let through.
+    """
+    try:
+        payload = authorization.split(" ", 1)[1].split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))["exp"] < time.time()
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return False
+
+
+def make_handler(entries, page_size=0, latency=0.0, token_lifetime=3600):
+    # the vault, keyed by the path of the entry's id url, in creation order
+    details = {urlsplit(entry["id"]).path: entry for entry in entries}
+    created = itertools.count(len(entries))
+    lock = threading.Lock()
+    # the entries list and its response body, dropped when the vault changes
+    listing = {}
+
+    def list_entries():
+        with lock:
+            if "entries" not in listing:
+                listing["entries"] = list(details.values())
+            return listing["entries"]
+
+    def list_body():
+        with lock:
+            if "body" not in listing:
+                listing["body"] = json.dumps(list(details.values())).encode()
+            return listing["body"]
+
+    def save(path, entry):
+        with lock:
+            if entry is None:
+                details.pop(path, None)
+            else:
+                details[path] = entry
+            listing.clear()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # send headers and body in one segment, otherwise Nagle's algorithm
+        # stalls every kept-alive response behind the client's delayed ACK
+        wbufsize = -1
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def parse_request(self):
+            # each connection has its own thread, so concurrent requests
+            # are delayed in parallel like they would be by a network
+            parsed = super().parse_request()
+            if parsed and latency:
+                time.sleep(latency)
+            return parsed
+
+        def is_authorized(self):
+            if is_expired(self.headers.get("Authorization")):
+                self.read_body()
+                self.send_json(
+                    401, b'{"detail": "Given token not valid for any token type"}'
+                )
+                return False
+            return True
+
+        def send_json(self, status, payload):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def read_body(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length)
+
+        def send_page(self, url):
+            page = int(parse_qs(url.query).get("page", ["1"])[0])
+            start = (page - 1) * page_size
+            entries = list_entries()
+            base = f"http://{self.headers.get('Host', '127.0.0.1')}{url.path}"
+            self.send_json(
+                200,
+                json.dumps(
+                    {
+                        "count": len(entries),
+                        "next": (
+                            f"{base}?page={page + 1}"
+                            if start + page_size < len(entries)
+                            else None
+                        ),
+                        "previous": f"{base}?page={page - 1}" if page > 1 else None,
+                        "results": entries[start : start + page_size],
+                    }
+                ).encode(),
+            )
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if not self.is_authorized():
+                return
+            if url.path == PROFILE_PATH:
+                self.send_json(200, json.dumps(PROFILE).encode())
+            elif url.path in details:
+                self.send_json(200, json.dumps(details[url.path]).encode())
+            elif page_size:
+                self.send_page(url)
+            else:
+                self.send_json(200, list_body())
+
+        def do_POST(self):
+            if self.path == SIGN_IN_PATH:
+                self.read_body()
+                tokens = {
+                    "access": make_token(token_lifetime),
+                    "refresh": make_token(24 * 60 * 60),
+                }
+                self.send_json(200, json.dumps(tokens).encode())
+                return
+            if self.path == REFRESH_TOKEN_PATH:
+                self.read_body()
+                tokens = {"access": make_token(token_lifetime)}
+                self.send_json(200, json.dumps(tokens).encode())
+                return
+            if not self.is_authorized():
+                return
+            entry = json.loads(self.read_body() or b"{}")
+            host = self.headers.get("Host", "127.0.0.1")
+            entry["id"] = f"http://{host}/my/database/{next(created)}/"
+            save(urlsplit(entry["id"]).path, entry)
+            self.send_json(201, json.dumps(entry).encode())
+
+        def do_PATCH(self):
+            if not self.is_authorized():
+                return
+            if self.path == PROFILE_PATH:
+                profile = dict(PROFILE, **json.loads(self.read_body() or b"{}"))
+                self.send_json(200, json.dumps(profile).encode())
+                return
+            entry = dict(details.get(self.path, {}))
+            entry.update(json.loads(self.read_body() or b"{}"))
+            if self.path in details:
+                entry["id"] = details[self.path]["id"]
+                save(self.path, entry)
+            self.send_json(200, json.dumps(entry).encode())
+
+        def do_PUT(self):
+            if not self.is_authorized():
+                return
+            self.send_json(200, self.read_body() or b"{}")
+
+        def do_DELETE(self):
+            if not self.is_authorized():
+                return
+            self.read_body()
+            save(self.path, None)
+            self.send_response(204)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+    return StubHandler
+
+
+def synthetic_entries(size, domain="http://127.0.0.1:8000"):
+    return [
+        {
+            "id": f"{domain}/my/database/{n}/",
+            "title": f"Entry {n}",
+            "username": f"user{n}@example.com",
+            "password": f"p@ssw0rd-{n:08d}",
+            "url": f"https://site{n % 997}.example.com/login",
+            "notes": f"Synthetic note number {n}",
+        }
+        for n in range(size)
+    ]
+
+
+def start_server(
+    port=0, entries=100, page_size=0, latency=0.0, token_lifetime=3600, cipher=None
+):
+    """Starts the stub server in a daemon thread and returns it.
+
+    Args:
+        port (int): Port to listen on, 0 for any free port.
+        entries (int): Number of synthetic entries in the vault.
+        page_size (int): Entries per page of the list, 0 to send them all.
+        latency (float): Seconds every response is delayed by.
+        token_lifetime (int): Seconds before an access token expires.
+        cipher (vault_crypto.VaultCipher): Stores the entries encrypted with
+            it, the way the client saves them, rather than in plain text.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), None)
+    domain = f"http://127.0.0.1:{server.server_address[1]}"
+    vault = synthetic_entries(entries, domain)
+    if cipher is not None:
+        vault = [cipher.encrypt_entry(entry) for entry in vault]
+    server.RequestHandlerClass = make_handler(
+        vault, page_size, latency, token_lifetime
+    )
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--entries", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=0, help="milliseconds per response"
+    )
+    parser.add_argument("--token-lifetime", type=int, default=3600)
+    args = parser.parse_args()
+    server = start_server(
+        args.port,
+        args.entries,
+        args.page_size,
+        args.latency / 1000,
+        args.token_lifetime,
+    )
+    print(f"Serving on http://127.0.0.1:{server.server_address[1]}")
+    threading.Event().wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+"""Keeps a benchmark's application settings away from an installed Passify.
+
+The application modules create their `QSettings` when they are imported, so
+the benchmarks enter `temporary_settings` before importing them.
+"""
+
+import tempfile
+from contextlib import contextmanager
+
+
+@contextmanager
+def temporary_settings(test_locations=False):
+    """Points the user scope settings to a temporary directory while the
+    block runs and removes it afterwards.
+
+    Args:
+        test_locations (bool): Also switch `QStandardPaths` to Qt's test
+            locations, where the vault cache is written.
+    """
+    from PyQt5.QtCore import QSettings, QStandardPaths
+
+    with tempfile.TemporaryDirectory() as directory:
+        for settings_format in (QSettings.NativeFormat, QSettings.IniFormat):
+            QSettings.setPath(settings_format, QSettings.UserScope, directory)
+        if test_locations:
+            QStandardPaths.setTestModeEnabled(True)
+        yield directory
@@ -2,17 +2,22 @@ from PyQt5.QtCore import QSettings, Qt
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import QLineEdit, QMessageBox, QShortcut
 
-from custom_widgets import CustomQDialog
-from utils import auth_post_request, get_error_message
+from custom_widgets import CustomQDialog, confirm_breached_password, dialog_pool
+from entry_cache import get_entry_cache
+from sync import create_entry
+from utils import get_error_message, validate_entry
+from vault_crypto import SEALED_FIELDS, get_cipher
 
 settings = QSettings("Passify", "Passify")
 
 
 class AddEntry(CustomQDialog):
-    def __init__(self, width=None, height=None):
+    def __init__(self, width=300, height=300):
         super().__init__("entry.ui", "Passify - Add Entry", width, height)
-        self.ui.le_password.setEchoMode(QLineEdit.Password)
         self.ui.btn_ok.clicked.connect(self.add_entry)
+        self.ui.le_password.set_strength_meter(True)
+        # don't keep the password around while the dialog is pooled
+        self.finished.connect(self.clear_fields)
 
         # Adding keyboard shortcut Ctrl+G
         shortcut = QShortcut(QKeySequence(Qt.CTRL + Qt.Key_G), self)
@@ -21,41 +26,66 @@ class AddEntry(CustomQDialog):
     def password_generator(self):
         from password_generator import PasswordGenerator
 
-        password_generator_window = PasswordGenerator()
+        password_generator_window = dialog_pool.get(PasswordGenerator)
         password_generator_window.setModal(True)
         password_generator_window.show()
 
-    def validate_input(self):
-        if not (
-            self.ui.le_title.text()
-            and self.ui.le_username.text()
-            and self.ui.le_password.text()
+    def reset(self):
+        self.clear_fields()
+        self.ui.le_password.setEchoMode(QLineEdit.Password)
+        self.ui.btn_ok.setEnabled(True)
+
+    def clear_fields(self):
+        for widget in (
+            self.ui.le_title,
+            self.ui.le_username,
+            self.ui.le_password,
+            self.ui.le_url,
+            self.ui.te_notes,
         ):
-            raise Exception("Please fill in all the required fields.")
-        return {
-            "title": self.ui.le_title.text(),
-            "username": self.ui.le_username.text(),
-            "password": self.ui.le_password.text(),
-            "url": self.ui.le_url.text(),
-            "notes": self.ui.te_notes.toPlainText(),
-        }
+            widget.clear()
+
+    def validate_input(self):
+        return validate_entry(
+            {
+                "title": self.ui.le_title.text(),
+                "username": self.ui.le_username.text(),
+                "password": self.ui.le_password.text(),
+                "url": self.ui.le_url.text(),
+                "notes": self.ui.te_notes.toPlainText(),
+            }
+        )
 
     def add_entry(self):
         try:
             data = self.validate_input()
-            response = auth_post_request(settings.value("MY_DATABASE_ENDPOINT"), data)
-            if response.status_code == 201:  # created
-                self.close()
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
+            if not confirm_breached_password(self, data["password"]):
+                return
+            self.ui.btn_ok.setEnabled(False)
+            self.run_in_background(
+                create_entry,
+                settings.value("MY_DATABASE_ENDPOINT"),
+                data,
+                on_success=self.on_entry_added,
+                on_finished=lambda: self.ui.btn_ok.setEnabled(True),
+                on_abandoned=get_entry_cache().stale,
+            )
         except Exception as e:
             QMessageBox.warning(
                 self,
                 "Error",
                 f"{str(e)}",
             )
+
+    def on_entry_added(self, response):
+        if response.status_code in (200, 201):  # created, and bound
+            entry = get_cipher().decrypt_entry(response.json(), SEALED_FIELDS)
+            get_entry_cache().update(entry)
+            self.close()
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
@@ -0,0 +1,339 @@
+"""Vault-wide password health audit: reused, weak, breached and near-duplicate
+passwords.
+
+Passwords are never compared pairwise. Each one is hashed into a bucket, once
+by its exact value and once by its skeleton (see `skeleton`), and a bucket
+holding several entries is a finding. Adding, editing or removing an entry
+only touches its own buckets, so the audit is kept up to date as the vault
+changes instead of being run again.
+
+The table model keeps passwords encrypted, they are decrypted for the audit
+and dropped right away: the audit only holds digests of the passwords, and
+what was found out about them.
+"""
+
+import hashlib
+import string
+from collections import namedtuple
+
+from PyQt5.QtCore import QObject, QTimer, pyqtSignal
+
+from strength import L33T_TABLE, MIN_ACCOUNT_SCORE, estimate_many
+
+# Characters dropped from the end of a password before taking its skeleton,
+# the counters and years people bump when asked for a new password.
+TRAILING_CHARACTERS = string.digits + string.punctuation + " "
+# Shorter skeletons match too many unrelated passwords.
+MIN_SKELETON_LENGTH = 4
+# Rows changed at once that are still audited in the GUI thread, above this
+# the audit is run again on a worker.
+INCREMENTAL_LIMIT = 200
+# Delay before `AuditMonitor.changed` is emitted, so a burst of row changes
+# is announced once.
+CHANGED_DELAY_MS = 200
+
+Record = namedtuple("Record", ["digest", "skeleton", "strength", "breaches"])
+
+
+def digest(password):
+    return hashlib.blake2b(password.encode(), digest_size=16).digest()
+
+
+def skeleton(password):
+    """Returns what is left of a password once its variations are removed.
+
+    The password is lower cased, its trailing digits and symbols are dropped,
+    l33t characters are read as the letters they stand for and only letters
+    are kept, so "Summer2023!", "summer2024" and "$ummer!" share a skeleton.
+
+    Returns:
+        bytes: Digest of the skeleton, None if it is too short to tell.
+    """
+    lower = password.lower().rstrip(TRAILING_CHARACTERS)
+    letters = "".join(filter(str.isalpha, lower.translate(L33T_TABLE)))
+    if len(letters) < MIN_SKELETON_LENGTH:
+        return None
+    return digest(letters)
+
+
+class PasswordAudit:
+    """Findings about a set of entries, updated one entry at a time.
+
+    Args:
+        strengths (dict): Digest -> `Strength` of passwords already
+            estimated, e.g. by a previous audit.
+        breach_index (breaches.BreachIndex): Index the passwords are looked
+            up in, None to skip the breach check.
+    """
+
+    def __init__(self, strengths=None, breach_index=None):
+        self.records = {}  # id url -> Record
+        self.reused = {}  # digest -> ids
+        self.similar = {}  # skeleton -> digest -> ids
+        self.weak = set()
+        self.breached = set()
+        self.strengths = strengths if strengths is not None else {}
+        self.breach_index = breach_index
+
+    def __len__(self):
+        return len(self.records)
+
+    def strength(self, password, password_digest):
+        strength = self.strengths.get(password_digest)
+        if strength is None:
+            strength = self.strengths[password_digest] = estimate_many([password])[0]
+        return strength
+
+    def breaches(self, password):
+        if self.breach_index is None:
+            return 0
+        return self.breach_index.count_password(password)
+
+    def add(self, id_url, password):
+        """Audits a new entry, or an entry whose password changed."""
+        self.remove(id_url)
+        if not password:
+            return
+        password_digest = digest(password)
+        record = Record(
+            password_digest,
+            skeleton(password),
+            self.strength(password, password_digest),
+            self.breaches(password),
+        )
+        self.records[id_url] = record
+        self.reused.setdefault(record.digest, set()).add(id_url)
+        if record.skeleton is not None:
+            digests = self.similar.setdefault(record.skeleton, {})
+            digests.setdefault(record.digest, set()).add(id_url)
+        if record.strength.score < MIN_ACCOUNT_SCORE:
+            self.weak.add(id_url)
+        if record.breaches:
+            self.breached.add(id_url)
+
+    def update(self, id_url, password):
+        """Audits an edited entry, nothing to do if its password is the same."""
+        record = self.records.get(id_url)
+        if record is None or not password or record.digest != digest(password):
+            self.add(id_url, password)
+
+    def remove(self, id_url):
+        record = self.records.pop(id_url, None)
+        if record is None:
+            return
+        discard(self.reused, record.digest, id_url)
+        if record.skeleton is not None:
+            digests = self.similar[record.skeleton]
+            discard(digests, record.digest, id_url)
+            if not digests:
+                del self.similar[record.skeleton]
+        self.weak.discard(id_url)
+        self.breached.discard(id_url)
+
+    def reused_groups(self):
+        """Returns the sets of entries sharing the same password."""
+        return [ids for ids in self.reused.values() if len(ids) > 1]
+
+    def similar_groups(self):
+        """Returns the sets of entries whose passwords differ but share a
+        skeleton. Entries reusing a password count once per password."""
+        return [
+            set().union(*digests.values())
+            for digests in self.similar.values()
+            if len(digests) > 1
+        ]
+
+    def weak_entries(self):
+        """Returns the weak entries with their `Strength`, weakest first."""
+        return sorted(
+            ((id_url, self.records[id_url].strength) for id_url in self.weak),
+            key=lambda item: item[1].guesses_log10,
+        )
+
+    def breached_entries(self):
+        """Returns the breached entries with the number of times their
+        password was seen, most seen first."""
+        return sorted(
+            ((id_url, self.records[id_url].breaches) for id_url in self.breached),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+
+
+def discard(buckets, key, id_url):
+    ids = buckets[key]
+    ids.discard(id_url)
+    if not ids:
+        del buckets[key]
+
+
+def unseal(id_urls, passwords, cipher):
+    """Yields the plain passwords of the table model, or "" for a password
+    that can not be decrypted, which is left out of the audit."""
+    from vault_crypto import DecryptionError
+
+    for id_url, password in zip(id_urls, passwords):
+        if cipher is None:
+            yield password
+            continue
+        try:
+            yield cipher.decrypt_field("password", password, id_url)
+        except DecryptionError:
+            yield ""
+
+
+def audit_entries(id_urls, passwords, strengths=None):
+    """Audits a whole vault, meant to run on a worker.
+
+    Every distinct password is estimated once, however many entries use it,
+    and not at all if `strengths` already knows it. Passwords are also looked
+    up in the breached password index, if one is installed.
+
+    Args:
+        id_urls (list): Ids of the entries.
+        passwords (list): Their passwords as the table model holds them, in
+            the same order.
+        strengths (dict): Digest -> `Strength` known from a previous audit.
+
+    Returns:
+        PasswordAudit: The audit of the entries.
+
+    Raises:
+        ValueError: If the breached password index file is invalid.
+    """
+    from breaches import get_breach_index
+    from vault_crypto import get_cipher
+
+    passwords = list(unseal(id_urls, passwords, get_cipher()))
+    strengths = dict(strengths or {})
+    digests = [digest(password) for password in passwords]
+    missing = {}
+    for password, password_digest in zip(passwords, digests):
+        if password and password_digest not in strengths:
+            missing.setdefault(password_digest, password)
+    strengths.update(zip(missing, estimate_many(missing.values())))
+    audit = PasswordAudit(strengths, get_breach_index())
+    for id_url, password in zip(id_urls, passwords):
+        audit.add(id_url, password)
+    return audit
+
+
+class AuditMonitor(QObject):
+    """Keeps the audit of a `VaultTableModel` in line with its rows.
+
+    Nothing is audited until `start` is called. The first pass runs on a
+    worker, after which the rows the model inserts, removes or changes are
+    applied to the audit as they happen. A reset, or a batch of rows too large
+    to audit in the GUI thread, runs the pass again on a worker, reusing the
+    strengths already estimated.
+    """
+
+    # the findings changed, `audit` holds the new ones
+    changed = pyqtSignal()
+    failed = pyqtSignal(object)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.audit = None
+        self.task = None
+        self.outdated = False
+        self.changed_timer = QTimer(self)
+        self.changed_timer.setSingleShot(True)
+        self.changed_timer.setInterval(CHANGED_DELAY_MS)
+        self.changed_timer.timeout.connect(self.changed)
+        model.modelReset.connect(self.restart)
+        model.rowsInserted.connect(self.on_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self.on_rows_about_to_be_removed)
+        model.dataChanged.connect(self.on_data_changed)
+
+    def is_running(self):
+        return self.task is not None
+
+    def start(self) -> None:
+        """Audits the whole vault on a worker, unless it is being audited.
+
+        Returns: None
+        """
+        from workers import get_executor
+
+        if self.task is not None:
+            return
+        self.outdated = False
+        id_urls, passwords = self.model.columns(("id", "password"))
+        strengths = self.audit.strengths if self.audit is not None else None
+        self.task = get_executor().submit(
+            audit_entries, id_urls, passwords, strengths
+        )
+        self.task.succeeded.connect(self.on_audited)
+        self.task.failed.connect(self.on_failed)
+
+    def restart(self):
+        if self.task is not None:
+            # the rows being audited are stale already
+            self.outdated = True
+        elif self.audit is not None:
+            self.start()
+
+    def stop(self) -> None:
+        """Drops the audit and the pass in progress.
+
+        Returns: None
+        """
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.audit = None
+        self.outdated = False
+        self.changed_timer.stop()
+
+    def on_audited(self, audit):
+        self.task = None
+        self.audit = audit
+        if self.outdated:
+            self.start()
+        self.changed.emit()
+
+    def on_failed(self, error):
+        self.task = None
+        self.failed.emit(error)
+
+    def rows_changed(self, first, last):
+        """Tells whether the rows can be applied to the audit as they are."""
+        if self.task is not None:
+            self.outdated = True
+            return False
+        if self.audit is None:
+            return False
+        if last - first >= INCREMENTAL_LIMIT:
+            self.start()
+            return False
+        self.changed_timer.start()
+        return True
+
+    def rows(self, first, last):
+        from vault_crypto import get_cipher
+
+        id_urls, passwords = self.model.columns(
+            ("id", "password"), range(first, last + 1)
+        )
+        return zip(id_urls, unseal(id_urls, passwords, get_cipher()))
+
+    def on_rows_inserted(self, parent, first, last):
+        if self.rows_changed(first, last):
+            for id_url, password in self.rows(first, last):
+                self.audit.add(id_url, password)
+
+    def on_rows_about_to_be_removed(self, parent, first, last):
+        if self.task is None and self.audit is not None:
+            # removing is cheap however many rows go
+            for id_url in self.model.columns(("id",), range(first, last + 1))[0]:
+                self.audit.remove(id_url)
+            self.changed_timer.start()
+        else:
+            self.rows_changed(first, last)
+
+    def on_data_changed(self, top_left, bottom_right):
+        if self.rows_changed(top_left.row(), bottom_right.row()):
+            for id_url, password in self.rows(top_left.row(), bottom_right.row()):
+                self.audit.update(id_url, password)
@@ -0,0 +1,215 @@
+"""Offline check of passwords against a list of breached password hashes.
+
+The list is the SHA-1 dump of Have I Been Pwned (or any list in its format),
+converted once into a binary index that is memory-mapped, never read into
+memory: a lookup touches the bucket table and a dozen records, whatever the
+size of the file. Nothing is sent over the network.
+
+Layout (integers are little endian):
+
+    b"PBI1" | uint32 prefix bits | uint64 count | buckets | records
+
+Records are sorted by hash, each is the SHA-1 digest without its first two
+bytes followed by the number of times the password was seen (uint32).
+`buckets` holds 2**16 + 1 uint64 record numbers: the records of the hashes
+starting with the two bytes `p` are `records[buckets[p]:buckets[p + 1]]`,
+which a binary search narrows down to the password's.
+
+Run this module to build the index from the dump, either the single file
+"ordered by hash" or a directory of range files named after their five hex
+character prefix, as saved by the range downloader:
+
+    python src/breaches.py pwned-passwords-sha1-ordered-by-hash.txt data/breaches.bin
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from PyQt5.QtCore import QSettings
+
+settings = QSettings("Passify", "Passify")
+
+MAGIC = b"PBI1"
+HEADER = struct.Struct("<4sIQ")
+PREFIX_BITS = 16
+PREFIX_SIZE = PREFIX_BITS // 8
+BUCKET_COUNT = 2**PREFIX_BITS
+BUCKETS_SIZE = 8 * (BUCKET_COUNT + 1)
+BUCKET_RANGE = struct.Struct("<2Q")
+SUFFIX_SIZE = hashlib.sha1().digest_size - PREFIX_SIZE
+RECORD = struct.Struct(f"<{SUFFIX_SIZE}sI")
+# Records written at once by the builder.
+WRITE_BATCH = 65536
+
+
+class BreachIndex:
+    """Read only view of a breached password index file.
+
+    Args:
+        path (str): Path of the index, see `build_index`.
+
+    Raises:
+        ValueError: If the file is not a breached password index.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < HEADER.size + BUCKETS_SIZE:
+                raise ValueError("The breached password index is truncated.")
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, prefix_bits, self.count = HEADER.unpack_from(self.data)
+        if magic != MAGIC or prefix_bits != PREFIX_BITS:
+            raise ValueError("The file is not a breached password index.")
+        self.records_start = HEADER.size + BUCKETS_SIZE
+        if size != self.records_start + self.count * RECORD.size:
+            raise ValueError("The breached password index is truncated.")
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.data.close()
+
+    def count_digest(self, digest):
+        """Returns how many times the SHA-1 `digest` was seen, 0 if never."""
+        prefix = int.from_bytes(digest[:PREFIX_SIZE], "big")
+        low, high = BUCKET_RANGE.unpack_from(self.data, HEADER.size + 8 * prefix)
+        suffix = digest[PREFIX_SIZE:]
+        data = self.data
+        start = self.records_start
+        while low < high:
+            middle = (low + high) // 2
+            offset = start + middle * RECORD.size
+            found = data[offset : offset + SUFFIX_SIZE]
+            if found < suffix:
+                low = middle + 1
+            elif found > suffix:
+                high = middle
+            else:
+                return RECORD.unpack_from(data, offset)[1]
+        return 0
+
+    def count_password(self, password):
+        """Returns how many times `password` was seen in breaches."""
+        return self.count_digest(hashlib.sha1(password.encode()).digest())
+
+
+def read_dump(path):
+    """Yields the (digest, count) pairs of a dump in hash order.
+
+    Args:
+        path (str): A file of "HASH:COUNT" lines ordered by hash, or a
+            directory of range files whose names are the first five hex
+            characters of their hashes and whose lines hold the rest.
+    """
+    if os.path.isdir(path):
+        for name in sorted(os.listdir(path)):
+            prefix = os.path.splitext(name)[0].upper()
+            with open(os.path.join(path, name), encoding="ascii") as file:
+                yield from read_lines(file, prefix)
+    else:
+        with open(path, encoding="ascii") as file:
+            yield from read_lines(file)
+
+
+def read_lines(lines, prefix=""):
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        hex_digest, _, count = line.partition(":")
+        yield bytes.fromhex(prefix + hex_digest), int(count or 1)
+
+
+def build_index(pairs, output):
+    """Writes the index of a dump to a binary file.
+
+    Records are streamed to the file and the bucket table is filled in at the
+    end, so a dump of any size is converted without holding it in memory.
+
+    Args:
+        pairs (iterable): (digest, count) pairs sorted by digest, see
+            `read_dump`.
+        output (file): Binary file open for writing, must be seekable.
+
+    Returns:
+        int: The number of records written.
+
+    Raises:
+        ValueError: If the hashes are not SHA-1 digests in ascending order.
+    """
+    output.write(HEADER.pack(MAGIC, PREFIX_BITS, 0))
+    output.write(bytes(BUCKETS_SIZE))
+    # records before each bucket, filled in as the buckets go by
+    buckets = array("Q", bytes(BUCKETS_SIZE))
+    written = 0
+    previous = b""
+    batch = bytearray()
+    prefix = 0
+    for digest, count in pairs:
+        if len(digest) != hashlib.sha1().digest_size:
+            raise ValueError(f"Not a SHA-1 hash: {digest.hex().upper()}")
+        if digest <= previous:
+            raise ValueError("The hashes are not sorted or contain duplicates.")
+        previous = digest
+        bucket = int.from_bytes(digest[:PREFIX_SIZE], "big")
+        while prefix < bucket:
+            prefix += 1
+            buckets[prefix] = written
+        batch += RECORD.pack(digest[PREFIX_SIZE:], min(count, 2**32 - 1))
+        written += 1
+        if len(batch) >= WRITE_BATCH * RECORD.size:
+            output.write(batch)
+            batch.clear()
+    output.write(batch)
+    while prefix < BUCKET_COUNT:
+        prefix += 1
+        buckets[prefix] = written
+    output.seek(0)
+    output.write(HEADER.pack(MAGIC, PREFIX_BITS, written))
+    if sys.byteorder == "big":
+        buckets.byteswap()
+    output.write(buckets.tobytes())
+    return written
+
+
+_breach_index = None
+
+
+def get_breach_index():
+    """Returns the breached password index, opening it on first use.
+
+    Returns:
+        BreachIndex: The index, None if there is no index file (the check is
+            optional, the dump is too large to ship).
+
+    Raises:
+        ValueError: If the file is not a breached password index.
+    """
+    global _breach_index
+    if _breach_index is None:
+        path = settings.value("BREACH_INDEX_FILE")
+        if not path or not os.path.exists(path):
+            return None
+        _breach_index = BreachIndex(path)
+    return _breach_index
+
+
+def breach_count(password):
+    """Returns how many times `password` was seen in breaches, 0 if it never
+    was or no index is installed."""
+    index = get_breach_index()
+    return index.count_password(password) if index is not None else 0
+
+
+if __name__ == "__main__":
+    dump_path, output_path = sys.argv[1:3]
+    with open(f"{output_path}.tmp", "wb") as output:
+        written = build_index(read_dump(dump_path), output)
+    os.replace(f"{output_path}.tmp", output_path)
+    print(f"Indexed {written} hashes into {output_path}")
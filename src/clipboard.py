@@ -0,0 +1,80 @@
+import hashlib
+
+from PyQt5.QtCore import QMimeData, QObject, QSettings, QTimer
+from PyQt5.QtWidgets import QApplication
+
+settings = QSettings("Passify", "Passify")
+
+# Tells KDE's Klipper, and the clipboard managers following its convention,
+# not to keep the copied text in their history.
+PASSWORD_MANAGER_HINT = "x-kde-passwordManagerHint"
+
+
+class ClipboardManager(QObject):
+    """Copies text to the system clipboard and clears it after a while.
+
+    One timer serves every copy: a new copy restarts it, so copying again and
+    again never piles up timers. When it fires the clipboard is only cleared
+    if it still holds the last text copied here, never what the user copied
+    from another application since. Only a digest of that text is kept.
+
+    Args:
+        timeout (int): Seconds before the clipboard is cleared, 0 to never
+            clear it.
+    """
+
+    def __init__(self, timeout, parent=None):
+        super().__init__(parent)
+        self.copied_digest = None
+        self.clear_timer = QTimer(self)
+        self.clear_timer.setSingleShot(True)
+        self.clear_timer.setInterval(timeout * 1000)
+        self.clear_timer.timeout.connect(self.clear)
+        self.timeout = timeout
+        # the timer does not outlive the application, the clipboard may
+        QApplication.instance().aboutToQuit.connect(self.clear)
+
+    def copy(self, text, secret=False):
+        """Puts text on the clipboard, to be cleared after the timeout.
+
+        Args:
+            text (str): The text to copy.
+            secret (bool): Marks the text as a password, so clipboard
+                managers leave it out of their history.
+        """
+        mime_data = QMimeData()
+        mime_data.setText(text)
+        if secret:
+            mime_data.setData(PASSWORD_MANAGER_HINT, b"secret")
+        QApplication.clipboard().setMimeData(mime_data)
+        if self.timeout > 0:
+            self.copied_digest = digest(text)
+            self.clear_timer.start()
+
+    def clear(self):
+        """Empties the clipboard if it still holds the text copied last."""
+        self.clear_timer.stop()
+        if self.copied_digest is None:
+            return
+        clipboard = QApplication.clipboard()
+        if digest(clipboard.text()) == self.copied_digest:
+            clipboard.clear()
+        self.copied_digest = None
+
+
+def digest(text):
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+_clipboard = None
+
+
+def get_clipboard() -> ClipboardManager:
+    """Returns the application wide clipboard manager, creating it on first
+    use."""
+    global _clipboard
+    if _clipboard is None:
+        _clipboard = ClipboardManager(
+            int(settings.value("CLIPBOARD_CLEAR_SECONDS", 30))
+        )
+    return _clipboard
@@ -1,6 +1,5 @@
-import os
-
 from PyQt5.QtCore import QSettings, Qt, pyqtSignal
+from PyQt5.QtGui import QColor, QPainter
 from PyQt5.QtWidgets import (
     QAction,
     QDesktopWidget,
@@ -8,9 +7,12 @@ from PyQt5.QtWidgets import (
     QLabel,
     QLineEdit,
     QMainWindow,
+    QMessageBox,
     QWidget,
 )
-from PyQt5.uic import loadUi
+
+import telemetry
+from ui_loader import load_ui
 
 settings = QSettings("Passify", "Passify")
 
@@ -27,6 +29,64 @@ class ClickableLabel(QLabel):
 
 
 class DoubleClickShowPassword(QLineEdit):
+    # colour of the strength meter for each score, see `strength.estimate`
+    STRENGTH_COLORS = ("#d9534f", "#f0ad4e", "#f7d154", "#8bc34a", "#2e7d32")
+    STRENGTH_METER_HEIGHT = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.strength = None
+        self.estimator = None
+
+    def set_strength_meter(self, enabled):
+        """Shows how hard the typed password is to guess under the text.
+
+        The estimate is redone on every keystroke, see `strength.Estimator`.
+        """
+        if enabled:
+            from strength import Estimator
+
+            self.estimator = Estimator()
+            self.textChanged.connect(self.update_strength)
+            self.update_strength(self.text())
+        else:
+            self.textChanged.disconnect(self.update_strength)
+            self.estimator = None
+            self.strength = None
+            self.setToolTip("")
+            self.update()
+
+    def update_strength(self, text):
+        from strength import SCORE_LABELS
+
+        if text:
+            self.strength = self.estimator.estimate(text)
+        else:
+            # nothing typed is kept once the field is cleared
+            self.estimator.clear()
+            self.strength = None
+        if self.strength is None:
+            self.setToolTip("")
+        else:
+            self.setToolTip(
+                f"Strength: {SCORE_LABELS[self.strength.score]}\n"
+                f"{self.strength.warning}".strip()
+            )
+        self.update()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.strength is None:
+            return
+        painter = QPainter(self)
+        painter.fillRect(
+            0,
+            self.height() - self.STRENGTH_METER_HEIGHT,
+            self.width() * (self.strength.score + 1) // len(self.STRENGTH_COLORS),
+            self.STRENGTH_METER_HEIGHT,
+            QColor(self.STRENGTH_COLORS[self.strength.score]),
+        )
+
     def mouseDoubleClickEvent(self, event) -> None:
         if self.echoMode() == 0:  # Normal Mode
             self.setEchoMode(QLineEdit.Password)
@@ -45,20 +105,93 @@ class DoubleClickShowPassword(QLineEdit):
     def customOptionClicked(self):
         from password_generator import PasswordGenerator
 
-        window = PasswordGenerator()
+        window = dialog_pool.get(PasswordGenerator)
         window.setModal(True)
         window.show()
 
 
-class CustomQWidget(QWidget):
+def confirm_breached_password(parent, password) -> bool:
+    """Asks whether to save a password that appears in the breach index.
+
+    Args:
+        parent (QWidget): Parent of the question box.
+        password (str): The password about to be saved.
+
+    Returns: bool: True if the password is not known to be breached, or the
+        user wants to save it anyway.
+    """
+    from breaches import breach_count
+
+    count = breach_count(password)
+    if not count:
+        return True
+    response = QMessageBox.question(
+        parent,
+        "Breached password",
+        f"This password appeared {count:,} times in data breaches, attackers "
+        "try it early. Save it anyway?",
+    )
+    return response == QMessageBox.Yes
+
+
+class BackgroundTasksMixin:
+    """Runs request helpers off the GUI thread on behalf of a window.
+
+    Every task started through `run_in_background` is remembered until it
+    finishes, so the window can cancel whatever is still pending when it is
+    closed and no callback fires on a window that is gone.
+    """
+
+    def run_in_background(
+        self,
+        fn,
+        *args,
+        on_success=None,
+        on_error=None,
+        on_finished=None,
+        on_abandoned=None,
+    ):
+        from workers import get_executor
+
+        task = get_executor().submit(fn, *args)
+        self.tasks.add(task)
+        if on_success:
+            task.succeeded.connect(on_success)
+        task.failed.connect(on_error or self.show_request_error)
+        task.finished.connect(lambda: self.tasks.discard(task))
+        if on_finished:
+            task.finished.connect(on_finished)
+        if on_abandoned:
+            # the window may be gone by then, see `RequestTask.abandoned`
+            task.abandoned.connect(on_abandoned)
+        return task
+
+    def cancel_task(self, task):
+        task.cancel()
+        self.tasks.discard(task)
+
+    def cancel_tasks(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks.clear()
+
+    def show_request_error(self, error):
+        QMessageBox.warning(
+            self,
+            "Error",
+            f"{str(error)}",
+        )
+
+
+class CustomQWidget(BackgroundTasksMixin, QWidget):
     def __init__(self, ui_file_name, window_title):
         super().__init__()
-        self.ui_file = os.path.join(settings.value("UI_DIRECTORY"), ui_file_name)
-        self.ui = loadUi(self.ui_file, self)
+        self.tasks = set()
+        self.ui = load_ui(ui_file_name, self)
         self.ui.setWindowTitle(window_title)
         self.ui.resize(
-            settings.value("Width"),
-            settings.value("Height"),
+            settings.value("WIDTH", type=int),
+            settings.value("HEIGHT", type=int),
         )
         self.center()
 
@@ -68,16 +201,20 @@ class CustomQWidget(QWidget):
         qr.moveCenter(cp)
         self.move(qr.topLeft())
 
+    def closeEvent(self, event):
+        self.cancel_tasks()
+        super().closeEvent(event)
+
 
-class CustomQMainWindow(QMainWindow):
+class CustomQMainWindow(BackgroundTasksMixin, QMainWindow):
     def __init__(self, ui_file_name, window_title):
         super().__init__()
-        self.ui_file = os.path.join(settings.value("UI_DIRECTORY"), ui_file_name)
-        self.ui = loadUi(self.ui_file, self)
+        self.tasks = set()
+        self.ui = load_ui(ui_file_name, self)
         self.ui.setWindowTitle(window_title)
         self.ui.resize(
-            settings.value("Width"),
-            settings.value("Height"),
+            settings.value("WIDTH", type=int),
+            settings.value("HEIGHT", type=int),
         )
         self.center()
 
@@ -87,19 +224,24 @@ class CustomQMainWindow(QMainWindow):
         qr.moveCenter(cp)
         self.move(qr.topLeft())
 
+    def closeEvent(self, event):
+        self.cancel_tasks()
+        super().closeEvent(event)
+
 
-class CustomQDialog(QDialog):
+class CustomQDialog(BackgroundTasksMixin, QDialog):
     def __init__(self, ui_file_name, window_title, width=None, height=None):
         super().__init__()
-        self.ui_file = os.path.join(settings.value("UI_DIRECTORY"), ui_file_name)
-        self.ui = loadUi(self.ui_file, self)
+        self.tasks = set()
+        self.finished.connect(self.cancel_tasks)
+        self.ui = load_ui(ui_file_name, self)
         self.ui.setWindowTitle(window_title)
         if width and height:
             self.ui.resize(width, height)
         else:
             self.ui.resize(
-                settings.value("Width"),
-                settings.value("Height"),
+                settings.value("WIDTH", type=int),
+                settings.value("HEIGHT", type=int),
             )
         self.center()
 
@@ -108,3 +250,57 @@ class CustomQDialog(QDialog):
         cp = QDesktopWidget().availableGeometry().center()
         qr.moveCenter(cp)
         self.move(qr.topLeft())
+
+    def reset(self, *args):
+        """Prepares the dialog to be shown again by `DialogPool`.
+
+        Dialogs override this to clear whatever is left from the last time
+        they were open, so a reused instance behaves like a new one.
+        """
+
+
+class DialogPool:
+    """Keeps one built instance of each dialog class for reuse.
+
+    Building a dialog from its form, connecting its signals and centering it
+    only happens the first time it is opened. Later opens just call the
+    dialog's `reset` with the new arguments.
+    """
+
+    def __init__(self):
+        self.dialogs = {}
+
+    def get(self, dialog_class, *args, setup=None):
+        """Returns the dialog of the given class, reset with `args`.
+
+        Args:
+            dialog_class (type): A `CustomQDialog` subclass.
+            *args: Passed on to the dialog's `reset`.
+            setup (callable): Called with the dialog once, right after it is
+                built, to connect it to the caller.
+
+        Returns: CustomQDialog
+        """
+        dialog = self.dialogs.get(dialog_class)
+        if dialog is None:
+            with telemetry.timed(
+                telemetry.PHASE_SECONDS, f"dialog.{dialog_class.__name__}"
+            ):
+                dialog = dialog_class()
+            self.dialogs[dialog_class] = dialog
+            if setup:
+                setup(dialog)
+        elif dialog.isVisible():
+            dialog.raise_()
+        dialog.reset(*args)
+        return dialog
+
+    def clear(self):
+        """Closes and drops every pooled dialog, e.g. when signing out."""
+        for dialog in self.dialogs.values():
+            dialog.close()
+            dialog.deleteLater()
+        self.dialogs.clear()
+
+
+dialog_pool = DialogPool()
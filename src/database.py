@@ -1,34 +1,68 @@
-import json
 import sys
+import threading
 
 from PyQt5 import QtCore
-from PyQt5.QtCore import QSettings, QTimer, QUrl
-from PyQt5.QtGui import QDesktopServices
+from PyQt5.QtCore import QSettings, QTimer, QUrl, pyqtSignal
+from PyQt5.QtGui import QDesktopServices, QKeySequence
 from PyQt5.QtWidgets import (
     QAbstractItemView,
-    QApplication,
+    QAction,
     QFileDialog,
     QHeaderView,
     QLabel,
     QMessageBox,
+    QProgressBar,
+    QPushButton,
+    QShortcut,
     QStyledItemDelegate,
-    QTableWidget,
-    QTableWidgetItem,
 )
 
+import telemetry
+import vault_cache
+import vault_crypto
 from add_entry import AddEntry
-from custom_widgets import CustomQMainWindow
+from audit import AuditMonitor
+from clipboard import get_clipboard
+from custom_widgets import CustomQMainWindow, dialog_pool
 from edit_entry import EditEntry
 from edit_profile import Profile
-from utils import auth_delete_request, auth_get_request, get_error_message, post_request
+from entry_cache import get_entry_cache
+from export import READ_FIELDS, ExportCancelled, write_json
+from search import SearchPipeline, VaultFilterProxyModel
+from sync import VaultSync, rekey_vault
+from tokens import TokenRefresher
+from utils import (
+    delete_entries,
+    get_error_message,
+    set_access_token,
+)
+from vault_model import (
+    ID_COLUMN,
+    NOTES_COLUMN,
+    PASSWORD_COLUMN,
+    URL_COLUMN,
+    VaultTableModel,
+)
 
 settings = QSettings("Passify", "Passify")
 
+# Shown in place of the notes of an entry that could not be decrypted.
+UNREADABLE_TEXT = "Could not be decrypted"
+
 
 class Database(CustomQMainWindow):
+    # (written, total) entries, emitted from the export worker
+    export_progress = pyqtSignal(int, int)
+    # rows processed, emitted from the import worker
+    import_progress = pyqtSignal(int)
+    # (done, total) requests, emitted from the bulk delete worker
+    delete_progress = pyqtSignal(int, int)
+
     def __init__(self):
         super().__init__("database.ui", "Passify - My Database")
         self.ui.actionExport.triggered.connect(self.export_data)
+        self.ui.actionExportSelection.triggered.connect(self.export_selection)
+        self.ui.actionImport.triggered.connect(self.import_data)
         self.ui.actionReload.triggered.connect(self.reload)
         self.ui.actionAddEntry.triggered.connect(self.add_entry)
         self.ui.actionEditEntry.triggered.connect(self.edit_entry)
@@ -37,13 +71,172 @@ class Database(CustomQMainWindow):
         self.ui.actionLightTheme.triggered.connect(self.light)
         self.ui.actionDarkTheme.triggered.connect(self.dark)
         self.ui.actionPasswordGenerator.triggered.connect(self.password_generator)
+        self.ui.actionSecurityAudit.triggered.connect(self.security_audit)
         self.ui.actionSignOut.triggered.connect(self.sign_out)
         self.ui.action_about.triggered.connect(self.show_about_dialog)
         self.ui.searchBar.textChanged.connect(self.filter_table)
+        # the diagnostics panel has no menu entry
+        shortcut = QShortcut(QKeySequence("Ctrl+Shift+D"), self)
+        shortcut.activated.connect(self.diagnostics)
         self.statusbar_label = QLabel("")
         self.ui.statusbar.addWidget(self.statusbar_label)
-        # Schedule the reload method to be called after a short delay
-        QTimer.singleShot(100, self.reload)
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)  # busy indicator
+        self.progress_bar.setMaximumWidth(120)
+        self.progress_bar.hide()
+        self.ui.statusbar.addPermanentWidget(self.progress_bar)
+        # Cancels the running import, export or bulk delete
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_operation)
+        self.cancel_button.hide()
+        self.ui.statusbar.addPermanentWidget(self.cancel_button)
+        self.cancel_event = None
+        self.export_progress.connect(self.on_export_progress)
+        self.import_progress.connect(self.on_import_progress)
+        self.delete_progress.connect(self.on_delete_progress)
+        self.token_refresher = TokenRefresher(self)
+        self.token_refresher.schedule()
+        self.entry_cache = get_entry_cache()
+        self.entry_cache.entry_changed.connect(self.on_entry_saved)
+        self.entry_cache.went_stale.connect(self.reload)
+        self.reload_task = None
+        self.page_task = None
+        # total reported by a paginated server, and callbacks waiting for
+        # the remaining pages
+        self.total_entries = None
+        self.all_pages_callbacks = []
+        # ids of the entries that could not be decrypted, see `sync.Page`
+        self.unreadable_entries = set()
+        self.sync = VaultSync(settings.value("MY_DATABASE_ENDPOINT"))
+        self.setup_table()
+        self.cache_timer = QTimer(self)
+        self.cache_timer.setSingleShot(True)
+        self.cache_timer.setInterval(1000)
+        self.cache_timer.timeout.connect(self.save_cache)
+        # Show the last synced entries right away, then revalidate them
+        # against the server once the event loop is running
+        self.load_cache()
+        QTimer.singleShot(0, self.reload)
+        # the vault is encrypted again at most once per session on its own
+        self.rekey_requested = bool(vault_crypto.get_previous_vault_key())
+        if self.rekey_requested:
+            # an earlier password or email change was not finished
+            QTimer.singleShot(0, self.rekey_vault)
+
+    def setup_table(self) -> None:
+        """Attaches the entries model to the table view and configures it.
+
+        Returns: None
+        """
+        self.model = VaultTableModel(self)
+        self.model.more_requested.connect(self.fetch_more)
+        self.proxy = VaultFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.ui.tableView.setModel(self.proxy)
+        self.search_pipeline = SearchPipeline(self.proxy.search_index, self)
+        self.search_pipeline.finished.connect(self.proxy.set_result)
+        # idle until the security audit is first opened
+        self.audit_monitor = AuditMonitor(self.model, self)
+        self.ui.tableView.setColumnHidden(ID_COLUMN, True)
+        self.ui.tableView.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.ui.tableView.doubleClicked.connect(self.copyRowToClipboard)
+        self.password_delegate = PasswordDelegate(self.ui.tableView)
+        self.ui.tableView.setItemDelegate(self.password_delegate)
+        self.reveal_action = QAction("Show Password", self)
+        self.reveal_action.triggered.connect(self.reveal_password)
+        self.ui.tableView.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.ui.tableView.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.ui.tableView.setContextMenuPolicy(QtCore.Qt.ActionsContextMenu)
+        self.ui.tableView.addActions(
+            [
+                self.reveal_action,
+                self.ui.actionEditEntry,
+                self.ui.actionDeleteEntry,
+                self.ui.actionExportSelection,
+            ]
+        )
+        header = self.ui.tableView.horizontalHeader()
+        # Columns are fitted to their content once per load (see
+        # `fit_columns`); ResizeToContents would measure them again on every
+        # keystroke in the search bar.
+        header.setSectionResizeMode(4, QHeaderView.Stretch)
+
+    def fit_columns(self) -> None:
+        """Resizes the columns to their content.
+
+        Returns: None
+        """
+        for column in range(4):
+            self.ui.tableView.resizeColumnToContents(column)
+
+    def selected_row(self) -> int:
+        """Returns the model row of the selected entry, or -1.
+
+        Returns: int
+        """
+        index = self.ui.tableView.currentIndex()
+        if not index.isValid():
+            return -1
+        return self.proxy.mapToSource(index).row()
+
+    def selected_rows(self) -> list:
+        """Returns the model rows of all the selected entries, in order.
+
+        Returns: list
+        """
+        return sorted(
+            self.proxy.mapToSource(index).row()
+            for index in self.ui.tableView.selectionModel().selectedRows()
+        )
+
+    def load_cache(self) -> None:
+        """Fills the table from the encrypted local cache, if there is one.
+
+        Returns: None
+        """
+        key = vault_cache.get_cache_key()
+        if key:
+            entries = vault_cache.load_cache(key)
+            if entries:
+                self.model.set_entries(entries)
+                self.fit_columns()
+                self.update_statusbar(f"{len(entries)} entries loaded from cache.")
+
+    def schedule_cache_save(self) -> None:
+        """Saves the cache shortly, coalescing bursts of changes into one write.
+
+        Returns: None
+        """
+        if vault_cache.get_cache_key():
+            self.cache_timer.start()
+
+    def save_cache(self) -> None:
+        key = vault_cache.get_cache_key()
+        if key:
+            self.run_in_background(
+                vault_cache.save_cache,
+                self.model.entries(),
+                key,
+                on_error=self.on_cache_save_failed,
+            )
+
+    def on_cache_save_failed(self, error):
+        # the vault itself is fine, only the next start is slower
+        self.update_statusbar(f"The offline copy could not be saved: {error}")
+
+    def set_read_only(self, read_only: bool) -> None:
+        """Disables the actions that need the server while working offline.
+
+        Returns: None
+        """
+        for action in (
+            self.ui.actionAddEntry,
+            self.ui.actionEditEntry,
+            self.ui.actionDeleteEntry,
+            self.ui.actionImport,
+            self.ui.actionProfile,
+        ):
+            action.setEnabled(not read_only)
 
     def export_data(self) -> None:
         """Exports saved passwords to a json file.
@@ -65,20 +258,178 @@ class Database(CustomQMainWindow):
             "JSON file (*.json)",
         )
         if file_path:
-            with open(file_path, "w") as file:
-                response = auth_get_request(
-                    settings.value("MY_DATABASE_ENDPOINT")
-                ).json()
-                export_data = [
-                    {k: v for k, v in password.items() if k != "id"}
-                    for password in response
-                ]
-                json.dump(export_data, file, indent=4)
+            self.after_all_pages(
+                lambda: self.export_entries(
+                    file_path, self.model.columns(READ_FIELDS)
+                )
+            )
+
+    def export_selection(self) -> None:
+        """Exports the selected entries to a json file.
+
+        Returns: None
+        """
+        rows = self.selected_rows()
+        if not rows:
+            QMessageBox.warning(self, "Export selection", "No entries is selected.")
+            return
+        file_path, _ = QFileDialog.getSaveFileName(
+            self,
+            f"Export {len(rows)} selected passwords to a json file:",
+            "",
+            "JSON file (*.json)",
+        )
+        if file_path:
+            self.export_entries(file_path, self.model.columns(READ_FIELDS, rows))
+
+    def export_entries(self, file_path: str, columns: list) -> None:
+        """Writes entries to a json file on a background worker.
+
+        Progress is reported in the status bar, where the export can also be
+        cancelled.
+
+        Args:
+            file_path (str): Destination of the export.
+            columns (list): One list of values per field of `READ_FIELDS`.
+
+        Returns: None
+        """
+        if not self.begin_operation("Exporting..."):
+            return
+        self.progress_bar.setRange(0, max(len(columns[0]), 1))
+        self.progress_bar.setValue(0)
+        self.run_in_background(
+            write_json,
+            file_path,
+            columns,
+            self.export_progress.emit,
+            self.cancel_event,
+            vault_crypto.get_cipher(),
+            on_success=self.on_export_finished,
+            on_error=self.on_export_failed,
+            on_finished=self.end_operation,
+        )
+        self.update_progress()
+
+    def on_export_progress(self, written, total):
+        self.progress_bar.setValue(written)
+        self.update_statusbar(f"Exporting... {written}/{total} entries")
+
+    def begin_operation(self, message: str) -> bool:
+        """Starts a cancellable import, export or bulk delete, one at a time.
+
+        Returns: bool: False if another operation is still running.
+        """
+        if self.cancel_event:
+            QMessageBox.warning(
+                self,
+                "Please wait",
+                "An import, export or delete is already running.",
+            )
+            return False
+        self.cancel_event = threading.Event()
+        self.cancel_button.show()
+        self.update_statusbar(message)
+        return True
+
+    def cancel_operation(self):
+        if self.cancel_event:
+            self.cancel_event.set()
+
+    def end_operation(self):
+        self.cancel_event = None
+        self.cancel_button.hide()
+        self.progress_bar.setRange(0, 0)  # back to a busy indicator
+        self.update_progress()
+
+    def closeEvent(self, event):
+        self.cancel_operation()
+        super().closeEvent(event)
+
+    def on_export_finished(self, result):
+        written, failed = result
+        self.update_statusbar(f"{written} entries exported.")
+        if not failed:
             QMessageBox.information(
                 self,
                 "Export Successful",
                 "Saved passwords were exported successfully!",
             )
+            return
+        message_box = QMessageBox(
+            QMessageBox.Warning,
+            "Export",
+            f"{written} entries were exported. {len(failed)} entries could not "
+            "be decrypted and were left out.",
+            QMessageBox.Ok,
+            self,
+        )
+        message_box.setDetailedText(
+            "\n".join(f"{title}: {message}" for title, message in failed)
+        )
+        message_box.exec_()
+
+    def on_export_failed(self, error):
+        if isinstance(error, ExportCancelled):
+            self.update_statusbar("Export cancelled.")
+        else:
+            self.update_statusbar("Export failed.")
+            self.show_request_error(error)
+
+    def import_data(self) -> None:
+        """Imports entries from a Passify json export or a CSV file.
+
+        The rows are validated like the add entry dialog does and uploaded
+        by a pool of workers; a per-row report is shown at the end.
+
+        Returns: None
+        """
+        from importer import import_entries
+
+        file_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Import passwords from a file:",
+            "",
+            "Passify export or CSV file (*.json *.csv)",
+        )
+        if file_path and self.begin_operation("Importing..."):
+            self.run_in_background(
+                import_entries,
+                file_path,
+                settings.value("MY_DATABASE_ENDPOINT"),
+                int(settings.value("BULK_WORKERS", 8)),
+                self.import_progress.emit,
+                self.cancel_event,
+                on_success=self.on_import_finished,
+                on_error=self.on_import_failed,
+                on_finished=self.end_operation,
+            )
+            self.update_progress()
+
+    def on_import_progress(self, processed):
+        self.update_statusbar(f"Importing... {processed} rows processed")
+
+    def on_import_finished(self, report):
+        if all("id" in entry for entry in report.entries):
+            # one model update for the whole import
+            self.model.upsert_entries(report.entries)
+            self.schedule_cache_save()
+            self.update_statusbar(self.loaded_message())
+        else:
+            self.reload()
+        message_box = QMessageBox(
+            QMessageBox.Information,
+            "Import",
+            report.summary(),
+            QMessageBox.Ok,
+            self,
+        )
+        message_box.setDetailedText(report.details())
+        message_box.exec_()
+
+    def on_import_failed(self, error):
+        self.update_statusbar("Import failed.")
+        self.show_request_error(error)
 
     def show_about_dialog(self) -> None:
         """
@@ -100,49 +451,117 @@ class Database(CustomQMainWindow):
         QMessageBox.about(self, "About Passify", about_text)
 
     def profile(self):
-        new_window = Profile()
-        new_window.finished.connect(self.reload)
+        new_window = dialog_pool.get(Profile, setup=self.setup_profile)
         new_window.setModal(True)
         new_window.show()
 
+    def setup_profile(self, dialog):
+        # cheap when nothing changed: the revalidation is answered with a 304
+        dialog.finished.connect(self.reload)
+        dialog.vault_key_changed.connect(self.rekey_vault)
+        dialog.account_deleted.connect(self.on_account_deleted)
+
+    def rekey_vault(self) -> None:
+        """Encrypts the vault again after the account password or email changed,
+        or to bind the fields of entries saved by earlier versions to them.
+
+        Until every entry is done the previous key is kept, and the run is
+        retried the next time the vault is opened.
+
+        Returns: None
+        """
+        self.update_statusbar("Encrypting the vault again...")
+        self.run_in_background(
+            rekey_vault,
+            settings.value("MY_DATABASE_ENDPOINT"),
+            int(settings.value("BULK_WORKERS", 8)),
+            on_success=self.on_vault_rekeyed,
+            on_error=self.on_rekey_failed,
+            on_finished=self.update_progress,
+        )
+        self.update_progress()
+
+    def on_vault_rekeyed(self, errors):
+        if errors:
+            self.on_rekey_failed(f"{len(errors)} entries could not be saved.")
+            return
+        # every entry uses the new key, the previous one can go
+        vault_crypto.set_vault_key(vault_crypto.get_cipher().key)
+        self.update_statusbar(self.loaded_message())
+        self.reload()
+
+    def on_rekey_failed(self, error):
+        self.update_statusbar(self.loaded_message())
+        QMessageBox.warning(
+            self,
+            "Vault encryption",
+            "The vault could not be fully encrypted again, this "
+            f"will be tried again the next time it is opened.\n{error}",
+        )
+
+    def bind_entries(self, page):
+        """Encrypts the vault again if the page holds entries whose fields
+        are not bound to them yet, see `sync.rekey_vault`."""
+        if page.unbound and not self.rekey_requested:
+            self.rekey_requested = True
+            self.rekey_vault()
+
     def sign_out(self):
         from sign_in import SignIn
 
-        settings.remove("ACCESS_TOKEN")
+        self.token_refresher.stop()
+        set_access_token(None)
         settings.remove("REFRESH_TOKEN")
+        settings.remove("EMAIL")
+        self.cache_timer.stop()
+        self.entry_cache.clear()
+        self.audit_monitor.stop()
+        get_clipboard().clear()
+        vault_crypto.clear_vault_key()
+        dialog_pool.clear()
+        # the cache stays for the next sign in, see `vault_cache.claim_cache`
         self.close()
         sign_in_window = SignIn()
         sign_in_window.show()
 
-    def refresh_token(self):
-        response = post_request(
-            settings.value("REFRESH_TOKEN_ENDPOINT"),
-            {"refresh": settings.value("REFRESH_TOKEN")},
-        )
-        ACCESS_TOKEN = response.json().get("access")
-        settings.setValue("ACCESS_TOKEN", ACCESS_TOKEN)
-        self.reload()
+    def on_account_deleted(self):
+        self.sign_out()
+        vault_cache.clear_cache()
 
     def password_generator(self):
         from password_generator import PasswordGenerator
 
-        password_generator_window = PasswordGenerator()
+        password_generator_window = dialog_pool.get(PasswordGenerator)
         password_generator_window.show()
 
+    def diagnostics(self):
+        from diagnostics import Diagnostics
+
+        diagnostics_window = dialog_pool.get(Diagnostics)
+        diagnostics_window.show()
+
+    def security_audit(self):
+        from security_audit import SecurityAudit
+
+        audit_window = dialog_pool.get(
+            SecurityAudit,
+            self.audit_monitor,
+            setup=lambda dialog: dialog.entry_activated.connect(self.open_entry),
+        )
+        audit_window.show()
+        if self.audit_monitor.audit is None:
+            # the audit covers the whole vault, then follows its changes
+            self.after_all_pages(self.audit_monitor.start)
+
     def add_entry(self):
-        new_window = AddEntry(300, 300)
-        new_window.finished.connect(self.reload)
+        new_window = dialog_pool.get(AddEntry)
         new_window.setModal(True)
         new_window.show()
 
     def edit_entry(self):
-        selected_row = self.ui.tableWidget.currentRow()
+        selected_row = self.selected_row()
         if selected_row >= 0:
-            id_url = self.ui.tableWidget.item(selected_row, 5).text()
-            new_window = EditEntry(id_url, 300, 300)
-            new_window.finished.connect(self.reload)
-            new_window.setModal(True)
-            new_window.show()
+            self.open_entry(self.model.id_url(selected_row))
         else:
             QMessageBox.warning(
                 self,
@@ -150,70 +569,146 @@ class Database(CustomQMainWindow):
                 "No entries is selected.",
             )
 
+    def open_entry(self, id_url: str) -> None:
+        """Opens the edit dialog of an entry.
+
+        Args: id_url (str): Id of the entry.
+
+        Returns: None
+        """
+        row = self.model.row(id_url)
+        if row is None or not self.ui.actionEditEntry.isEnabled():
+            return
+        entry = self.entry_cache.get(id_url)
+        if entry is None:
+            entry = self.model.entry(row)
+            self.entry_cache.put(entry)
+        new_window = dialog_pool.get(EditEntry, id_url, entry)
+        new_window.setModal(True)
+        new_window.show()
+
     def delete_entry(self):
-        selected_row = self.ui.tableWidget.currentRow()
-        if selected_row >= 0:
-            response = QMessageBox.question(
+        """Deletes the selected entries.
+
+        The requests are sent concurrently and the table is updated once all
+        of them are done.
+        """
+        rows = self.selected_rows()
+        if not rows:
+            return
+        if len(rows) == 1:
+            title = f"Delete entry {rows[0] + 1}"
+            question = "Are you sure you want to delete the selected entry?"
+        else:
+            title = f"Delete {len(rows)} entries"
+            question = (
+                f"Are you sure you want to delete the {len(rows)} selected entries?"
+            )
+        response = QMessageBox.question(self, title, question)
+        if response == QMessageBox.Yes and self.begin_operation("Deleting entries..."):
+            self.progress_bar.setRange(0, len(rows))
+            self.progress_bar.setValue(0)
+            self.run_in_background(
+                delete_entries,
+                [self.model.id_url(row) for row in rows],
+                int(settings.value("BULK_WORKERS", 8)),
+                self.delete_progress.emit,
+                self.cancel_event,
+                on_success=self.on_entries_deleted,
+                on_finished=self.end_operation,
+            )
+            self.update_progress()
+
+    def on_delete_progress(self, done, total):
+        self.progress_bar.setValue(done)
+        self.update_statusbar(f"Deleting entries... {done}/{total}")
+
+    def on_entries_deleted(self, result):
+        deleted, errors = result
+        # one model update for the whole batch
+        self.model.remove_entries(deleted)
+        for id_url in deleted:
+            self.entry_cache.discard(id_url)
+        self.update_statusbar(self.loaded_message())
+        if deleted:
+            self.schedule_cache_save()
+        if errors or self.cancel_event.is_set():
+            # a request that failed or was stopped on the way may still
+            # have been applied, the server tells which entries are left
+            self.reload()
+        if errors:
+            message_box = QMessageBox(
+                QMessageBox.Warning,
+                "Delete entries",
+                f"{len(errors)} entries could not be deleted.",
+                QMessageBox.Ok,
                 self,
-                f"Delete entry {selected_row + 1}",
-                "Are you sure you want to delete the selected entry?",
             )
-            if response == QMessageBox.Yes:
-                id_url = self.ui.tableWidget.item(selected_row, 5).text()
-                response = auth_delete_request(id_url, {})
-                if response.status_code == 204:
-                    pass
-                else:
-                    error_message = get_error_message(response)
-                    QMessageBox.warning(
-                        self,
-                        f"Error {response.status_code}",
-                        error_message,
-                    )
-                self.reload()
+            message_box.setDetailedText(
+                "\n".join(f"{id_url}: {message}" for id_url, message in errors)
+            )
+            message_box.exec_()
+
+    def on_entry_saved(self, entry):
+        """Applies an entry that was saved or revalidated to the table."""
+        if "id" not in entry:
+            self.reload()
+            return
+        self.unreadable_entries.discard(entry["id"])
+        if self.model.upsert_entry(entry):
+            self.update_statusbar(self.loaded_message())
+            self.schedule_cache_save()
 
     def reload(self):
-        response = auth_get_request(settings.value("MY_DATABASE_ENDPOINT"))
-        if response.status_code == 200:
-            entries = response.json()
-            row_count = len(entries)
-            self.update_statusbar(f"{row_count} entries loaded.")
+        if vault_crypto.get_cipher() is None:
+            return  # signed out, e.g. by a dialog closing on the way
+        if self.reload_task:
+            # a newer reload makes the pending one useless
+            self.cancel_task(self.reload_task)
+        if self.page_task:
+            self.cancel_task(self.page_task)
+            self.page_task = None
+        self.update_statusbar("Loading entries...")
+        self.reload_task = self.run_in_background(
+            self.sync.fetch,
+            on_success=self.on_reload,
+            on_error=self.on_reload_failed,
+            on_finished=self.update_progress,
+        )
+        self.update_progress()
+
+    def on_reload(self, page):
+        self.reload_task = None
+        response = page.response
+        if response.status_code in (200, 304):
+            self.set_read_only(False)
+        if response.status_code == 304:  # not modified
+            self.update_statusbar(self.loaded_message())
+            self.continue_pages()
+        elif response.status_code == 200:
+            self.sync.remember(page)
+            self.bind_entries(page)
+            entries, next_page = page.entries, page.next_page
+            self.total_entries = page.count
+            self.unreadable_entries = set(page.failed)
             self.ui.statusbar.addWidget(self.statusbar_label)
-            self.ui.tableWidget.setRowCount(row_count)
-            self.ui.tableWidget.setColumnHidden(5, True)
-            self.ui.tableWidget.setEditTriggers(QTableWidget.NoEditTriggers)
-            self.ui.tableWidget.itemDoubleClicked.connect(self.copyRowToClipboard)
-            self.ui.tableWidget.setItemDelegate(PasswordDelegate())
-            self.ui.tableWidget.setSelectionMode(QAbstractItemView.SingleSelection)
-            header = self.ui.tableWidget.horizontalHeader()
-            header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(2, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(3, QHeaderView.ResizeToContents)
-            header.setSectionResizeMode(4, QHeaderView.Stretch)
-            for row in range(row_count):
-                self.ui.tableWidget.setItem(
-                    row, 0, QTableWidgetItem(entries[row]["title"])
-                )
-                self.ui.tableWidget.setItem(
-                    row, 1, QTableWidgetItem(entries[row]["username"])
-                )
-                self.ui.tableWidget.setItem(
-                    row, 2, QTableWidgetItem(entries[row]["password"])
-                )
-                self.ui.tableWidget.setItem(
-                    row, 3, QTableWidgetItem(entries[row]["url"])
-                )
-                self.ui.tableWidget.setItem(
-                    row, 4, QTableWidgetItem(entries[row]["notes"])
-                )
-                self.ui.tableWidget.setItem(
-                    row, 5, QTableWidgetItem(entries[row]["id"])
-                )
+            with telemetry.timed(telemetry.PHASE_SECONDS, "reload.render"):
+                if self.model.rowCount() and next_page is None:
+                    changed = self.model.apply_entries(entries)
+                else:
+                    # a first page can not be compared with the whole table
+                    changed = len(entries)
+                    self.model.set_entries(entries, next_page)
+                self.update_statusbar(self.loaded_message())
+                if changed:
+                    # cached entries may be stale now, they refill as they
+                    # are used
+                    self.entry_cache.clear()
+                    self.fit_columns()
+                    self.schedule_cache_save()
+            self.continue_pages()
             # print(response.json())
-        elif response.status_code == 401:  # token expired
-            self.refresh_token()
-        else:
+        else:  # a 401 here means the refresh token expired as well
             error_message = get_error_message(response)
             QMessageBox.warning(
                 self,
@@ -222,22 +717,126 @@ class Database(CustomQMainWindow):
             )
             self.sign_out()
 
+    def on_reload_failed(self, error):
+        import requests
+
+        self.reload_task = None
+        self.all_pages_callbacks.clear()
+        if (
+            isinstance(error, (requests.ConnectionError, requests.Timeout))
+            and self.model.rowCount()
+        ):
+            # keep working from the cache until the server is reachable
+            self.set_read_only(True)
+            self.update_statusbar(
+                f"Offline: {self.model.rowCount()} cached entries (read-only)."
+            )
+        else:
+            self.update_statusbar("")
+            self.show_request_error(error)
+
+    def fetch_more(self) -> None:
+        """Requests the next page of a paginated vault, one page at a time.
+
+        Returns: None
+        """
+        if self.page_task or self.reload_task or not self.model.next_page:
+            return
+        self.page_task = self.run_in_background(
+            self.sync.fetch_page,
+            self.model.next_page,
+            on_success=self.on_page,
+            on_error=self.on_page_failed,
+            on_finished=self.update_progress,
+        )
+        self.update_progress()
+
+    def on_page(self, page):
+        self.page_task = None
+        response = page.response
+        if response.status_code != 200:
+            self.all_pages_callbacks.clear()
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                get_error_message(response),
+            )
+            return
+        with telemetry.timed(telemetry.PHASE_SECONDS, "page.render"):
+            self.model.append_page(page.entries, page.next_page)
+        self.unreadable_entries.update(page.failed)
+        self.bind_entries(page)
+        self.update_statusbar(self.loaded_message())
+        self.schedule_cache_save()
+        self.continue_pages()
+
+    def on_page_failed(self, error):
+        self.page_task = None
+        self.all_pages_callbacks.clear()
+        self.show_request_error(error)
+
+    def continue_pages(self) -> None:
+        """Fetches the next page if it is needed already, otherwise waits for
+        the view to scroll near it. Once the last page is in, the callbacks
+        waiting for it run.
+
+        Returns: None
+        """
+        if not self.model.next_page:
+            self.run_all_pages_callbacks()
+        elif self.wants_all_pages():
+            self.fetch_more()
+
+    def wants_all_pages(self) -> bool:
+        """Tells whether the remaining pages are needed now rather than on scroll.
+
+        Searching and exporting work on the whole vault.
+
+        Returns: bool
+        """
+        return bool(self.all_pages_callbacks or self.ui.searchBar.text())
+
+    def after_all_pages(self, callback) -> None:
+        """Calls `callback` once every page of the vault is loaded.
+
+        Returns: None
+        """
+        self.all_pages_callbacks.append(callback)
+        if self.model.next_page:
+            self.update_statusbar(f"{self.loaded_message()} Loading the rest...")
+            self.fetch_more()
+        elif not self.reload_task:
+            self.run_all_pages_callbacks()
+
+    def run_all_pages_callbacks(self) -> None:
+        callbacks, self.all_pages_callbacks = self.all_pages_callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def loaded_message(self) -> str:
+        if self.model.next_page and self.total_entries:
+            message = f"{self.model.rowCount()} of {self.total_entries} entries loaded."
+        else:
+            message = f"{self.model.rowCount()} entries loaded."
+        if self.unreadable_entries:
+            message += (
+                f" {len(self.unreadable_entries)} could not be decrypted, they "
+                "were encrypted with a different account password."
+            )
+        return message
+
     def filter_table(self):
-        search_text = self.searchBar.text().lower()
-
-        for row in range(self.ui.tableWidget.rowCount()):
-            show_row = False
-            for col in [
-                0,  # title
-                1,  # username
-                3,  # url
-                4,  # notes
-            ]:
-                item = self.ui.tableWidget.item(row, col)
-                if search_text in item.text().lower():
-                    show_row = True
-                    break
-            self.ui.tableWidget.setRowHidden(row, not show_row)
+        if self.searchBar.text():
+            # results must cover the pages not scrolled to yet
+            self.fetch_more()
+        self.search_pipeline.submit(self.searchBar.text())
+
+    def update_progress(self) -> None:
+        """Shows the busy indicator while requests are in flight.
+
+        Returns: None
+        """
+        self.progress_bar.setVisible(bool(self.tasks))
 
     def update_statusbar(self, message: str) -> None:
         """Updates the status bar label with the given message.
@@ -248,15 +847,51 @@ class Database(CustomQMainWindow):
         """
         self.statusbar_label.setText(f" {message} ")
 
-    def copyRowToClipboard(self, item):
-        if item.column() == 3:
-            url = item.text()
+    def copyRowToClipboard(self, index):
+        if index.column() == URL_COLUMN:
+            url = index.data()
             qurl = QUrl(url)
             if not QDesktopServices.openUrl(qurl):
                 QDesktopServices.openUrl(qurl)
+        elif index.column() == PASSWORD_COLUMN:
+            row = self.proxy.mapToSource(index).row()
+            password = self.decrypt_password(index.data(), self.model.id_url(row))
+            if password is not None:
+                get_clipboard().copy(password, secret=True)
+        elif index.column() == NOTES_COLUMN and vault_crypto.is_encrypted(index.data()):
+            QMessageBox.warning(
+                self, "Error", "The notes of this entry could not be decrypted."
+            )
         else:
-            clipboard = QApplication.clipboard()
-            clipboard.setText(item.text())
+            get_clipboard().copy(index.data(), secret=index.column() == NOTES_COLUMN)
+
+    def decrypt_password(self, sealed, id_url):
+        """Decrypts a password of the table for a moment of use.
+
+        Args:
+            sealed (str): The password as the model holds it.
+            id_url (str): Id of its entry.
+
+        Returns: str: The password, None if it could not be decrypted.
+        """
+        try:
+            return vault_crypto.get_cipher().decrypt_field("password", sealed, id_url)
+        except vault_crypto.DecryptionError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return None
+
+    def reveal_password(self) -> None:
+        """Shows the password of the selected row for a few seconds.
+
+        Returns: None
+        """
+        row = self.selected_row()
+        if row < 0:
+            return
+        id_url = self.model.id_url(row)
+        password = self.decrypt_password(self.model.text(row, PASSWORD_COLUMN), id_url)
+        if password is not None:
+            self.password_delegate.reveal(id_url, password)
 
     def dark(self):
         settings.setValue("THEME", "dark")
@@ -273,8 +908,45 @@ class Database(CustomQMainWindow):
 
 
 class PasswordDelegate(QStyledItemDelegate):
+    """Masks the password column, which holds the passwords encrypted.
+
+    The mask does not depend on the password, so painting a row costs the
+    same whatever the size of the vault. One password at a time can be
+    revealed, it is dropped again after `REVEAL_MS`. Notes that could not be
+    decrypted are shown as `UNREADABLE_TEXT` rather than as ciphertext.
+    """
+
+    REVEAL_MS = 10000
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.revealed = None  # (id url, password)
+        self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
+        self.hide_timer.setInterval(self.REVEAL_MS)
+        self.hide_timer.timeout.connect(self.hide)
+
+    def reveal(self, id_url, password):
+        self.revealed = (id_url, password)
+        self.hide_timer.start()
+        self.view.viewport().update()
+
+    def hide(self):
+        self.revealed = None
+        self.view.viewport().update()
+
     def initStyleOption(self, option, index):
         super().initStyleOption(option, index)
-        if index.column() == 2:
+        if index.column() == PASSWORD_COLUMN:
             hint = "*"
             option.text = hint * 8
+            if (
+                self.revealed is not None
+                and index.siblingAtColumn(ID_COLUMN).data() == self.revealed[0]
+            ):
+                option.text = self.revealed[1]
+        elif index.column() == NOTES_COLUMN and vault_crypto.is_encrypted(
+            option.text
+        ):
+            option.text = UNREADABLE_TEXT
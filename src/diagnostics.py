@@ -0,0 +1,84 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QTableWidgetItem
+
+import telemetry
+from custom_widgets import CustomQDialog
+
+PROMETHEUS_FILTER = "Prometheus text (*.prom)"
+
+
+class Diagnostics(CustomQDialog):
+    """Shows the latency histograms and counters recorded by `telemetry`.
+
+    Hidden from the menus, it is opened with Ctrl+Shift+D in the main window.
+    """
+
+    def __init__(self):
+        super().__init__("diagnostics.ui", "Passify - Diagnostics", 700, 400)
+        self.ui.btn_refresh.clicked.connect(self.show_metrics)
+        self.ui.btn_reset.clicked.connect(self.reset_metrics)
+        self.ui.btn_save.clicked.connect(self.save_metrics)
+
+    def reset(self):
+        self.show_metrics()
+
+    def show_metrics(self):
+        if not telemetry.enabled():
+            self.ui.lbl_status.setText(
+                f"Telemetry is off, start Passify with {telemetry.FLAG} to "
+                "record request and UI timings."
+            )
+        else:
+            self.ui.lbl_status.setText(
+                "Timings recorded since Passify started or the last reset."
+            )
+        metrics = telemetry.snapshot()
+        rows = [
+            (
+                histogram["metric"],
+                histogram["name"],
+                histogram["count"],
+                *(
+                    round(histogram[key] * 1000, 3)
+                    for key in ("p50", "p95", "p99", "max")
+                ),
+            )
+            for histogram in metrics["histograms"]
+        ] + [
+            (counter["metric"], counter["name"], counter["value"])
+            for counter in metrics["counters"]
+        ]
+        table = self.ui.tw_metrics
+        # rows are placed where they belong as they are filled otherwise
+        table.setSortingEnabled(False)
+        table.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                item = QTableWidgetItem()
+                # numbers sort as numbers
+                item.setData(Qt.DisplayRole, value)
+                table.setItem(row, column, item)
+        table.setSortingEnabled(True)
+        table.resizeColumnsToContents()
+
+    def reset_metrics(self):
+        telemetry.reset()
+        self.show_metrics()
+
+    def save_metrics(self):
+        file_path, file_filter = QFileDialog.getSaveFileName(
+            self,
+            "Save the diagnostics to a file:",
+            "",
+            f"JSON file (*.json);;{PROMETHEUS_FILTER}",
+        )
+        if not file_path:
+            return
+        if file_filter == PROMETHEUS_FILTER and not file_path.endswith(
+            (".prom", ".txt")
+        ):
+            file_path += ".prom"
+        try:
+            telemetry.dump(file_path)
+        except OSError as e:
+            QMessageBox.warning(self, "Error", str(e))
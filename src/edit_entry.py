@@ -1,25 +1,33 @@
-import os
-
 from PyQt5.QtCore import QSettings, Qt
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import QLineEdit, QMessageBox, QShortcut
 
-from custom_widgets import CustomQDialog
-from utils import auth_get_request, auth_patch_request, get_error_message
+from custom_widgets import CustomQDialog, confirm_breached_password, dialog_pool
+from entry_cache import get_entry_cache
+from utils import (
+    auth_get_request,
+    auth_patch_request,
+    get_error_message,
+    validate_entry,
+)
+from vault_crypto import SEALED_FIELDS, DecryptionError, get_cipher
 
 settings = QSettings("Passify", "Passify")
 
 
 class EditEntry(CustomQDialog):
-    def __init__(self, id_url, width=None, height=None):
+    def __init__(self, width=300, height=300):
         super().__init__("entry.ui", "Passify - Edit Entry", width, height)
-        self.ui_file = os.path.join(
-            settings.value("UI_DIRECTORY"),
-        )
         self.ui.le_password.setEchoMode(QLineEdit.Password)
         self.ui.btn_ok.clicked.connect(self.edit_entry)
-        self.id_url = id_url
-        self.populate_fields()
+        self.ui.le_password.set_strength_meter(True)
+        self.id_url = None
+        # fields as last shown, to tell whether the user changed them
+        self.shown_fields = None
+        self.entry_cache = get_entry_cache()
+        self.entry_cache.entry_changed.connect(self.on_entry_changed)
+        # don't keep the password around while the dialog is pooled
+        self.finished.connect(self.clear_fields)
 
         # Adding keyboard shortcut Ctrl+G
         shortcut = QShortcut(QKeySequence(Qt.CTRL + Qt.Key_G), self)
@@ -28,41 +36,71 @@ class EditEntry(CustomQDialog):
     def password_generator(self):
         from password_generator import PasswordGenerator
 
-        password_generator_window = PasswordGenerator()
+        password_generator_window = dialog_pool.get(PasswordGenerator)
         password_generator_window.setModal(True)
         password_generator_window.show()
 
-    def populate_fields(self):
-        try:
-            response = auth_get_request(self.id_url)
-            if response.status_code == 200:
-                fields = response.json()
-                self.ui.le_title.setText(fields["title"])
-                self.ui.le_username.setText(fields["username"])
-                self.ui.le_password.setText(fields["password"])
-                self.ui.le_url.setText(fields["url"])
-                self.ui.te_notes.setPlainText(fields["notes"])
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
-        except Exception as e:
-            QMessageBox.warning(
-                self,
-                "Error",
-                f"{str(e)}",
-            )
+    def reset(self, id_url, entry=None):
+        """Switches the dialog to another entry.
 
-    def validate_input(self):
-        if not (
-            self.ui.le_title.text()
-            and self.ui.le_username.text()
-            and self.ui.le_password.text()
+        Args:
+            id_url (str): Id of the entry to edit.
+            entry (dict): Its cached fields, if any.
+        """
+        self.id_url = id_url
+        self.clear_fields()
+        self.ui.le_password.setEchoMode(QLineEdit.Password)
+        self.set_fields_enabled(True)
+        self.populate_fields(entry or self.entry_cache.get(id_url))
+
+    def clear_fields(self):
+        self.shown_fields = None
+        for widget in (
+            self.ui.le_title,
+            self.ui.le_username,
+            self.ui.le_password,
+            self.ui.le_url,
+            self.ui.te_notes,
         ):
-            raise Exception("Please fill in all the required fields.")
+            widget.clear()
+
+    def populate_fields(self, entry=None):
+        """Shows the entry right away if it is known, then revalidates it.
+
+        Args: entry (dict): Cached fields of the entry, if any.
+
+        Returns: None
+        """
+        if entry:
+            self.show_fields(entry)
+        else:
+            self.set_fields_enabled(False)
+        self.run_in_background(
+            auth_get_request,
+            self.id_url,
+            on_success=self.on_fields_loaded,
+            on_finished=lambda: self.set_fields_enabled(True),
+        )
+
+    def show_fields(self, entry):
+        """Shows the fields of an entry, its sealed fields are decrypted here.
+
+        Args: entry (dict): Entry whose `SEALED_FIELDS` are encrypted.
+        """
+        try:
+            entry = get_cipher().decrypt_entry(entry)
+        except DecryptionError as e:
+            QMessageBox.warning(self, "Error", str(e))
+            return
+        self.ui.le_title.setText(entry["title"])
+        self.ui.le_username.setText(entry["username"])
+        self.ui.le_password.setText(entry["password"])
+        self.ui.le_url.setText(entry["url"])
+        self.ui.te_notes.setPlainText(entry["notes"])
+        self.shown_fields = self.current_fields()
+        self.ui.btn_ok.setEnabled(self.ui.le_title.isEnabled())
+
+    def current_fields(self):
         return {
             "title": self.ui.le_title.text(),
             "username": self.ui.le_username.text(),
@@ -71,22 +109,84 @@ class EditEntry(CustomQDialog):
             "notes": self.ui.te_notes.toPlainText(),
         }
 
+    def on_entry_changed(self, entry):
+        # keep the user's own edits, only replace what they have not touched
+        if (
+            self.isVisible()
+            and entry.get("id") == self.id_url
+            and (
+                self.shown_fields is None
+                or self.current_fields() == self.shown_fields
+            )
+        ):
+            self.show_fields(entry)
+
+    def on_fields_loaded(self, response):
+        if response.status_code == 200:
+            try:
+                entry = get_cipher().decrypt_entry(response.json(), SEALED_FIELDS)
+            except DecryptionError as e:
+                QMessageBox.warning(self, "Error", str(e))
+                return
+            # announced to the table as well, and shown by `on_entry_changed`
+            self.entry_cache.update(entry)
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
+
+    def set_fields_enabled(self, enabled):
+        for widget in (
+            self.ui.le_title,
+            self.ui.le_username,
+            self.ui.le_password,
+            self.ui.le_url,
+            self.ui.te_notes,
+        ):
+            widget.setEnabled(enabled)
+        # an entry that could not be read must not be saved over
+        self.ui.btn_ok.setEnabled(enabled and self.shown_fields is not None)
+
+    def validate_input(self):
+        return validate_entry(self.current_fields())
+
     def edit_entry(self):
         try:
             data = self.validate_input()
-            response = auth_patch_request(self.id_url, data)
-            if response.status_code == 200:  # ok
-                self.close()
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
+            # only ask about a password the user just typed
+            if (
+                self.shown_fields is None
+                or data["password"] != self.shown_fields["password"]
+            ) and not confirm_breached_password(self, data["password"]):
+                return
+            self.ui.btn_ok.setEnabled(False)
+            self.run_in_background(
+                auth_patch_request,
+                self.id_url,
+                get_cipher().encrypt_entry(data, self.id_url),
+                on_success=self.on_entry_edited,
+                on_finished=lambda: self.ui.btn_ok.setEnabled(True),
+                on_abandoned=self.entry_cache.stale,
+            )
         except Exception as e:
             QMessageBox.warning(
                 self,
                 "Error",
                 f"{str(e)}",
             )
+
+    def on_entry_edited(self, response):
+        if response.status_code == 200:  # ok
+            entry = get_cipher().decrypt_entry(response.json(), SEALED_FIELDS)
+            self.entry_cache.update(entry)
+            self.close()
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from PyQt5.QtCore import QSettings, Qt
+from PyQt5.QtCore import QSettings, Qt, pyqtSignal
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import (
     QDialog,
@@ -12,7 +12,7 @@ from PyQt5.QtWidgets import (
     QShortcut,
 )
 
-from custom_widgets import CustomQDialog, DoubleClickShowPassword
+from custom_widgets import CustomQDialog, DoubleClickShowPassword, dialog_pool
 from utils import (
     auth_delete_request,
     auth_get_request,
@@ -20,6 +20,7 @@ from utils import (
     auth_put_request,
     get_error_message,
     is_valid_email,
+    validate_password_strength,
 )
 
 settings = QSettings("Passify", "Passify")
@@ -56,7 +57,143 @@ class PasswordInputDialog(QDialog):
         return self.password_input.text()
 
 
+class UnfinishedEmailChange(Exception):
+    """The email changed, but neither could the login password follow it nor
+    could the email be put back.
+
+    Args:
+        email (str): The email before the change, the login password is
+            still derived from it.
+        new_email (str): The email the account has now.
+    """
+
+    def __init__(self, email, new_email):
+        super().__init__(
+            f"Your email was changed to {new_email}, but the password that goes "
+            "with it could not be saved and the change could not be undone. "
+            f"Sign in with {new_email} and your current password on this "
+            "device to finish the change."
+        )
+        self.email = email
+        self.new_email = new_email
+
+
+def check_no_pending_rekey():
+    """Refuses a change of the vault key while the last one is unfinished.
+
+    Raises: Exception: If the vault is still being encrypted with the key of
+        the previous change, which would be lost.
+    """
+    from vault_crypto import get_previous_vault_key
+
+    if get_previous_vault_key():
+        raise Exception(
+            "Your entries are still being encrypted with the key of your last "
+            "change. Please try again once it is done."
+        )
+
+
+def change_password(endpoint, email, current_password, new_password):
+    """Replaces the login password with the one derived from the new
+    account password. Runs on a worker, scrypt takes a moment on purpose.
+
+    Returns:
+        tuple: (response, new vault key as bytes)
+    """
+    from vault_crypto import derive_account_keys
+
+    current = derive_account_keys(email, current_password)
+    new = derive_account_keys(email, new_password)
+    response = auth_post_request(
+        endpoint,
+        {
+            "current_password": current.login_password,
+            "new_password": new.login_password,
+            "re_new_password": new.login_password,
+        },
+    )
+    return response, new.vault_key
+
+
+def change_email(email_endpoint, password_endpoint, email, new_email, password):
+    """Changes the email address and with it the login password, which is
+    derived from both. Runs on a worker.
+
+    If the login password can not be changed the email is put back.
+
+    Returns:
+        tuple: (response, new vault key as bytes)
+
+    Raises:
+        UnfinishedEmailChange: If the email could not be put back either.
+    """
+    import requests
+
+    from vault_crypto import derive_account_keys
+
+    current = derive_account_keys(email, password)
+    new = derive_account_keys(new_email, password)
+    response = auth_post_request(
+        email_endpoint,
+        {
+            "current_password": current.login_password,
+            "new_email": new_email,
+            "re_new_email": new_email,
+        },
+    )
+    if response.status_code != 204:
+        return response, new.vault_key
+    try:
+        response = auth_post_request(
+            password_endpoint,
+            {
+                "current_password": current.login_password,
+                "new_password": new.login_password,
+                "re_new_password": new.login_password,
+            },
+        )
+    except requests.RequestException:
+        response = None
+    if response is not None and response.status_code == 204:
+        return response, new.vault_key
+    # the login password still goes with the old email, put it back
+    try:
+        reverted = auth_post_request(
+            email_endpoint,
+            {
+                "current_password": current.login_password,
+                "new_email": email,
+                "re_new_email": email,
+            },
+        )
+    except requests.RequestException:
+        reverted = None
+    if reverted is None or reverted.status_code != 204:
+        raise UnfinishedEmailChange(email, new_email)
+    if response is None:
+        raise requests.ConnectionError("The email could not be changed.")
+    return response, new.vault_key
+
+
+def delete_account_request(endpoint, email, password):
+    """Deletes the account, confirmed with the login password. Runs on a
+    worker.
+
+    Returns: Response
+    """
+    from vault_crypto import derive_account_keys
+
+    keys = derive_account_keys(email, password)
+    return auth_delete_request(endpoint, {"current_password": keys.login_password})
+
+
 class Profile(CustomQDialog):
+    # the account password or email changed and with it the vault key, the
+    # entries need to be encrypted again
+    vault_key_changed = pyqtSignal()
+    # the account is gone, the session with it
+    account_deleted = pyqtSignal()
+
     def __init__(self):
         super().__init__("profile.ui", "Passify - Profile")
         self.ui.btn_save_name.clicked.connect(self.save_name)
@@ -67,7 +204,7 @@ class Profile(CustomQDialog):
         self.ui.le_current_password.setEchoMode(QLineEdit.Password)
         self.ui.le_new_password.setEchoMode(QLineEdit.Password)
         self.ui.le_re_new_password.setEchoMode(QLineEdit.Password)
-        self.load_profile()
+        self.ui.le_new_password.set_strength_meter(True)
 
         # Adding keyboard shortcut Ctrl+G
         shortcut = QShortcut(QKeySequence(Qt.CTRL + Qt.Key_G), self)
@@ -76,100 +213,107 @@ class Profile(CustomQDialog):
     def password_generator(self):
         from password_generator import PasswordGenerator
 
-        password_generator_window = PasswordGenerator()
+        password_generator_window = dialog_pool.get(PasswordGenerator)
         password_generator_window.setModal(True)
         password_generator_window.show()
 
+    def reset(self):
+        for widget in (
+            self.ui.le_current_password_ce,
+            self.ui.le_new_email,
+            self.ui.le_re_new_email,
+            self.ui.le_current_password,
+            self.ui.le_new_password,
+            self.ui.le_re_new_password,
+        ):
+            widget.clear()
+        self.load_profile()
+
     def format_datetime(self, current_time_str):
         current_time = datetime.fromisoformat(current_time_str.replace("Z", "+00:00"))
         formatted_time = current_time.strftime("%Y-%m-%d %H:%M:%S")
         return formatted_time
 
     def load_profile(self):
-        try:
-            response = auth_get_request(settings.value("PROFILE_ENDPOINT"))
-            if response.status_code == 200:
-                profile_info = response.json()
-                self.ui.le_firstname.setText(profile_info["first_name"])
-                self.ui.le_lastname.setText(profile_info["last_name"])
-                self.ui.lbl_email.setText(profile_info["email"])
-                self.ui.lbl_id.setText(profile_info["id"])
-                self.ui.lbl_last_login.setText(
-                    self.format_datetime(
-                        profile_info["last_login"],
-                    )
-                )
-                self.ui.lbl_date_joined.setText(
-                    self.format_datetime(
-                        profile_info["date_joined"],
-                    )
+        self.setWindowTitle("Passify - Profile (loading...)")
+        self.run_in_background(
+            auth_get_request,
+            settings.value("PROFILE_ENDPOINT"),
+            on_success=self.on_profile_loaded,
+            on_finished=lambda: self.setWindowTitle("Passify - Profile"),
+        )
+
+    def on_profile_loaded(self, response):
+        if response.status_code == 200:
+            profile_info = response.json()
+            self.ui.le_firstname.setText(profile_info["first_name"])
+            self.ui.le_lastname.setText(profile_info["last_name"])
+            self.ui.lbl_email.setText(profile_info["email"])
+            self.ui.lbl_id.setText(profile_info["id"])
+            self.ui.lbl_last_login.setText(
+                self.format_datetime(
+                    profile_info["last_login"],
                 )
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
+            )
+            self.ui.lbl_date_joined.setText(
+                self.format_datetime(
+                    profile_info["date_joined"],
                 )
-        except Exception as e:
+            )
+        else:
+            error_message = get_error_message(response)
             QMessageBox.warning(
                 self,
-                "Error",
-                f"{str(e)}",
+                f"Error {response.status_code}",
+                error_message,
             )
 
     def save_name(self):
-        try:
-            data = {
-                "first_name": self.ui.le_firstname.text(),
-                "last_name": self.ui.le_lastname.text(),
-            }
-            response = auth_put_request(
-                settings.value("EDIT_PROFILE_ENDPOINT"),
-                data,
+        data = {
+            "first_name": self.ui.le_firstname.text(),
+            "last_name": self.ui.le_lastname.text(),
+        }
+        self.ui.btn_save_name.setEnabled(False)
+        self.run_in_background(
+            auth_put_request,
+            settings.value("EDIT_PROFILE_ENDPOINT"),
+            data,
+            on_success=self.on_name_saved,
+            on_finished=lambda: self.ui.btn_save_name.setEnabled(True),
+        )
+
+    def on_name_saved(self, response):
+        if response.status_code == 200:
+            QMessageBox.information(
+                self,
+                "Save name",
+                "Profile name updated successfully!",
             )
-            if response.status_code == 200:
-                QMessageBox.information(
-                    self,
-                    "Save name",
-                    "Profile name updated successfully!",
-                )
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
-            self.load_profile()
-        except Exception as e:
+        else:
+            error_message = get_error_message(response)
             QMessageBox.warning(
                 self,
-                "Error",
-                f"{str(e)}",
+                f"Error {response.status_code}",
+                error_message,
             )
+        self.load_profile()
 
     def save_email(self):
         try:
             data = self.validate_email()
-            response = auth_post_request(settings.value("CHANGE_EMAIL_ENDPOINT"), data)
-            if response.status_code == 204:  # no content
-                QMessageBox.information(
-                    self,
-                    "Change Email",
-                    "Email changed successfully!",
-                )
-                self.ui.le_current_password_ce.clear()
-                self.ui.le_new_email.clear()
-                self.ui.le_re_new_email.clear()
-                self.load_profile()
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
+            check_no_pending_rekey()
+            self.ui.btn_save_email.setEnabled(False)
+            self.run_in_background(
+                change_email,
+                settings.value("CHANGE_EMAIL_ENDPOINT"),
+                settings.value("CHANGE_PASSWORD_ENDPOINT"),
+                self.ui.lbl_email.text(),
+                data["new_email"],
+                data["current_password"],
+                on_success=self.on_email_changed,
+                on_error=self.on_email_change_failed,
+                on_finished=lambda: self.ui.btn_save_email.setEnabled(True),
+            )
         except Exception as e:
             QMessageBox.warning(
                 self,
@@ -177,6 +321,51 @@ class Profile(CustomQDialog):
                 f"{str(e)}",
             )
 
+    def on_email_changed(self, result):
+        from vault_cache import set_cache_owner
+
+        response, vault_key = result
+        if response.status_code == 204:  # no content
+            settings.setValue("EMAIL", self.ui.le_new_email.text())
+            set_cache_owner(self.ui.le_new_email.text())
+            self.change_vault_key(vault_key)
+            QMessageBox.information(
+                self,
+                "Change Email",
+                "Email changed successfully!",
+            )
+            self.ui.le_current_password_ce.clear()
+            self.ui.le_new_email.clear()
+            self.ui.le_re_new_email.clear()
+            self.load_profile()
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
+
+    def on_email_change_failed(self, error):
+        from vault_cache import set_cache_owner
+
+        if isinstance(error, UnfinishedEmailChange):
+            # the next sign in finishes the change, see `SignIn.on_signed_in`
+            settings.setValue("UNFINISHED_EMAIL_CHANGE", error.email)
+            settings.setValue("EMAIL", error.new_email)
+            set_cache_owner(error.new_email)
+            QMessageBox.warning(self, "Change Email", str(error))
+            self.load_profile()
+        else:
+            self.show_request_error(error)
+
+    def change_vault_key(self, vault_key):
+        from vault_crypto import get_cipher, set_vault_key
+
+        # the entries are read with the old key until they are all done
+        set_vault_key(vault_key, previous_key=get_cipher().key)
+        self.vault_key_changed.emit()
+
     def validate_email(self):
         if not (
             self.ui.le_current_password_ce.text()
@@ -199,25 +388,17 @@ class Profile(CustomQDialog):
     def save_password(self):
         try:
             data = self.validate_password()
-            response = auth_post_request(
-                settings.value("CHANGE_PASSWORD_ENDPOINT"), data
+            check_no_pending_rekey()
+            self.ui.btn_save_password.setEnabled(False)
+            self.run_in_background(
+                change_password,
+                settings.value("CHANGE_PASSWORD_ENDPOINT"),
+                self.ui.lbl_email.text(),
+                data["current_password"],
+                data["new_password"],
+                on_success=self.on_password_changed,
+                on_finished=lambda: self.ui.btn_save_password.setEnabled(True),
             )
-            if response.status_code == 204:  # no content
-                QMessageBox.information(
-                    self,
-                    "Change Password",
-                    "Password changed successfully!",
-                )
-                self.ui.le_current_password.clear()
-                self.ui.le_new_password.clear()
-                self.ui.le_re_new_password.clear()
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
         except Exception as e:
             QMessageBox.warning(
                 self,
@@ -225,6 +406,26 @@ class Profile(CustomQDialog):
                 f"{str(e)}",
             )
 
+    def on_password_changed(self, result):
+        response, vault_key = result
+        if response.status_code == 204:  # no content
+            self.change_vault_key(vault_key)
+            QMessageBox.information(
+                self,
+                "Change Password",
+                "Password changed successfully!",
+            )
+            self.ui.le_current_password.clear()
+            self.ui.le_new_password.clear()
+            self.ui.le_re_new_password.clear()
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
+
     def validate_password(self):
         if not (
             self.ui.le_current_password.text()
@@ -236,6 +437,14 @@ class Profile(CustomQDialog):
             raise Exception("Passwords don't match.")
         if len(self.ui.le_new_password.text()) < 8:
             raise Exception("Password must be at least 8 characters.")
+        validate_password_strength(
+            self.ui.le_new_password.text(),
+            (
+                self.ui.le_firstname.text(),
+                self.ui.le_lastname.text(),
+                self.ui.lbl_email.text(),
+            ),
+        )
         return {
             "current_password": self.ui.le_current_password.text(),
             "new_password": self.ui.le_new_password.text(),
@@ -243,48 +452,43 @@ class Profile(CustomQDialog):
         }
 
     def delete_account(self):
-        try:
-            dialog = PasswordInputDialog()
-            if dialog.exec():
-                current_password = dialog.getPassword()
-                if current_password:
-                    confirmation = QMessageBox.question(
-                        None,
-                        "Account Deletion Confirmation",
-                        "Are you sure you want to delete your account? This action cannot be undone!",
-                        QMessageBox.Yes | QMessageBox.No,
-                        QMessageBox.No,
+        dialog = PasswordInputDialog()
+        if dialog.exec():
+            current_password = dialog.getPassword()
+            if current_password:
+                confirmation = QMessageBox.question(
+                    None,
+                    "Account Deletion Confirmation",
+                    "Are you sure you want to delete your account? This action cannot be undone!",
+                    QMessageBox.Yes | QMessageBox.No,
+                    QMessageBox.No,
+                )
+                if confirmation == QMessageBox.Yes:
+                    # Delete the account
+                    self.ui.btn_delete_account.setEnabled(False)
+                    self.run_in_background(
+                        delete_account_request,
+                        settings.value("EDIT_PROFILE_ENDPOINT"),
+                        self.ui.lbl_email.text(),
+                        current_password,
+                        on_success=self.on_account_deleted,
+                        on_finished=lambda: self.ui.btn_delete_account.setEnabled(
+                            True
+                        ),
                     )
-                    if confirmation == QMessageBox.Yes:
-                        # Delete the account
-                        data = {"current_password": current_password}
-                        response = auth_delete_request(
-                            settings.value("EDIT_PROFILE_ENDPOINT"), data
-                        )
-                        if response.status_code == 204:
-                            QMessageBox.information(
-                                self,
-                                "Delete Account",
-                                "Account deleted successfully.",
-                            )
-                            self.go_to_sign_in()
-                        else:
-                            error_message = get_error_message(response)
-                            QMessageBox.warning(
-                                self,
-                                f"Error {response.status_code}",
-                                error_message,
-                            )
-        except Exception as e:
+
+    def on_account_deleted(self, response):
+        if response.status_code == 204:
+            QMessageBox.information(
+                self,
+                "Delete Account",
+                "Account deleted successfully.",
+            )
+            self.account_deleted.emit()
+        else:
+            error_message = get_error_message(response)
             QMessageBox.warning(
                 self,
-                "Error",
-                f"{str(e)}",
+                f"Error {response.status_code}",
+                error_message,
             )
-
-    def go_to_sign_in(self):
-        from sign_in import SignIn
-
-        self.close()
-        sign_in_window = SignIn()
-        sign_in_window.show()
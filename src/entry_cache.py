@@ -0,0 +1,79 @@
+from collections import OrderedDict
+
+from PyQt5.QtCore import QObject, QSettings, pyqtSignal
+
+settings = QSettings("Passify", "Passify")
+
+
+class EntryCache(QObject):
+    """Keeps the most recently used entries, keyed by their id url.
+
+    Entries are evicted least recently used first once `max_size` is reached.
+    Every write made through `update` is announced with `entry_changed`, which
+    the table and the open edit dialogs listen to so they stay consistent.
+    """
+
+    # emitted with the new fields of an entry that was saved or revalidated
+    entry_changed = pyqtSignal(dict)
+    # emitted when entries may have changed on the server unseen, see `stale`
+    went_stale = pyqtSignal()
+
+    def __init__(self, max_size, parent=None):
+        super().__init__(parent)
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, id_url):
+        """Returns a copy of the cached entry, or `None`."""
+        entry = self.entries.get(id_url)
+        if entry is None:
+            return None
+        self.entries.move_to_end(id_url)
+        return dict(entry)
+
+    def put(self, entry):
+        """Stores an entry without announcing it."""
+        id_url = entry.get("id")
+        if not id_url or self.max_size <= 0:
+            return
+        self.entries[id_url] = dict(entry)
+        self.entries.move_to_end(id_url)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def update(self, entry):
+        """Stores an entry returned by the server and announces the change.
+
+        Entries without an id are only announced, so the table can reload.
+        """
+        if entry.get("id") and self.entries.get(entry["id"]) == entry:
+            self.entries.move_to_end(entry["id"])
+            return
+        self.put(entry)
+        self.entry_changed.emit(entry)
+
+    def stale(self):
+        """Drops every entry and asks the table to revalidate the vault.
+
+        Called when a request that changes the vault was cancelled after it
+        went out, so its outcome is unknown.
+        """
+        self.entries.clear()
+        self.went_stale.emit()
+
+    def discard(self, id_url):
+        self.entries.pop(id_url, None)
+
+    def clear(self):
+        self.entries.clear()
+
+
+_entry_cache = None
+
+
+def get_entry_cache() -> EntryCache:
+    """Returns the application wide entry cache, creating it on first use."""
+    global _entry_cache
+    if _entry_cache is None:
+        _entry_cache = EntryCache(int(settings.value("ENTRY_CACHE_SIZE", 256)))
+    return _entry_cache
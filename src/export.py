@@ -0,0 +1,92 @@
+import json
+import os
+
+# Fields written for every entry, the server side id is left out.
+EXPORT_FIELDS = ("title", "username", "password", "url", "notes")
+# Columns read from the table: the fields above and the id, which tells the
+# entries that could not be decrypted apart.
+READ_FIELDS = EXPORT_FIELDS + ("id",)
+# Entries serialized and written per chunk.
+CHUNK_SIZE = 500
+# Size of the file write buffer.
+BUFFER_SIZE = 1 << 20
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def iter_chunks(columns, chunk_size=CHUNK_SIZE):
+    """Yields lists of entry dicts built from column lists, a chunk at a time.
+
+    Args:
+        columns (list): One list of values per field of `READ_FIELDS`.
+        chunk_size (int): Number of entries per chunk.
+    """
+    total = len(columns[0]) if columns else 0
+    for start in range(0, total, chunk_size):
+        yield [
+            dict(zip(READ_FIELDS, values))
+            for values in zip(*(column[start : start + chunk_size] for column in columns))
+        ]
+
+
+def write_json(file_path, columns, progress=None, cancel_event=None, cipher=None):
+    """Writes entries to a json file, streaming them a chunk at a time.
+
+    The output is the same as `json.dump(entries, file, indent=4)`, but only
+    one chunk of entries is turned into dicts and text at any time. The file
+    is written under a temporary name and moved in place once complete, so
+    a cancelled or failed export never leaves a truncated file behind.
+
+    Args:
+        file_path (str): Destination of the export.
+        columns (list): One list of values per field of `READ_FIELDS`.
+        progress (callable): Called with (written, total) after every chunk.
+        cancel_event (threading.Event): Stops the export once set.
+        cipher (vault_crypto.VaultCipher): Decrypts the fields the table
+            holds encrypted, one chunk at a time.
+
+    Returns:
+        tuple: The number of entries written and a list of (title, error
+        message) of the entries left out because they could not be
+        decrypted.
+
+    Raises:
+        ExportCancelled: If `cancel_event` was set before the export finished.
+    """
+    from vault_crypto import DecryptionError
+
+    total = len(columns[0]) if columns else 0
+    written = 0
+    failed = []
+    temp_path = f"{file_path}.part"
+    try:
+        with open(temp_path, "w", buffering=BUFFER_SIZE) as file:
+            file.write("[")
+            for chunk in iter_chunks(columns):
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ExportCancelled("Export cancelled.")
+                for entry in chunk:
+                    if cipher is not None:
+                        try:
+                            entry = cipher.decrypt_entry(entry)
+                        except DecryptionError as e:
+                            # ciphertext is of no use in an export
+                            failed.append((entry["title"], str(e)))
+                            continue
+                    del entry["id"]
+                    text = json.dumps(entry, indent=4).replace("\n", "\n    ")
+                    file.write(f"{',' if written else ''}\n    {text}")
+                    written += 1
+                if progress:
+                    progress(written + len(failed), total)
+            file.write("\n]" if written else "]")
+        os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return written, failed
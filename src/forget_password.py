@@ -23,21 +23,16 @@ class ForgetPassword(CustomQWidget):
     def send_password_reset_link(self):
         try:
             data = self.validate_input()
-            response = post_request(settings.value("RESET_PASSWORD_ENDPOINT"), data)
-            if response.status_code == 204:
-                QMessageBox.information(
-                    self,
-                    "Password reset was successful",
-                    "A password reset link was sent to your email address.",
-                )
-                self.go_to_sign_in()
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
+            if not self.confirm_reset():
+                return
+            self.ui.btn_submit.setEnabled(False)
+            self.run_in_background(
+                post_request,
+                settings.value("RESET_PASSWORD_ENDPOINT"),
+                data,
+                on_success=self.on_reset_link_sent,
+                on_finished=lambda: self.ui.btn_submit.setEnabled(True),
+            )
         except Exception as e:
             QMessageBox.warning(
                 self,
@@ -45,6 +40,35 @@ class ForgetPassword(CustomQWidget):
                 f"{str(e)}",
             )
 
+    def confirm_reset(self):
+        # the entries are encrypted with a key derived from the old password
+        confirmation = QMessageBox.question(
+            self,
+            "Reset Password",
+            "Your passwords and notes are encrypted with your current password, "
+            "so after a reset the entries already saved cannot be read anymore. "
+            "Do you want to reset your password anyway?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No,
+        )
+        return confirmation == QMessageBox.Yes
+
+    def on_reset_link_sent(self, response):
+        if response.status_code == 204:
+            QMessageBox.information(
+                self,
+                "Password reset was successful",
+                "A password reset link was sent to your email address.",
+            )
+            self.go_to_sign_in()
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
+
     def go_to_sign_in(self):
         from sign_in import SignIn
 
@@ -57,6 +81,6 @@ class ForgetPassword(CustomQWidget):
             Qt.Key_Enter,
             Qt.Key_Return,
         ):
-            if self.ui.le_email.text():
+            if self.ui.le_email.text() and self.ui.btn_submit.isEnabled():
                 self.send_password_reset_link()
         return super().event(event)
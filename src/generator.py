@@ -0,0 +1,157 @@
+"""Random password generation, independent of the password generator dialog.
+
+Randomness for passwords comes from `os.urandom` in bulk: one call returns
+the bytes for a whole batch of passwords. Bytes are mapped onto the alphabet with a
+translation table and the ones above the largest multiple of the alphabet
+size are dropped (rejection sampling), so every character is equally likely
+instead of the low ones being favoured by `byte % size`.
+"""
+
+import math
+import os
+import secrets
+import string
+from functools import lru_cache
+from itertools import combinations
+
+# Character classes in the order they are offered in the dialog.
+CHARACTER_CLASSES = {
+    "upper": string.ascii_uppercase,
+    "lower": string.ascii_lowercase,
+    "numbers": string.digits,
+    "symbols": string.punctuation,
+}
+# How the words of a passphrase are written.
+CAPITALIZATIONS = {
+    "lower": str.lower,
+    "capitalize": str.capitalize,
+    "upper": str.upper,
+}
+
+
+class Alphabet:
+    """The characters of some character classes, prepared for sampling.
+
+    Args:
+        classes (tuple): Names of `CHARACTER_CLASSES` to draw from.
+    """
+
+    def __init__(self, classes):
+        if not classes:
+            raise ValueError("Select at least one character class.")
+        self.classes = tuple(classes)
+        self.class_sets = tuple(
+            frozenset(CHARACTER_CLASSES[name].encode()) for name in self.classes
+        )
+        self.characters = "".join(CHARACTER_CLASSES[name] for name in self.classes)
+        size = len(self.characters)
+        # bytes from `limit` up would make the first characters more likely
+        self.limit = 256 - 256 % size
+        self.table = bytes(self.characters.encode()[byte % size] for byte in range(256))
+        self.rejected = bytes(range(self.limit, 256))
+
+    def __len__(self):
+        return len(self.characters)
+
+    def draw(self, count):
+        """Returns `count` uniformly random characters of the alphabet as bytes."""
+        drawn = b""
+        while len(drawn) < count:
+            missing = count - len(drawn)
+            # ask for a little more than the expected need, so one call usually
+            # covers the rejected bytes
+            raw = os.urandom(missing * 256 // self.limit + 16)
+            drawn += raw.translate(self.table, self.rejected)
+        return drawn[:count]
+
+    def has_every_class(self, password):
+        return all(
+            not characters.isdisjoint(password) for characters in self.class_sets
+        )
+
+
+@lru_cache(maxsize=None)
+def get_alphabet(classes):
+    """Returns the prepared alphabet of a tuple of class names, built once."""
+    return Alphabet(classes)
+
+
+def generate_passwords(count, length, alphabet, require_each=True):
+    """Generates `count` passwords of `length` characters at once.
+
+    Args:
+        count (int): Number of passwords.
+        length (int): Characters per password.
+        alphabet (Alphabet): Characters to draw from, see `get_alphabet`.
+        require_each (bool): Only return passwords with at least one character
+            of every class in the alphabet. Passwords missing a class are
+            discarded and drawn again, which keeps the result uniform over
+            the passwords that qualify.
+
+    Returns:
+        list: The passwords, as str.
+
+    Raises:
+        ValueError: If the passwords are too short to hold every class.
+    """
+    if require_each and length < len(alphabet.classes):
+        raise ValueError(
+            f"A password needs at least {len(alphabet.classes)} characters to "
+            "include every selected character class."
+        )
+    passwords = []
+    while len(passwords) < count:
+        drawn = alphabet.draw((count - len(passwords)) * length)
+        candidates = [
+            drawn[start : start + length] for start in range(0, len(drawn), length)
+        ]
+        if require_each:
+            candidates = filter(alphabet.has_every_class, candidates)
+        passwords.extend(password.decode("ascii") for password in candidates)
+    return passwords
+
+
+def generate_password(length, alphabet, require_each=True):
+    """Generates one password, see `generate_passwords`."""
+    return generate_passwords(1, length, alphabet, require_each)[0]
+
+
+def generate_passphrase(word_count, wordlist, separator="-", capitalization="lower"):
+    """Joins `word_count` words drawn uniformly from `wordlist`.
+
+    Args:
+        word_count (int): Number of words.
+        wordlist (wordlist.Wordlist): Words to draw from.
+        separator (str): Put between the words.
+        capitalization (str): One of `CAPITALIZATIONS`.
+
+    Returns:
+        str: The passphrase.
+    """
+    write = CAPITALIZATIONS[capitalization]
+    return separator.join(
+        write(wordlist[secrets.randbelow(len(wordlist))]) for _ in range(word_count)
+    )
+
+
+def password_entropy(length, alphabet, require_each=True):
+    """Returns the entropy in bits of a password from `generate_passwords`.
+
+    With `require_each` only the passwords holding every class can come out,
+    they are counted by inclusion-exclusion over the classes left out.
+    """
+    sizes = [len(CHARACTER_CLASSES[name]) for name in alphabet.classes]
+    if not require_each:
+        return length * math.log2(sum(sizes))
+    if length < len(sizes):
+        return 0.0
+    possible = 0
+    for left_out in range(len(sizes)):
+        for classes in combinations(sizes, len(sizes) - left_out):
+            possible += (-1) ** left_out * sum(classes) ** length
+    return math.log2(possible)
+
+
+def passphrase_entropy(word_count, wordlist_size):
+    """Returns the entropy in bits of a passphrase from `generate_passphrase`."""
+    return word_count * math.log2(wordlist_size)
@@ -0,0 +1,29 @@
+from requests.adapters import HTTPAdapter
+
+import telemetry
+
+# (connect, read) timeouts in seconds applied to every request
+REQUEST_TIMEOUT = (5, 30)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to the requests it sends,
+    and records how long they take when telemetry is on."""
+
+    def __init__(self, *args, timeout=REQUEST_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        started = telemetry.start()
+        try:
+            return super().send(request, **kwargs)
+        finally:
+            if started is not None:
+                telemetry.stop(
+                    telemetry.REQUEST_SECONDS,
+                    telemetry.endpoint_name(request.method, request.url),
+                    started,
+                )
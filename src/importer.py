@@ -0,0 +1,219 @@
+import csv
+import json
+import random
+import time
+from collections import namedtuple
+
+import requests
+
+from sync import create_entry
+from utils import auth_post_request, get_error_message, validate_entry
+from vault_crypto import SEALED_FIELDS, require_cipher
+from workers import run_concurrently
+
+# Bytes read from the file at a time while parsing a json export.
+READ_SIZE = 1 << 16
+# Upload attempts after the first one, and the base delay between them.
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+# Responses worth retrying: rate limited or unavailable, both mean the
+# entry was not created. After a 500, 502 or 504 it may have been, and a
+# retry would duplicate it.
+RETRY_STATUSES = {429, 503}
+
+# Header names used for each field by the password managers we know of
+# (Passify, Chrome/Edge, Firefox, Bitwarden, LastPass, KeePass, 1Password).
+CSV_COLUMNS = {
+    "title": ("title", "name", "account", "item name"),
+    "username": ("username", "user name", "login_username", "login", "email"),
+    "password": ("password", "login_password"),
+    "url": ("url", "login_uri", "website", "web site", "uri", "origin_url"),
+    "notes": ("notes", "note", "extra", "comments", "comment"),
+}
+
+ImportResult = namedtuple("ImportResult", ["row", "title", "status", "message"])
+
+
+class ImportReport:
+    """Outcome of an import: one result per row and the entries created."""
+
+    def __init__(self):
+        self.results = []
+        self.entries = []
+        self.cancelled = False
+
+    def count(self, status):
+        return sum(1 for result in self.results if result.status == status)
+
+    def summary(self):
+        summary = (
+            f"{self.count('imported')} imported, "
+            f"{self.count('invalid')} invalid, "
+            f"{self.count('failed')} failed."
+        )
+        if self.cancelled:
+            summary = f"Import cancelled: {summary}"
+        return summary
+
+    def details(self):
+        return "\n".join(
+            f"Row {result.row} ({result.title or 'untitled'}): "
+            f"{result.status}{f' - {result.message}' if result.message else ''}"
+            for result in self.results
+        )
+
+
+def iter_json_entries(file):
+    """Yields the entries of a Passify json export one by one.
+
+    The file is read a block at a time and every object is decoded as soon
+    as it is complete, so the whole export is never held in memory.
+
+    Raises: ValueError: If the file is not a json array of objects.
+    """
+    decoder = json.JSONDecoder()
+    buffer = file.read(READ_SIZE).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("The file is not a Passify json export.")
+    position = 1
+    end_of_file = False
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position < len(buffer) and buffer[position] == "]":
+            return
+        try:
+            entry, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            if end_of_file:
+                raise ValueError("The json export is incomplete or corrupted.")
+            block = file.read(READ_SIZE)
+            end_of_file = not block
+            buffer = buffer[position:] + block
+            position = 0
+            continue
+        if not isinstance(entry, dict):
+            raise ValueError("The json export must only contain entries.")
+        yield entry
+        position = end
+
+
+def iter_csv_entries(file):
+    """Yields the rows of a CSV export as entry dicts.
+
+    Raises: ValueError: If the header has no password column.
+    """
+    reader = csv.DictReader(file)
+    headers = {name.strip().lower(): name for name in reader.fieldnames or []}
+    columns = {}
+    for field, aliases in CSV_COLUMNS.items():
+        for alias in aliases:
+            if alias in headers:
+                columns[field] = headers[alias]
+                break
+    if "password" not in columns:
+        raise ValueError("Could not find a password column in the CSV header.")
+    for row in reader:
+        yield {field: (row.get(name) or "").strip() for field, name in columns.items()}
+
+
+def open_entries(file_path):
+    """Opens an export and returns the file and an iterator over its entries."""
+    if file_path.lower().endswith(".csv"):
+        file = open(file_path, newline="", encoding="utf-8-sig")
+        return file, iter_csv_entries(file)
+    file = open(file_path, encoding="utf-8")
+    return file, iter_json_entries(file)
+
+
+def upload_entry(endpoint, data, retries=MAX_RETRIES, backoff=BACKOFF_SECONDS):
+    """Creates one entry, retrying with exponential backoff.
+
+    Connection failures are retried, read timeouts are not: the server may
+    already have created the entry and a retry would duplicate it.
+    """
+    for attempt in range(retries + 1):
+        retry_after = None
+        try:
+            response = auth_post_request(endpoint, data)
+        except requests.ConnectionError:
+            if attempt == retries:
+                raise
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt == retries:
+                return response
+            retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            delay = int(retry_after)
+        else:
+            delay = backoff * 2**attempt * random.uniform(0.5, 1.5)
+        time.sleep(delay)
+
+
+def import_entries(file_path, endpoint, workers, progress=None, cancel_event=None):
+    """Uploads every entry of an export file to the database endpoint.
+
+    Rows are parsed and validated as they are read and uploaded by a pool of
+    `workers` threads. Rows are only read as uploads complete, so memory use
+    does not grow with the size of the file.
+
+    Args:
+        file_path (str): Passify json export or CSV file.
+        endpoint (str): Database endpoint the entries are posted to.
+        workers (int): Number of concurrent uploads.
+        progress (callable): Called with the number of rows processed.
+        cancel_event (threading.Event): Stops the import once set.
+
+    Returns:
+        ImportReport: Per row results and the created entries.
+    """
+    report = ImportReport()
+    processed = 0
+    cipher = require_cipher()
+
+    def uploads():
+        nonlocal processed
+        row = 0
+        try:
+            for row, entry in enumerate(entries, 1):
+                title = str(entry.get("title") or "")
+                try:
+                    data = validate_entry(entry)
+                except Exception as e:
+                    report.results.append(ImportResult(row, title, "invalid", str(e)))
+                    processed += 1
+                    continue
+                yield row, title, data
+        except (ValueError, csv.Error) as e:
+            report.results.append(ImportResult(row + 1, "", "invalid", str(e)))
+
+    file, entries = open_entries(file_path)
+    with file:
+        for (row, title, _), response, error in run_concurrently(
+            lambda upload: create_entry(endpoint, upload[2], upload_entry),
+            uploads(),
+            workers,
+            cancel_event,
+        ):
+            if error is not None:
+                report.results.append(ImportResult(row, title, "failed", str(error)))
+            elif response.status_code in (200, 201):  # created, and bound
+                report.results.append(ImportResult(row, title, "imported", ""))
+                entry = cipher.decrypt_entry(response.json(), SEALED_FIELDS)
+                report.entries.append(entry)
+            else:
+                report.results.append(
+                    ImportResult(
+                        row,
+                        title,
+                        "failed",
+                        f"Error {response.status_code}: "
+                        f"{get_error_message(response)}",
+                    )
+                )
+            processed += 1
+            if progress:
+                progress(processed)
+    report.cancelled = cancel_event is not None and cancel_event.is_set()
+    report.results.sort(key=lambda result: result.row)
+    return report
@@ -2,12 +2,15 @@ import os
 import sys
 from urllib.parse import urljoin
 
-import qdarkstyle
-from PyQt5.QtCore import QSettings
-from PyQt5.QtWidgets import QApplication
+import startup_profile
 
-from database import Database
-from sign_in import SignIn
+# before the imports below, so they are part of the profile
+startup_profile.start_if_requested(sys.argv)
+
+from PyQt5.QtCore import QSettings, QTimer  # noqa: E402
+from PyQt5.QtWidgets import QApplication  # noqa: E402
+
+import telemetry  # noqa: E402
 
 if getattr(sys, "frozen", False):
     # used for compiled version
@@ -15,12 +18,21 @@ if getattr(sys, "frozen", False):
         os.path.dirname(__file__),
         "ui",
     )
+    DATA_DIRECTORY = os.path.join(
+        os.path.dirname(__file__),
+        "data",
+    )
 else:
     UI_DIRECTORY = os.path.join(
         os.path.dirname(__file__),
         "..",
         "ui",
     )
+    DATA_DIRECTORY = os.path.join(
+        os.path.dirname(__file__),
+        "..",
+        "data",
+    )
 
 
 def load_settings():
@@ -33,8 +45,15 @@ def load_settings():
 
     Settings:
     - UI_DIRECTORY (str): Path to the directory containing UI files.
+    - WORDLIST_FILE (str): Path to the packed word list used for passphrases.
+    - WORDLIST_SOURCE_FILE (str): Path to the text word list it is packed from.
+    - BREACH_INDEX_FILE (str): Path to the optional breached password index.
     - WIDTH (int): Width of the Passify application window.
     - HEIGHT (int): Height of the Passify application window.
+    - MAX_IN_FLIGHT_REQUESTS (int): Maximum number of requests running in the background at once.
+    - BULK_WORKERS (int): Number of concurrent requests sent by imports and bulk actions.
+    - ENTRY_CACHE_SIZE (int): Number of recently used entries kept for the edit dialog.
+    - CLIPBOARD_CLEAR_SECONDS (int): Seconds before copied entry fields are cleared from the clipboard, 0 to keep them.
     - DOMAIN (str): Domain of the backend API.
     - PROFILE_ENDPOINT (str): Endpoint for user profile.
     - EDIT_PROFILE_ENDPOINT (str): Endpoint for editing user profile.
@@ -65,6 +84,21 @@ def load_settings():
         UI_DIRECTORY,
         # Path to the UI files
     )
+    settings.setValue(
+        "WORDLIST_FILE",
+        os.path.join(DATA_DIRECTORY, "wordlist.bin"),
+        # Packed word list for passphrases
+    )
+    settings.setValue(
+        "WORDLIST_SOURCE_FILE",
+        os.path.join(DATA_DIRECTORY, "eff_large_wordlist.txt"),
+        # Text word list the packed one is built from
+    )
+    settings.setValue(
+        "BREACH_INDEX_FILE",
+        os.path.join(DATA_DIRECTORY, "breaches.bin"),
+        # Breached password index built by src/breaches.py, if installed
+    )
     settings.setValue(
         "WIDTH",
         800,
@@ -75,6 +109,26 @@ def load_settings():
         600,
         # Height of the application window
     )
+    settings.setValue(
+        "MAX_IN_FLIGHT_REQUESTS",
+        4,
+        # Size of the background request thread pool
+    )
+    settings.setValue(
+        "BULK_WORKERS",
+        8,
+        # Number of concurrent requests sent by imports and bulk actions
+    )
+    settings.setValue(
+        "ENTRY_CACHE_SIZE",
+        256,
+        # Number of recently used entries kept for the edit dialog
+    )
+    settings.setValue(
+        "CLIPBOARD_CLEAR_SECONDS",
+        30,
+        # Seconds before copied entry fields are cleared from the clipboard
+    )
     # Endpoints
     settings.setValue(
         "DOMAIN",
@@ -126,19 +180,50 @@ def load_settings():
         urljoin(settings.value("DOMAIN"), "/auth/users/reset_password/"),
         # Endpoint for password reset
     )
+    # earlier versions saved the vault key in plain text
+    settings.remove("VAULT_KEY")
     return settings
 
 
+def resume_session():
+    """Opens the vault of the saved session with the key saved for it, the
+    account password is only asked for on a new sign in."""
+    from vault_crypto import resume_vault
+
+    resumed = resume_vault()
+    startup_profile.mark("resume vault")
+    return resumed
+
+
 def main():
+    startup_profile.mark("imports")
+    telemetry.start_if_requested(sys.argv)
     settings = load_settings()
+    startup_profile.mark("settings")
     app = QApplication(sys.argv)
+    startup_profile.mark("QApplication")
     if settings.value("THEME") == "dark":
+        import qdarkstyle
+
         app.setStyleSheet(qdarkstyle.load_stylesheet(qt_api="pyqt5"))
-    if settings.value("ACCESS_TOKEN"):
-        main_window = Database()
+        startup_profile.mark("dark theme")
+    # only the first window's module is imported here, the other windows
+    # import theirs when they are opened
+    if settings.value("REFRESH_TOKEN") and resume_session():
+        from database import Database as MainWindow
     else:
-        main_window = SignIn()
+        from sign_in import SignIn as MainWindow
+
+    startup_profile.mark(f"import {MainWindow.__name__}")
+    main_window = MainWindow()
+    startup_profile.mark(f"create {MainWindow.__name__}")
     main_window.show()
+    startup_profile.mark("show")
+    if startup_profile.enabled():
+        # runs once the event loop has painted the window
+        QTimer.singleShot(
+            0, lambda: (startup_profile.mark("first paint"), startup_profile.report())
+        )
     app.exec_()
 
 
@@ -1,13 +1,27 @@
-import random
-import string
-
 from PyQt5.QtCore import QSettings
-from PyQt5.QtWidgets import QApplication
 
+from clipboard import get_clipboard
 from custom_widgets import CustomQDialog
+from generator import (
+    CAPITALIZATIONS,
+    CHARACTER_CLASSES,
+    generate_passphrase,
+    generate_password,
+    get_alphabet,
+    passphrase_entropy,
+    password_entropy,
+)
 
 settings = QSettings("Passify", "Passify")
 
+PASSWORD_MODE = 0
+PASSPHRASE_MODE = 1
+# Range and default of the length slider in each mode, characters or words.
+LENGTH_RANGES = {
+    PASSWORD_MODE: (1, 50, 20),
+    PASSPHRASE_MODE: (3, 12, 6),
+}
+
 
 class PasswordGenerator(CustomQDialog):
     def __init__(self):
@@ -18,45 +32,98 @@ class PasswordGenerator(CustomQDialog):
         self.ui.sb_length.valueChanged.connect(self.sbValueChanged)
         self.ui.lbl_generate.clicked.connect(self.generate)
         self.ui.lbl_copy.clicked.connect(self.copy_to_clipboard)
+        self.ui.le_password.set_strength_meter(True)
 
         self.ui.cb_upper.stateChanged.connect(self.generate)
         self.ui.cb_lower.stateChanged.connect(self.generate)
         self.ui.cb_numbers.stateChanged.connect(self.generate)
         self.ui.cb_symbols.stateChanged.connect(self.generate)
 
+        # length last used in each mode
+        self.lengths = {
+            mode: default for mode, (_, _, default) in LENGTH_RANGES.items()
+        }
+        self.ui.cmb_mode.currentIndexChanged.connect(self.set_mode)
+        self.ui.le_separator.textChanged.connect(self.generate)
+        self.ui.cmb_capitalization.currentIndexChanged.connect(self.generate)
+
+    def reset(self):
+        # the pooled dialog is shared, callers that need it modal set that
+        # again after `dialog_pool.get`
+        self.setModal(False)
         self.generate()
 
     def hsValueChanged(self, value):
+        # the spin box generates once it has the new value
         self.ui.sb_length.setValue(value)
-        self.generate()
 
     def sbValueChanged(self, value):
         self.ui.hs_length.setValue(value)
         self.generate()
 
     def copy_to_clipboard(self):
-        clipboard = QApplication.clipboard()
-        clipboard.setText(self.ui.le_password.text())
+        get_clipboard().copy(self.ui.le_password.text(), secret=True)
+
+    def set_mode(self, mode):
+        """Switches between character passwords and passphrases.
+
+        The word list is only loaded once the passphrase mode is picked.
+        """
+        previous = PASSPHRASE_MODE if mode == PASSWORD_MODE else PASSWORD_MODE
+        self.lengths[previous] = self.ui.sb_length.value()
+        minimum, maximum, _ = LENGTH_RANGES[mode]
+        for widget in (self.ui.sb_length, self.ui.hs_length):
+            widget.blockSignals(True)
+            widget.setRange(minimum, maximum)
+            widget.setValue(self.lengths[mode])
+            widget.blockSignals(False)
+        self.ui.sw_options.setCurrentIndex(mode)
+        self.generate()
+
+    def selected_classes(self):
+        checkboxes = {
+            "upper": self.ui.cb_upper,
+            "lower": self.ui.cb_lower,
+            "numbers": self.ui.cb_numbers,
+            "symbols": self.ui.cb_symbols,
+        }
+        return tuple(
+            name for name in CHARACTER_CLASSES if checkboxes[name].isChecked()
+        )
 
     def generate(self):
-        upper = string.ascii_uppercase
-        lower = string.ascii_lowercase
-        numbers = string.digits
-        symbols = string.punctuation
-
-        all = ""
-
-        if self.ui.cb_upper.isChecked():
-            all += upper
-        if self.ui.cb_lower.isChecked():
-            all += lower
-        if self.ui.cb_numbers.isChecked():
-            all += numbers
-        if self.ui.cb_symbols.isChecked():
-            all += symbols
-
-        if all:
-            password = "".join(random.choices(all, k=self.ui.sb_length.value()))
-            self.ui.le_password.setText(password)
+        if self.ui.cmb_mode.currentIndex() == PASSPHRASE_MODE:
+            self.generate_passphrase()
         else:
-            self.ui.le_password.setText(all)
+            self.generate_password()
+
+    def generate_password(self):
+        classes = self.selected_classes()
+        if not classes:
+            self.ui.le_password.setText("")
+            self.ui.lbl_entropy.setText("")
+            return
+        length = self.ui.sb_length.value()
+        alphabet = get_alphabet(classes)
+        # a password shorter than the number of classes can't hold them all
+        require_each = length >= len(classes)
+        self.ui.le_password.setText(generate_password(length, alphabet, require_each))
+        self.show_entropy(password_entropy(length, alphabet, require_each))
+
+    def generate_passphrase(self):
+        from wordlist import get_wordlist
+
+        wordlist = get_wordlist()
+        word_count = self.ui.sb_length.value()
+        self.ui.le_password.setText(
+            generate_passphrase(
+                word_count,
+                wordlist,
+                self.ui.le_separator.text(),
+                list(CAPITALIZATIONS)[self.ui.cmb_capitalization.currentIndex()],
+            )
+        )
+        self.show_entropy(passphrase_entropy(word_count, len(wordlist)))
+
+    def show_entropy(self, bits):
+        self.ui.lbl_entropy.setText(f"Entropy: {bits:.0f} bits")
@@ -0,0 +1,522 @@
+import time
+from collections import defaultdict
+from urllib.parse import urlsplit
+
+from PyQt5.QtCore import QAbstractProxyModel, QModelIndex, QObject, Qt, QTimer, pyqtSignal
+
+import telemetry
+from vault_model import NOTES_COLUMN, TITLE_COLUMN, URL_COLUMN, USERNAME_COLUMN
+
+# Joins the fields of a row, never typed in the search bar so a query can't
+# match across two fields.
+SEPARATOR = "\0"
+# Searchable fields of a row, in order of relevance, and the base score of a
+# match in each of them.
+FIELDS = ("title", "host", "username", "url", "notes")
+FIELD_SCORES = (5000, 4000, 3000, 2000, 1000)
+# Bonuses within a field, kept below the gap between two field scores.
+PREFIX_BONUS = 600
+CONTIGUOUS_BONUS = 300
+MAX_PENALTY = 299
+# Seconds a search runs before it returns to the event loop, half a frame.
+SLICE_SECONDS = 0.008
+# Rows scanned between two looks at the clock.
+CLOCK_ROWS = 256
+# Idle time after the last keystroke before a search starts.
+DEBOUNCE_MS = 150
+
+
+def url_host(url):
+    if "//" not in url:
+        url = f"//{url}"
+    try:
+        return urlsplit(url).hostname or ""
+    except ValueError:
+        return ""
+
+
+def fuzzy_match(haystack, query, begin=0):
+    """Finds the characters of the query in order within one field.
+
+    Each character is looked up with `str.find` after the previous one, and
+    a field that fails is not scanned again from a later start, since that
+    can only fail too. The cost is linear in the haystack whatever the
+    query, where a backtracking regex is polynomial in its length.
+
+    Args:
+        begin (int): Position the search starts at, the start of a field.
+
+    Returns:
+        tuple: (start, end) of the match starting at the first occurrence of
+            the query's first character whose field holds the rest, with
+            every character taken at its first occurrence after the previous
+            one. It is not necessarily the shortest match. None if no field
+            holds one.
+    """
+    first, rest = query[0], query[1:]
+    start = haystack.find(first, begin)
+    while start != -1:
+        field_end = haystack.find(SEPARATOR, start)
+        if field_end == -1:
+            field_end = len(haystack)
+        end = start + 1
+        for char in rest:
+            end = haystack.find(char, end, field_end)
+            if end == -1:
+                break
+            end += 1
+        else:
+            return start, end
+        start = haystack.find(first, field_end)
+    return None
+
+
+def extend_match(haystack, query, start, end, matched):
+    """Finds the match of a query that extends an earlier one, the same as
+    `fuzzy_match` would, without scanning the matched part again.
+
+    Args:
+        start (int): Start of the match of `query[:matched]`.
+        end (int): End of that match.
+        matched (int): Length of the query it was found for.
+    """
+    field_end = haystack.find(SEPARATOR, start)
+    if field_end == -1:
+        field_end = len(haystack)
+    typed = query[matched:]
+    for char in typed:
+        end = haystack.find(char, end, field_end)
+        if end == -1:
+            # the fields before failed on the shorter query already, and a
+            # later field can only match if it holds what was typed
+            for char in typed:
+                if haystack.find(char, field_end) == -1:
+                    return None
+            return fuzzy_match(haystack, query, field_end)
+        end += 1
+    return start, end
+
+
+def score_match(haystack, match, query):
+    """Scores a fuzzy match of the query in a row's haystack.
+
+    The leftmost match lies in the most relevant field holding one, since
+    the fields are laid out by relevance. Within that field a prefix beats
+    a contiguous substring, which beats a scattered fuzzy match.
+
+    Args: match (tuple): (start, end) as returned by `fuzzy_match`.
+    """
+    start, end = match
+    field = haystack.count(SEPARATOR, 0, start)
+    field_start = haystack.rfind(SEPARATOR, 0, start) + 1
+    field_end = haystack.find(SEPARATOR, start)
+    if field_end == -1:
+        field_end = len(haystack)
+    score = FIELD_SCORES[field]
+    position = haystack.find(query, field_start, field_end)
+    if position == field_start:
+        return score + PREFIX_BONUS + CONTIGUOUS_BONUS
+    if position != -1:
+        return score + CONTIGUOUS_BONUS - min(position - field_start, MAX_PENALTY)
+    return score - min(end - start - len(query), MAX_PENALTY)
+
+
+class SearchIndex:
+    """Pre-lowered search text of every entry.
+
+    Each row is stored as one lowercase haystack holding all the searchable
+    fields, so a query costs one linear scan per row and no calls into Qt.
+    The rows matching the last query are kept around with their matches:
+    when the user keeps typing, the new query can only match a subset of
+    them, so only those are scanned again, and a query typed on from the
+    last one resumes each row's match where it ended, see `extend_match`.
+    The matches are kept as two lists of ints rather than a tuple per row,
+    which the garbage collector would have to walk through.
+    """
+
+    def __init__(self):
+        self.haystacks = []
+        self.generation = 0  # bumped on every change of the haystacks
+        self.last_query = ""
+        self.last_rows = None
+        self.last_starts = None  # match of each row in `last_rows`
+        self.last_ends = None
+
+    def haystack(self, model, row):
+        url = model.text(row, URL_COLUMN)
+        return SEPARATOR.join(
+            (
+                model.text(row, TITLE_COLUMN),
+                url_host(url),
+                model.text(row, USERNAME_COLUMN),
+                url,
+                model.text(row, NOTES_COLUMN),
+            )
+        ).lower()
+
+    def rebuild(self, model):
+        self.haystacks = [self.haystack(model, row) for row in range(model.rowCount())]
+        self.forget()
+
+    def insert(self, model, first, last):
+        self.haystacks[first:first] = [
+            self.haystack(model, row) for row in range(first, last + 1)
+        ]
+        self.forget()
+
+    def remove(self, first, last):
+        del self.haystacks[first : last + 1]
+        self.forget()
+
+    def update(self, model, first, last):
+        for row in range(first, last + 1):
+            self.haystacks[row] = self.haystack(model, row)
+        self.forget()
+
+    def forget(self):
+        """Drops the narrowing state, the rows it refers to have changed."""
+        self.generation += 1
+        self.last_query = ""
+        self.last_rows = None
+        self.last_starts = None
+        self.last_ends = None
+
+    def matches(self, query, row):
+        return fuzzy_match(self.haystacks[row], query) is not None
+
+    def search(self, query, slice_seconds=SLICE_SECONDS):
+        """Searches the rows matching the query, a slice of time at a time.
+
+        This is a generator: it yields whenever it has run for
+        `slice_seconds`, so the caller can return to the event loop or drop
+        the search, and returns the matching rows ranked by relevance. It
+        returns `None` if the index changed in the meantime.
+
+        Args:
+            query (str): Lowercase search text, must not be empty.
+            slice_seconds (float): Time spent scanning between two yields.
+        """
+        generation = self.generation
+        last_starts = last_ends = None
+        if self.last_rows is not None and self.last_query in query:
+            candidates = self.last_rows
+            if self.last_starts is not None and query.startswith(self.last_query):
+                last_starts, last_ends = self.last_starts, self.last_ends
+        else:
+            candidates = range(len(self.haystacks))
+        matched_length = len(self.last_query)
+        haystacks = self.haystacks
+        matched = []
+        starts = []
+        ends = []
+        # Scores are small integers, so rows are ranked as they are scanned
+        # by dropping them in one bucket per score. Candidates come in
+        # ascending order, which keeps ties in table order.
+        buckets = defaultdict(list)
+        deadline = time.perf_counter() + slice_seconds
+        for first in range(0, len(candidates), CLOCK_ROWS):
+            last = first + CLOCK_ROWS
+            if last_starts is not None:
+                batch = zip(
+                    candidates[first:last],
+                    last_starts[first:last],
+                    last_ends[first:last],
+                )
+                for row, start, end in batch:
+                    haystack = haystacks[row]
+                    match = extend_match(haystack, query, start, end, matched_length)
+                    if match:
+                        matched.append(row)
+                        starts.append(match[0])
+                        ends.append(match[1])
+                        buckets[score_match(haystack, match, query)].append(row)
+            else:
+                for row in candidates[first:last]:
+                    haystack = haystacks[row]
+                    match = fuzzy_match(haystack, query)
+                    if match:
+                        matched.append(row)
+                        starts.append(match[0])
+                        ends.append(match[1])
+                        buckets[score_match(haystack, match, query)].append(row)
+            if time.perf_counter() >= deadline:
+                yield
+                if generation != self.generation:
+                    return None
+                deadline = time.perf_counter() + slice_seconds
+        self.last_query = query
+        self.last_rows = matched
+        self.last_starts = starts
+        self.last_ends = ends
+        return [row for score in sorted(buckets, reverse=True) for row in buckets[score]]
+
+    def search_now(self, query):
+        """Runs `search` to completion and returns the ranked rows."""
+        steps = self.search(query, slice_seconds=float("inf"))
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+
+class SearchPipeline(QObject):
+    """Runs the search bar queries without stalling the window.
+
+    Queries are debounced, so nothing happens while the user is still
+    typing. A search then runs for `SLICE_SECONDS` per event loop
+    iteration, and a newer query typed in between two slices drops the one
+    in progress before it scans another row.
+    """
+
+    # query and ranked source rows, None when the query is empty
+    finished = pyqtSignal(str, object)
+
+    def __init__(self, search_index, parent=None):
+        super().__init__(parent)
+        self.search_index = search_index
+        self.query = ""
+        self.steps = None
+        self.started = None  # when the search in progress started
+        self.debounce_timer = QTimer(self)
+        self.debounce_timer.setSingleShot(True)
+        self.debounce_timer.setInterval(DEBOUNCE_MS)
+        self.debounce_timer.timeout.connect(self.start)
+        self.step_timer = QTimer(self)
+        self.step_timer.timeout.connect(self.step)
+
+    def submit(self, query: str) -> None:
+        """Schedules a search for the query once the user stops typing.
+
+        Args: query (str): Text typed in the search bar.
+
+        Returns: None
+        """
+        self.cancel()
+        self.query = query.lower()
+        self.debounce_timer.start()
+
+    def cancel(self) -> None:
+        self.debounce_timer.stop()
+        self.step_timer.stop()
+        self.steps = None
+
+    def start(self):
+        if not self.query:
+            self.finished.emit(self.query, None)
+            return
+        self.started = telemetry.start()
+        self.steps = self.search_index.search(self.query, SLICE_SECONDS)
+        self.step_timer.start(0)
+
+    def step(self):
+        if self.steps is None:
+            # cancelled since the last slice, by a timeout already queued
+            self.step_timer.stop()
+            return
+        try:
+            next(self.steps)
+        except StopIteration as stop:
+            self.step_timer.stop()
+            self.steps = None
+            if stop.value is None:
+                # the entries changed under the search, start over
+                self.start()
+            else:
+                telemetry.stop(telemetry.PHASE_SECONDS, "search", self.started)
+                with telemetry.timed(telemetry.PHASE_SECONDS, "search.render"):
+                    self.finished.emit(self.query, stop.value)
+
+
+class VaultFilterProxyModel(QAbstractProxyModel):
+    """Shows the rows of a `VaultTableModel` that match the search query.
+
+    A `QSortFilterProxyModel` re-evaluates `filterAcceptsRow` for every source
+    row on each keystroke, which means one Python callback per row. This
+    proxy gets the matching rows, ranked by relevance, from the `SearchIndex`
+    in one go and only maps the indexes the view asks for.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_index = SearchIndex()
+        self.query = ""
+        self._rows = None  # source rows shown, None shows all of them
+        self._positions = None  # source row -> proxy row, built on demand
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelAboutToBeReset.connect(self._source_about_to_be_reset)
+        model.modelReset.connect(self._source_reset)
+        model.rowsAboutToBeInserted.connect(self._source_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self._source_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._source_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._source_rows_removed)
+        model.dataChanged.connect(self._source_data_changed)
+        self.search_index.rebuild(model)
+
+    def set_query(self, query: str) -> None:
+        """Filters the rows with the given search text.
+
+        Args: query (str): Text typed in the search bar.
+
+        Returns: None
+        """
+        query = query.lower()
+        if query == self.query:
+            return
+        self.beginResetModel()
+        self.query = query
+        self._filter()
+        self.endResetModel()
+
+    def set_result(self, query: str, rows) -> None:
+        """Shows the result of a search run by a `SearchPipeline`.
+
+        Args:
+            query (str): Lowercase query the rows were searched with.
+            rows (list): Ranked source rows, `None` to show every row.
+
+        Returns: None
+        """
+        self.beginResetModel()
+        self.query = query
+        self._set_rows(rows)
+        self.endResetModel()
+
+    def _filter(self):
+        if self.query:
+            self._set_rows(self.search_index.search_now(self.query))
+        else:
+            self._set_rows(None)
+
+    def _set_rows(self, rows):
+        self._rows = rows
+        self._positions = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        if self._rows is None:
+            return self.sourceModel().rowCount()
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().columnCount()
+
+    def index(self, row, column, parent=QModelIndex()):
+        if (
+            parent.isValid()
+            or not 0 <= row < self.rowCount()
+            or not 0 <= column < self.columnCount()
+        ):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def data(self, index, role=Qt.DisplayRole):
+        # read straight from the column store instead of building a source
+        # index, the view calls this for every role of every painted cell
+        if role not in (Qt.DisplayRole, Qt.EditRole) or not index.isValid():
+            return None
+        row = index.row()
+        if self._rows is not None:
+            row = self._rows[row]
+        return self.sourceModel().text(row, index.column())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Vertical and self._rows is not None:
+            if not 0 <= section < len(self._rows):
+                return None
+            section = self._rows[section]
+        return self.sourceModel().headerData(section, orientation, role)
+
+    def mapToSource(self, proxy_index):
+        if not proxy_index.isValid():
+            return QModelIndex()
+        row = proxy_index.row()
+        if self._rows is not None:
+            row = self._rows[row]
+        return self.sourceModel().index(row, proxy_index.column())
+
+    def mapFromSource(self, source_index):
+        if not source_index.isValid():
+            return QModelIndex()
+        row = source_index.row()
+        if self._rows is not None:
+            if self._positions is None:
+                self._positions = {row: position for position, row in enumerate(self._rows)}
+            row = self._positions.get(row)
+            if row is None:
+                return QModelIndex()
+        return self.createIndex(row, source_index.column())
+
+    # Source model changes. Without a query the proxy mirrors the source, so
+    # the changes are forwarded as they are; while filtering they may move
+    # rows in or out of the result, so the result is recomputed instead.
+
+    def _source_about_to_be_reset(self):
+        self.beginResetModel()
+
+    def _source_reset(self):
+        self.search_index.rebuild(self.sourceModel())
+        self._filter()
+        self.endResetModel()
+
+    def _source_rows_about_to_be_inserted(self, parent, first, last):
+        if self._rows is None:
+            self.beginInsertRows(QModelIndex(), first, last)
+        else:
+            self.beginResetModel()
+
+    def _source_rows_inserted(self, parent, first, last):
+        self.search_index.insert(self.sourceModel(), first, last)
+        if self._rows is None:
+            self.endInsertRows()
+        else:
+            self._filter()
+            self.endResetModel()
+
+    def _source_rows_about_to_be_removed(self, parent, first, last):
+        if self._rows is None:
+            self.beginRemoveRows(QModelIndex(), first, last)
+        else:
+            self.beginResetModel()
+
+    def _source_rows_removed(self, parent, first, last):
+        self.search_index.remove(first, last)
+        if self._rows is None:
+            self.endRemoveRows()
+        else:
+            self._filter()
+            self.endResetModel()
+
+    def _source_data_changed(self, top_left, bottom_right, roles=[]):
+        first, last = top_left.row(), bottom_right.row()
+        self.search_index.update(self.sourceModel(), first, last)
+        if self._rows is not None:
+            matched = set(self._rows)
+            if any(
+                (row in matched) != self.search_index.matches(self.query, row)
+                for row in range(first, last + 1)
+            ):
+                # an edited row entered or left the result
+                self.beginResetModel()
+                self._filter()
+                self.endResetModel()
+                return
+            self.search_index.last_query = self.query
+            self.search_index.last_rows = sorted(self._rows)
+            self.search_index.last_starts = None
+            self.search_index.last_ends = None
+        for row in range(first, last + 1):
+            top_left = self.mapFromSource(self.sourceModel().index(row, 0))
+            if top_left.isValid():
+                self.dataChanged.emit(
+                    top_left,
+                    top_left.sibling(top_left.row(), self.columnCount() - 1),
+                )
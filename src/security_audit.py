@@ -0,0 +1,138 @@
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtWidgets import QTreeWidgetItem
+
+from custom_widgets import CustomQDialog
+from strength import SCORE_LABELS
+from vault_model import TITLE_COLUMN, URL_COLUMN, USERNAME_COLUMN
+
+# Entries listed under each kind of finding, a tree of every entry of a large
+# vault would take longer to build than the audit itself.
+MAX_LISTED = 500
+
+
+class SecurityAudit(CustomQDialog):
+    """Lists the reused, weak, breached and near-duplicate passwords of the
+    vault.
+
+    The findings come from an `audit.AuditMonitor` and are shown again each
+    time it reports a change while the dialog is open.
+    """
+
+    # an entry was double-clicked, with its id url
+    entry_activated = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__("audit.ui", "Passify - Security Audit", 600, 400)
+        self.monitor = None
+        self.ui.tw_findings.itemDoubleClicked.connect(self.on_item_double_clicked)
+
+    def reset(self, monitor):
+        if self.monitor is not monitor:
+            if self.monitor is not None:
+                self.monitor.changed.disconnect(self.on_audit_changed)
+                self.monitor.failed.disconnect(self.show_failure)
+            monitor.changed.connect(self.on_audit_changed)
+            monitor.failed.connect(self.show_failure)
+            self.monitor = monitor
+        self.show_findings()
+
+    def on_audit_changed(self):
+        # a hidden dialog is brought up to date by `reset` when it reopens
+        if self.isVisible():
+            self.show_findings()
+
+    def show_failure(self, error):
+        self.ui.lbl_summary.setText("The vault could not be audited.")
+        if self.isVisible():
+            self.show_request_error(error)
+
+    def show_findings(self):
+        audit = self.monitor.audit
+        if audit is None:
+            self.ui.lbl_summary.setText("Auditing the vault...")
+            self.ui.tw_findings.clear()
+            return
+        reused = sorted(audit.reused_groups(), key=len, reverse=True)
+        similar = sorted(audit.similar_groups(), key=len, reverse=True)
+        weak = audit.weak_entries()
+        breached = audit.breached_entries()
+        self.ui.lbl_summary.setText(
+            f"{len(audit)} passwords audited: "
+            f"{sum(map(len, reused))} reused, {len(weak)} weak, "
+            f"{len(breached)} breached and "
+            f"{sum(map(len, similar))} similar to another one."
+        )
+        tree = self.ui.tw_findings
+        tree.setUpdatesEnabled(False)
+        tree.clear()
+        self.add_groups("Reused passwords", "Same password", reused)
+        self.add_weak_entries(weak)
+        self.add_breached_entries(breached)
+        self.add_groups("Similar passwords", "Variations of a password", similar)
+        tree.expandToDepth(0)
+        tree.setUpdatesEnabled(True)
+        for column in range(2):
+            tree.resizeColumnToContents(column)
+
+    def add_section(self, title, count):
+        section = QTreeWidgetItem(self.ui.tw_findings, [f"{title} ({count})"])
+        section.setFirstColumnSpanned(True)
+        return section
+
+    def add_groups(self, title, group_title, groups):
+        section = self.add_section(title, len(groups))
+        listed = 0
+        for index, ids in enumerate(groups):
+            if listed >= MAX_LISTED:
+                self.add_more(section, len(groups) - index, "groups")
+                break
+            group = QTreeWidgetItem(section, [f"{group_title}, {len(ids)} entries"])
+            group.setFirstColumnSpanned(True)
+            rows = sorted(
+                row
+                for row in map(self.monitor.model.row, ids)
+                if row is not None
+            )
+            for row in rows[:MAX_LISTED]:
+                self.add_entry(group, row)
+            listed += min(len(rows), MAX_LISTED)
+
+    def add_weak_entries(self, weak):
+        section = self.add_section("Weak passwords", len(weak))
+        for id_url, strength in weak[:MAX_LISTED]:
+            details = SCORE_LABELS[strength.score]
+            if strength.warning:
+                details = f"{details}: {strength.warning}"
+            self.add_entry(section, self.monitor.model.row(id_url), details)
+        if len(weak) > MAX_LISTED:
+            self.add_more(section, len(weak) - MAX_LISTED, "entries")
+
+    def add_breached_entries(self, breached):
+        section = self.add_section("Breached passwords", len(breached))
+        for id_url, count in breached[:MAX_LISTED]:
+            self.add_entry(
+                section,
+                self.monitor.model.row(id_url),
+                f"Seen {count:,} times in data breaches",
+            )
+        if len(breached) > MAX_LISTED:
+            self.add_more(section, len(breached) - MAX_LISTED, "entries")
+
+    def add_entry(self, parent, row, details=""):
+        model = self.monitor.model
+        if row is None:
+            return
+        title = model.text(row, TITLE_COLUMN) or model.text(row, URL_COLUMN)
+        item = QTreeWidgetItem(
+            parent, [title, model.text(row, USERNAME_COLUMN), details]
+        )
+        item.setData(0, Qt.UserRole, model.id_url(row))
+
+    def add_more(self, parent, count, noun):
+        item = QTreeWidgetItem(parent, [f"... and {count} more {noun}"])
+        item.setFirstColumnSpanned(True)
+
+    def on_item_double_clicked(self, item, column):
+        id_url = item.data(0, Qt.UserRole)
+        if id_url:
+            self.entry_activated.emit(id_url)
@@ -2,12 +2,81 @@ from PyQt5.QtCore import QEvent, QSettings, Qt
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import QLineEdit, QMessageBox, QShortcut
 
-from custom_widgets import CustomQWidget
-from utils import get_error_message, is_valid_email, post_request
+from custom_widgets import CustomQWidget, dialog_pool
+from utils import (
+    auth_request,
+    get_error_message,
+    is_valid_email,
+    post_request,
+    set_access_token,
+)
 
 settings = QSettings("Passify", "Passify")
 
 
+def upgrade_account(sign_in_endpoint, change_password_endpoint, data, keys):
+    """Signs in with the account password itself, the way earlier versions
+    did, and replaces it on the server with the login password. Runs on a
+    worker.
+
+    Args:
+        data (dict): The email and the account password.
+        keys (AccountKeys): The keys derived from them.
+
+    Returns:
+        Response: The response of the sign in, or of the failed change.
+    """
+    response = post_request(sign_in_endpoint, data)
+    if response.status_code != 200:
+        return response
+    changed = auth_request(
+        "POST",
+        change_password_endpoint,
+        json={
+            "current_password": data["password"],
+            "new_password": keys.login_password,
+            "re_new_password": keys.login_password,
+        },
+        headers={"Authorization": f"JWT {response.json().get('access')}"},
+    )
+    return response if changed.status_code == 204 else changed
+
+
+def finish_email_change(sign_in_endpoint, change_password_endpoint, email, data, keys):
+    """Signs in with the login password derived from the email before an
+    unfinished change, see `edit_profile.UnfinishedEmailChange`, and replaces
+    it with the one derived from the new email. Runs on a worker.
+
+    Args:
+        email (str): The email before the change.
+        data (dict): The new email and the account password.
+        keys (AccountKeys): The keys derived from them.
+
+    Returns:
+        tuple: The response of the sign in, or of the failed change, and the
+        vault key derived with the old email, which the vault still uses.
+    """
+    from vault_crypto import derive_account_keys
+
+    old = derive_account_keys(email, data["password"])
+    response = post_request(
+        sign_in_endpoint, {"email": data["email"], "password": old.login_password}
+    )
+    if response.status_code != 200:
+        return response, old.vault_key
+    changed = auth_request(
+        "POST",
+        change_password_endpoint,
+        json={
+            "current_password": old.login_password,
+            "new_password": keys.login_password,
+            "re_new_password": keys.login_password,
+        },
+        headers={"Authorization": f"JWT {response.json().get('access')}"},
+    )
+    return (response if changed.status_code == 204 else changed), old.vault_key
+
+
 class SignIn(CustomQWidget):
     def __init__(self):
         super().__init__("sign_in.ui", "Passify - Sign In")
@@ -15,6 +84,9 @@ class SignIn(CustomQWidget):
         self.ui.lbl_forget_password.clicked.connect(self.go_to_forget_password)
         self.ui.lbl_sign_up.clicked.connect(self.go_to_sign_up)
         self.ui.le_password.setEchoMode(QLineEdit.Password)
+        if self.has_session():
+            self.ui.le_email.setText(settings.value("EMAIL"))
+            self.ui.le_password.setFocus()
 
         # Adding keyboard shortcut Ctrl+G
         shortcut = QShortcut(QKeySequence(Qt.CTRL + Qt.Key_G), self)
@@ -23,27 +95,28 @@ class SignIn(CustomQWidget):
     def password_generator(self):
         from password_generator import PasswordGenerator
 
-        password_generator_window = PasswordGenerator()
+        password_generator_window = dialog_pool.get(PasswordGenerator)
         password_generator_window.setModal(True)
         password_generator_window.show()
 
+    def has_session(self):
+        return bool(settings.value("REFRESH_TOKEN") and settings.value("EMAIL"))
+
     def sign_in(self):
+        from vault_crypto import derive_account_keys
+
         try:
             data = self.validate_input()
-            response = post_request(settings.value("SIGN_IN_ENDPOINT"), data)
-            if response.status_code == 200:
-                ACCESS_TOKEN = response.json().get("access")
-                REFRESH_TOKEN = response.json().get("refresh")
-                settings.setValue("ACCESS_TOKEN", ACCESS_TOKEN)
-                settings.setValue("REFRESH_TOKEN", REFRESH_TOKEN)
-                self.go_to_database()
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
+            self.ui.btn_sign_in.setEnabled(False)
+            # scrypt takes a moment on purpose, keep the window responsive
+            self.run_in_background(
+                derive_account_keys,
+                data["email"],
+                data["password"],
+                on_success=lambda keys: self.on_keys_derived(keys, data),
+                # stays disabled while signing in
+                on_finished=lambda: self.ui.btn_sign_in.setEnabled(not self.tasks),
+            )
         except Exception as e:
             QMessageBox.warning(
                 self,
@@ -51,6 +124,130 @@ class SignIn(CustomQWidget):
                 f"{str(e)}",
             )
 
+    def on_keys_derived(self, keys, data):
+        from vault_crypto import is_vault_key, open_vault
+
+        if (
+            self.has_session()
+            and data["email"] == settings.value("EMAIL")
+            and is_vault_key(keys.vault_key)
+        ):
+            # the saved session goes on without the server, also offline
+            open_vault(keys.vault_key)
+            self.go_to_database()
+            return
+        self.run_in_background(
+            post_request,
+            settings.value("SIGN_IN_ENDPOINT"),
+            {"email": data["email"], "password": keys.login_password},
+            on_success=lambda response: self.on_signed_in(response, keys, data),
+            on_finished=lambda: self.ui.btn_sign_in.setEnabled(not self.tasks),
+        )
+
+    def on_signed_in(self, response, keys, data):
+        from vault_crypto import open_vault
+
+        if response.status_code == 200:
+            self.start_session(response, data["email"])
+            open_vault(keys.vault_key)
+            self.go_to_database()
+        elif response.status_code == 401 and self.has_unfinished_email_change(data):
+            self.run_in_background(
+                finish_email_change,
+                settings.value("SIGN_IN_ENDPOINT"),
+                settings.value("CHANGE_PASSWORD_ENDPOINT"),
+                settings.value("UNFINISHED_EMAIL_CHANGE"),
+                data,
+                keys,
+                on_success=lambda result: self.on_email_change_finished(
+                    result, keys, data
+                ),
+                on_finished=lambda: self.ui.btn_sign_in.setEnabled(not self.tasks),
+            )
+        elif response.status_code == 401 and self.confirm_upgrade():
+            self.run_in_background(
+                upgrade_account,
+                settings.value("SIGN_IN_ENDPOINT"),
+                settings.value("CHANGE_PASSWORD_ENDPOINT"),
+                data,
+                keys,
+                on_success=lambda response: self.on_upgraded(response, keys, data),
+                on_finished=lambda: self.ui.btn_sign_in.setEnabled(not self.tasks),
+            )
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
+
+    def has_unfinished_email_change(self, data):
+        return bool(settings.value("UNFINISHED_EMAIL_CHANGE")) and (
+            data["email"].lower() == (settings.value("EMAIL") or "").lower()
+        )
+
+    def on_email_change_finished(self, result, keys, data):
+        from vault_crypto import set_vault_key
+
+        response, previous_key = result
+        if response.status_code == 200:
+            settings.remove("UNFINISHED_EMAIL_CHANGE")
+            self.start_session(response, data["email"])
+            # encrypted again with the new email's key once the database opens
+            set_vault_key(keys.vault_key, previous_key=previous_key)
+            self.go_to_database()
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
+
+    def confirm_upgrade(self):
+        """Asks before the account password is sent to the server, which is
+        only needed once for an account that has not been upgraded yet."""
+        answer = QMessageBox.question(
+            self,
+            "Sign in",
+            "The email or password is wrong, or the account still signs in "
+            "the way earlier versions of Passify did, with the password "
+            "itself.\n\nPassify no longer sends your password to the server. "
+            "To upgrade the account it has to be sent once more. Send it?",
+            QMessageBox.Yes | QMessageBox.No,
+            QMessageBox.No,
+        )
+        return answer == QMessageBox.Yes
+
+    def on_upgraded(self, response, keys, data):
+        from vault_crypto import set_vault_key
+
+        if response.status_code == 200:
+            self.start_session(response, data["email"])
+            # the vault was encrypted with the master key until now, it is
+            # encrypted again with the vault key once the database opens
+            set_vault_key(keys.vault_key, previous_key=keys.master_key)
+            self.go_to_database()
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
+
+    def start_session(self, response, email):
+        from vault_cache import claim_cache
+
+        claim_cache(email)
+        ACCESS_TOKEN = response.json().get("access")
+        REFRESH_TOKEN = response.json().get("refresh")
+        set_access_token(ACCESS_TOKEN)
+        settings.setValue("REFRESH_TOKEN", REFRESH_TOKEN)
+        # the session is unlocked with the password of this account
+        settings.setValue("EMAIL", email)
+
     def validate_input(self):
         if not (self.ui.le_email.text() and self.ui.le_password.text()):
             raise Exception("Please fill in all the required fields.")
@@ -88,7 +285,8 @@ class SignIn(CustomQWidget):
             Qt.Key_Return,
         ):
             if self.ui.le_email.text() and self.ui.le_password.text():
-                self.sign_in()
+                if self.ui.btn_sign_in.isEnabled():
+                    self.sign_in()
             else:
                 self.focusNextPrevChild(True)
         return super().event(event)
@@ -2,17 +2,37 @@ from PyQt5.QtCore import QEvent, QSettings, Qt
 from PyQt5.QtGui import QKeySequence
 from PyQt5.QtWidgets import QLineEdit, QMessageBox, QShortcut
 
-from custom_widgets import CustomQWidget
-from utils import get_error_message, is_valid_email, post_request
+from custom_widgets import CustomQWidget, dialog_pool
+from utils import (
+    get_error_message,
+    is_valid_email,
+    post_request,
+    validate_password_strength,
+)
 
 settings = QSettings("Passify", "Passify")
 
 
+def sign_up_request(endpoint, data):
+    """Creates the account with the login password derived from the account
+    password, which is not sent. Runs on a worker, scrypt takes a moment on
+    purpose.
+
+    Returns: Response
+    """
+    from vault_crypto import derive_account_keys
+
+    keys = derive_account_keys(data["email"], data["password"])
+    data = dict(data, password=keys.login_password, re_password=keys.login_password)
+    return post_request(endpoint, data)
+
+
 class SignUp(CustomQWidget):
     def __init__(self):
         super().__init__("sign_up.ui", "Passify - Sign up")
         self.ui.le_password.setEchoMode(QLineEdit.Password)
         self.ui.le_re_password.setEchoMode(QLineEdit.Password)
+        self.ui.le_password.set_strength_meter(True)
         self.ui.btn_sign_up.clicked.connect(self.sign_up)
         self.ui.lbl_sign_in.clicked.connect(self.go_to_sign_in)
 
@@ -23,28 +43,21 @@ class SignUp(CustomQWidget):
     def password_generator(self):
         from password_generator import PasswordGenerator
 
-        password_generator_window = PasswordGenerator()
+        password_generator_window = dialog_pool.get(PasswordGenerator)
         password_generator_window.setModal(True)
         password_generator_window.show()
 
     def sign_up(self):
         try:
             data = self.validate_input()
-            response = post_request(settings.value("SIGN_UP_ENDPOINT"), data)
-            if response.status_code == 201:
-                QMessageBox.information(
-                    self,
-                    "Sign up",
-                    "Account created successfully! A verification email has been sent to your email address.",
-                )
-                self.go_to_sign_in()
-            else:
-                error_message = get_error_message(response)
-                QMessageBox.warning(
-                    self,
-                    f"Error {response.status_code}",
-                    error_message,
-                )
+            self.ui.btn_sign_up.setEnabled(False)
+            self.run_in_background(
+                sign_up_request,
+                settings.value("SIGN_UP_ENDPOINT"),
+                data,
+                on_success=self.on_signed_up,
+                on_finished=lambda: self.ui.btn_sign_up.setEnabled(True),
+            )
         except Exception as e:
             QMessageBox.warning(
                 self,
@@ -52,6 +65,22 @@ class SignUp(CustomQWidget):
                 f"{str(e)}",
             )
 
+    def on_signed_up(self, response):
+        if response.status_code == 201:
+            QMessageBox.information(
+                self,
+                "Sign up",
+                "Account created successfully! A verification email has been sent to your email address.",
+            )
+            self.go_to_sign_in()
+        else:
+            error_message = get_error_message(response)
+            QMessageBox.warning(
+                self,
+                f"Error {response.status_code}",
+                error_message,
+            )
+
     def validate_input(self):
         if not (
             self.ui.le_first_name.text()
@@ -67,6 +96,14 @@ class SignUp(CustomQWidget):
             raise Exception("Passwords don't match.")
         if len(self.ui.le_password.text()) < 8:
             raise Exception("Password must be at least 8 characters.")
+        validate_password_strength(
+            self.ui.le_password.text(),
+            (
+                self.ui.le_first_name.text(),
+                self.ui.le_last_name.text(),
+                self.ui.le_email.text(),
+            ),
+        )
         return {
             "first_name": self.ui.le_first_name.text(),
             "last_name": self.ui.le_last_name.text(),
@@ -94,7 +131,8 @@ class SignUp(CustomQWidget):
                 and self.ui.le_password.text()
                 and self.ui.le_re_password.text()
             ):
-                self.sign_up()
+                if self.ui.btn_sign_up.isEnabled():
+                    self.sign_up()
             else:
                 self.focusNextPrevChild(True)
         return super().event(event)
@@ -0,0 +1,75 @@
+"""Startup profiler behind `python src/main.py --profile-startup`.
+
+Times every module imported after `start()` and the phases `main()` goes
+through until the first window is up, then prints both breakdowns. When
+profiling is off `mark()` and `report()` do nothing.
+"""
+
+import builtins
+import sys
+import time
+
+FLAG = "--profile-startup"
+# Number of imports listed in the report.
+TOP_IMPORTS = 20
+
+_original_import = builtins.__import__
+_started = None
+_imports = {}  # module name -> (cumulative seconds, self seconds)
+_stack = []  # time spent in nested imports, one slot per import in progress
+_phases = []  # (phase, time)
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    start = time.perf_counter()
+    _stack.append(0.0)
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        nested = _stack.pop()
+        _imports[name] = (elapsed, elapsed - nested)
+        if _stack:
+            _stack[-1] += elapsed
+
+
+def start_if_requested(argv):
+    """Starts profiling if `FLAG` is in `argv` and removes it from there."""
+    global _started
+    if FLAG in argv:
+        argv.remove(FLAG)
+        _started = time.perf_counter()
+        builtins.__import__ = _timed_import
+
+
+def enabled():
+    return _started is not None
+
+
+def mark(phase):
+    """Records the end of a startup phase."""
+    if enabled():
+        _phases.append((phase, time.perf_counter()))
+
+
+def report(file=sys.stderr):
+    """Stops timing imports and prints the import and phase breakdowns."""
+    if not enabled():
+        return
+    builtins.__import__ = _original_import
+    print(f"{'import':<48} {'cumulative ms':>14} {'self ms':>9}", file=file)
+    for name, (cumulative, own) in sorted(
+        _imports.items(), key=lambda item: item[1][0], reverse=True
+    )[:TOP_IMPORTS]:
+        print(f"{name:<48} {cumulative * 1000:>14.1f} {own * 1000:>9.1f}", file=file)
+    print(f"\n{'phase':<48} {'ms':>14} {'total ms':>9}", file=file)
+    previous = _started
+    for phase, end in _phases:
+        print(
+            f"{phase:<48} {(end - previous) * 1000:>14.1f} "
+            f"{(end - _started) * 1000:>9.1f}",
+            file=file,
+        )
+        previous = end
@@ -0,0 +1,572 @@
+"""Password strength estimation in the style of zxcvbn.
+
+A password is split into the patterns an attacker would try first: common
+passwords and words (also reversed or in l33t speak), keyboard walks, repeats,
+sequences and dates. Each pattern gets an estimated number of guesses and the
+cheapest way to cover the whole password decides its strength; whatever no
+pattern covers is counted as brute force.
+
+The tables are built once, on the first estimate. Patterns are matched by
+where they end, and the matches ending at a position only depend on the text
+before it, so an `Estimator` memoizes them per prefix: while a password is
+being typed only the last character is new work. The memo holds what was
+typed, so it belongs to one password field and is dropped with its text;
+nothing is cached at module level.
+"""
+
+import math
+import re
+from collections import namedtuple
+from datetime import date
+from functools import lru_cache
+
+Match = namedtuple("Match", ["pattern", "start", "end", "guesses_log10"])
+Strength = namedtuple("Strength", ["score", "guesses_log10", "warning"])
+
+# Guesses (log10) a password must need to reach the score of its index + 1.
+SCORE_THRESHOLDS = (3, 6, 8, 10)
+SCORE_LABELS = ("Very weak", "Weak", "Fair", "Strong", "Very strong")
+# Lowest score accepted for the account password.
+MIN_ACCOUNT_SCORE = 2
+# Guesses per character nothing else explains.
+BRUTEFORCE_LOG10 = 1.0
+# Fewest guesses a pattern of several characters is worth.
+MIN_MATCH_GUESSES_LOG10 = math.log10(50)
+MIN_YEAR_SPACE = 20
+# Extra guesses for a word typed backwards.
+REVERSED_LOG10 = math.log10(2)
+
+# Most used passwords, most common first.
+COMMON_PASSWORDS = """
+123456 password 12345678 qwerty 123456789 12345 1234 111111 1234567 dragon
+123123 baseball abc123 football monkey letmein 696969 shadow master 666666
+qwertyuiop 123321 mustang 1234567890 michael 654321 superman 1qaz2wsx 7777777
+121212 000000 qazwsx 123qwe killer trustno1 jordan jennifer zxcvbnm asdfgh
+hunter buster soccer harley batman andrew tigger sunshine iloveyou 2000
+charlie robert thomas hockey ranger daniel starwars 112233 george computer
+michelle jessica pepper 1111 zxcvbn 555555 11111111 131313 freedom 777777 pass
+maggie 159753 aaaaaa ginger princess joshua cheese amanda summer love ashley
+nicole chelsea matthew access yankees 987654321 dallas austin thunder taylor
+matrix minecraft william corvette hello martin heather secret merlin diamond
+1234qwer hammer silver 222222 88888888 anthony justin test bailey q1w2e3r4t5
+patrick internet scooter orange 11111 golfer cookie richard samantha bigdog
+guitar jackson whatever mickey chicken sparky snoopy maverick phoenix camaro
+peanut morgan welcome falcon cowboy ferrari samsung andrea smokey steelers
+joseph mercedes dakota arsenal eagles melissa boomer booboo spider nascar
+monster tigers yellow xxxxxx 123123123 gateway marina diablo bulldog qwer1234
+compaq purple banana junior hannah 123654 porsche lakers iceman money cowboys
+987654 london tennis 999999 ncc1701 coffee scooby 0000 miller boston q1w2e3r4
+brandon yamaha chester mother forever johnny edward 333333 oliver redsox
+player nikita knight fender barney midnight please brandy chicago badboy
+slayer rangers charles angel flower bigdaddy rabbit wizard jasper enter
+rachel chris steven winner adidas victoria natasha 1q2w3e4r jasmine winter
+prince marine fishing cocacola casper james 232323 raiders 888888 marlboro
+gandalf asdfasdf crystal 87654321 12344321 golden 8675309 passw0rd admin
+administrator root changeme default welcome1 password1 password123 qwerty123
+letmein1 abcdef abcd1234 passify
+""".split()
+
+# The letter each l33t character usually stands for.
+L33T_TABLE = str.maketrans(
+    {
+        "4": "a",
+        "@": "a",
+        "8": "b",
+        "(": "c",
+        "3": "e",
+        "6": "g",
+        "1": "i",
+        "!": "i",
+        "|": "l",
+        "0": "o",
+        "$": "s",
+        "5": "s",
+        "7": "t",
+        "+": "t",
+        "2": "z",
+    }
+)
+
+# Keyboard rows with their shifted characters. The rows of letters are
+# slanted: every row starts half a key further right than the one above.
+QWERTY_ROWS = (
+    "`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) -_ =+",
+    "qQ wW eE rR tT yY uU iI oO pP [{ ]} \\|",
+    "aA sS dD fF gG hH jJ kK lL ;: '\"",
+    "zZ xX cC vV bB nN mM ,< .> /?",
+)
+# Number pad keys on a straight grid, blank where there is no key.
+KEYPAD_ROWS = (
+    " /*-",
+    "789+",
+    "456 ",
+    "123 ",
+    " 0. ",
+)
+
+WARNINGS = {
+    "common": "This is a very common password.",
+    "word": "A word by itself is easy to guess.",
+    "user_input": "Avoid using your name or email address.",
+    "spatial": "Patterns of neighbouring keys are easy to guess.",
+    "repeat": 'Repeats like "aaa" or "abcabc" are easy to guess.',
+    "sequence": "Sequences like abc or 6543 are easy to guess.",
+    "date": "Dates and years are easy to guess.",
+}
+
+Keyboard = namedtuple(
+    "Keyboard", ["positions", "neighbours", "shifted", "starts_log10", "degree"]
+)
+Tables = namedtuple(
+    "Tables",
+    ["ranks", "prefixes", "suffixes", "max_word_length", "keyboards", "this_year"],
+)
+
+
+def qwerty_positions():
+    positions = {}
+    shifted = set()
+    for row, keys in enumerate(QWERTY_ROWS):
+        # the first row of letters starts under the gap between 1 and 2
+        offset = 1 + row * 0.5 if row else 0
+        for column, key in enumerate(keys.split()):
+            for character in key:
+                positions[character] = (column + offset, row)
+            shifted.add(key[1])
+    return positions, shifted
+
+
+def keypad_positions():
+    positions = {}
+    for row, keys in enumerate(KEYPAD_ROWS):
+        for column, key in enumerate(keys):
+            if key != " ":
+                positions[key] = (column, row)
+    return positions, set()
+
+
+def keyboard(positions, shifted):
+    """Builds the graph of keys that touch each other."""
+    neighbours = {
+        key: {
+            other
+            for other, (other_x, other_y) in positions.items()
+            if abs(other_x - x) <= 1
+            and abs(other_y - y) <= 1
+            and (other_x, other_y) != (x, y)
+        }
+        for key, (x, y) in positions.items()
+    }
+    # a key and its shifted character are one starting position
+    starts = len(positions) - len(shifted)
+    degree = sum(map(len, neighbours.values())) / len(neighbours)
+    return Keyboard(positions, neighbours, shifted, math.log10(starts), degree)
+
+
+@lru_cache(maxsize=None)
+def get_tables():
+    """Returns the ranked dictionaries and keyboard graphs, built on first use."""
+    ranks = {}
+    for rank, password in enumerate(COMMON_PASSWORDS, 1):
+        ranks.setdefault(password, ("common", rank))
+    try:
+        from wordlist import get_wordlist
+
+        words = get_wordlist()
+    except (OSError, TypeError, ValueError):
+        words = ()
+    # the passphrase words are not ranked by frequency, any of them takes
+    # up to the size of the list to find
+    for index in range(len(words)):
+        ranks.setdefault(words[index], ("word", len(words)))
+    return Tables(
+        ranks,
+        frozenset(word[:end] for word in ranks for end in range(1, len(word) + 1)),
+        frozenset(word[start:] for word in ranks for start in range(len(word))),
+        max(map(len, ranks)),
+        (keyboard(*qwerty_positions()), keyboard(*keypad_positions())),
+        date.today().year,
+    )
+
+
+def log10_sum(values):
+    return math.log10(sum(values)) if values else 0.0
+
+
+def variations_log10(changed, unchanged):
+    """Guesses (log10) for which `changed` of the characters were changed."""
+    if not changed or not unchanged:
+        return math.log10(2) if changed else 0.0
+    return log10_sum(
+        [
+            math.comb(changed + unchanged, count)
+            for count in range(1, min(changed, unchanged) + 1)
+        ]
+    )
+
+
+def uppercase_log10(token):
+    if token.islower() or not any(character.isalpha() for character in token):
+        return 0.0
+    if token.isupper() or token[0].isupper() and token[1:].islower():
+        return math.log10(2)
+    upper = sum(character.isupper() for character in token)
+    lower = sum(character.islower() for character in token)
+    return variations_log10(upper, lower)
+
+
+def dictionary_match(prefix, start, end, found, variation_log10):
+    pattern, rank = found
+    guesses = math.log10(rank) + uppercase_log10(prefix[start:end])
+    return Match(pattern, start, end, guesses + variation_log10)
+
+
+def dictionary_matches(prefix, tables):
+    end = len(prefix)
+    first = max(0, end - tables.max_word_length)
+    # every token ends at `end`, so they are all suffixes of the same tail;
+    # tokens are grown to the left only while some word still ends with them
+    lower = prefix[first:].lower()
+    reversed_lower = lower[::-1]
+    translated = lower.translate(L33T_TABLE)
+    size = len(lower)
+    get = tables.ranks.get
+    for text, fragments, variation in (
+        (lower, tables.suffixes, 0.0),
+        (translated if translated != lower else "", tables.suffixes, None),
+    ):
+        for length in range(1, len(text) + 1):
+            token = text[size - length :]
+            if token not in fragments:
+                break
+            found = get(token) if length >= 3 else None
+            if found is None:
+                continue
+            if variation is None:
+                original = lower[size - length :]
+                if token == original:
+                    continue
+                substituted = sum(a != b for a, b in zip(original, token))
+                yield dictionary_match(
+                    prefix, end - length, end, found, substituted * math.log10(2)
+                )
+            else:
+                yield dictionary_match(prefix, end - length, end, found, variation)
+    # a word typed backwards, its reading grows to the right
+    for length in range(1, size + 1):
+        token = reversed_lower[:length]
+        if token not in tables.prefixes:
+            break
+        found = get(token) if length >= 3 else None
+        if found is not None:
+            yield dictionary_match(prefix, end - length, end, found, REVERSED_LOG10)
+
+
+def spatial_guesses_log10(length, turns, shifts, board):
+    guesses = 0.0
+    for pressed in range(2, length + 1):
+        for turn in range(1, min(turns, pressed - 1) + 1):
+            guesses += math.comb(pressed - 1, turn - 1) * board.degree**turn
+    return (
+        board.starts_log10
+        + math.log10(guesses)
+        + variations_log10(shifts, length - shifts)
+    )
+
+
+def spatial_matches(prefix, tables):
+    end = len(prefix)
+    for board in tables.keyboards:
+        start = end - 1
+        neighbours = board.neighbours
+        while start > 0 and prefix[start - 1] in neighbours.get(prefix[start], ()):
+            start -= 1
+        if end - start < 3:
+            continue
+        token = prefix[start:end]
+        points = [board.positions[character] for character in token]
+        directions = [
+            (x2 - x1, y2 - y1) for (x1, y1), (x2, y2) in zip(points, points[1:])
+        ]
+        turns = 1 + sum(a != b for a, b in zip(directions, directions[1:]))
+        shifts = sum(character in board.shifted for character in token)
+        guesses = spatial_guesses_log10(len(token), turns, shifts, board)
+        yield Match("spatial", start, end, guesses)
+
+
+def sequence_matches(prefix):
+    end = len(prefix)
+    if end < 3:
+        return
+    delta = ord(prefix[-1]) - ord(prefix[-2])
+    if not delta or abs(delta) > 5:
+        return
+    start = end - 2
+    while start > 0 and ord(prefix[start]) - ord(prefix[start - 1]) == delta:
+        start -= 1
+    if end - start < 3:
+        return
+    first = prefix[start]
+    if first in "aAzZ019":
+        base = 4
+    elif first.isdigit():
+        base = 10
+    else:
+        base = 26
+    yield Match(
+        "sequence",
+        start,
+        end,
+        math.log10(base * (end - start) * (1 if delta > 0 else 2)),
+    )
+
+
+def repeat_matches(prefix):
+    end = len(prefix)
+    # the shortest base that is repeated right before the end
+    for length in range(1, end // 2 + 1):
+        base = prefix[end - length :]
+        if prefix[end - 2 * length : end - length] == base:
+            break
+    else:
+        return
+    start = end - 2 * length
+    while start >= length and prefix[start - length : start] == base:
+        start -= length
+    if end - start < 3:
+        return
+    yield Match(
+        "repeat",
+        start,
+        end,
+        estimate_log10(base) + math.log10((end - start) // length),
+    )
+
+
+DATE_WITH_SEPARATOR = re.compile(r"(\d{1,4})([\s/\\_.-])(\d{1,2})\2(\d{1,4})$")
+DIGITS_AT_END = re.compile(r"\d{4,8}$")
+
+
+def plausible_year(year, this_year):
+    if year < 100:
+        year += 1900 if year > 50 else 2000
+    return year if 1000 <= year <= this_year + 50 else None
+
+
+def date_year(day_month_year, this_year):
+    """Returns the year of a (a, b, year) triple if a and b are a day and month."""
+    first, second, year = day_month_year
+    if not (1 <= first <= 31 and 1 <= second <= 31 and min(first, second) <= 12):
+        return None
+    return plausible_year(year, this_year)
+
+
+def date_candidates(digits):
+    # splits of the digits into a day, a month and a year, either way round
+    for year_length in (2, 4):
+        for first_length in (1, 2):
+            rest = len(digits) - year_length - first_length
+            if rest not in (1, 2):
+                continue
+            head, tail = digits[:-year_length], digits[-year_length:]
+            yield int(head[:first_length]), int(head[first_length:]), int(tail)
+            head, tail = digits[year_length:], digits[:year_length]
+            yield int(head[:first_length]), int(head[first_length:]), int(tail)
+
+
+def date_matches(prefix, tables):
+    end = len(prefix)
+    if not prefix[-1].isdigit():
+        return
+    this_year = tables.this_year
+
+    def guesses_log10(year, separator):
+        space = max(abs(year - this_year), MIN_YEAR_SPACE)
+        return math.log10(space * 365 * (4 if separator else 1))
+
+    found = DATE_WITH_SEPARATOR.search(prefix)
+    if found:
+        first, _, second, third = found.groups()
+        for triple in (
+            (int(second), int(third), int(first)),
+            (int(first), int(second), int(third)),
+        ):
+            year = date_year(triple, this_year)
+            if year:
+                yield Match("date", found.start(), end, guesses_log10(year, True))
+                break
+    found = DIGITS_AT_END.search(prefix)
+    if found:
+        digits = found.group()
+        for length in range(4, len(digits) + 1):
+            token = digits[-length:]
+            start = end - length
+            if length == 4 and token[:2] in ("19", "20"):
+                year = int(token)
+                yield Match(
+                    "date",
+                    start,
+                    end,
+                    math.log10(max(abs(year - this_year), MIN_YEAR_SPACE)),
+                )
+            for triple in date_candidates(token):
+                year = date_year(triple, this_year)
+                if year:
+                    yield Match("date", start, end, guesses_log10(year, False))
+                    break
+
+
+def find_matches_ending(prefix):
+    """Returns every match that ends with the last character of `prefix`."""
+    tables = get_tables()
+    return tuple(
+        match
+        if match.guesses_log10 >= MIN_MATCH_GUESSES_LOG10
+        else match._replace(guesses_log10=MIN_MATCH_GUESSES_LOG10)
+        for match in (
+            *dictionary_matches(prefix, tables),
+            *spatial_matches(prefix, tables),
+            *sequence_matches(prefix),
+            *repeat_matches(prefix),
+            *date_matches(prefix, tables),
+        )
+    )
+
+
+def user_input_matches(password, user_inputs):
+    lower = password.lower()
+    translated = lower.translate(L33T_TABLE)
+    for rank, user_input in enumerate(user_inputs, 1):
+        user_input = user_input.lower()
+        if len(user_input) < 3:
+            continue
+        for text in (lower, translated):
+            start = text.find(user_input)
+            while start != -1:
+                end = start + len(user_input)
+                yield Match(
+                    "user_input",
+                    start,
+                    end,
+                    max(
+                        math.log10(rank) + uppercase_log10(password[start:end]),
+                        MIN_MATCH_GUESSES_LOG10,
+                    ),
+                )
+                start = text.find(user_input, start + 1)
+
+
+def cheapest_cover(password, extra_matches=(), find_matches=find_matches_ending):
+    """Returns the guesses (log10) of the cheapest cover and its matches.
+
+    Args:
+        password (str): The password.
+        extra_matches (iterable): Matches found outside the memoized ones.
+        find_matches (callable): Returns the matches ending a prefix, e.g.
+            `Estimator.matches_ending` while a password is typed.
+    """
+    by_end = {}
+    for match in extra_matches:
+        by_end.setdefault(match.end, []).append(match)
+    best = [0.0] * (len(password) + 1)
+    chosen = [None] * (len(password) + 1)
+    for end in range(1, len(password) + 1):
+        best[end] = best[end - 1] + BRUTEFORCE_LOG10
+        for match in (*find_matches(password[:end]), *by_end.get(end, ())):
+            guesses = best[match.start] + match.guesses_log10
+            if guesses < best[end]:
+                best[end] = guesses
+                chosen[end] = match
+    matches = []
+    end = len(password)
+    while end > 0:
+        if chosen[end] is None:
+            end -= 1
+        else:
+            matches.append(chosen[end])
+            end = chosen[end].start
+    return best[-1], matches[::-1]
+
+
+def estimate_log10(password):
+    return cheapest_cover(password)[0]
+
+
+def rate(guesses_log10, matches):
+    """Turns a cheapest cover into a `Strength`."""
+    score = sum(guesses_log10 > threshold for threshold in SCORE_THRESHOLDS)
+    warning = ""
+    if score <= MIN_ACCOUNT_SCORE and matches:
+        longest = max(matches, key=lambda match: match.end - match.start)
+        warning = WARNINGS[longest.pattern]
+    return Strength(score, guesses_log10, warning)
+
+
+def estimate(password, user_inputs=(), find_matches=find_matches_ending):
+    """Estimates how hard a password is to guess.
+
+    Args:
+        password (str): The password.
+        user_inputs (tuple): Names, email addresses and the like an attacker
+            would try first for this user.
+        find_matches (callable): See `cheapest_cover`.
+
+    Returns:
+        Strength: Score from 0 (very weak) to 4 (very strong), the estimated
+            number of guesses as a power of ten and a warning, empty unless
+            the password is weak.
+    """
+    if not password:
+        return Strength(0, 0.0, "")
+    return rate(
+        *cheapest_cover(
+            password, tuple(user_input_matches(password, user_inputs)), find_matches
+        )
+    )
+
+
+def estimate_many(passwords):
+    """Estimates a batch of unrelated passwords, e.g. for a vault audit.
+
+    The prefixes of stored passwords are rarely shared, so nothing is
+    memoized.
+
+    Returns:
+        list: The `Strength` of each password, in order.
+    """
+    return [
+        rate(*cheapest_cover(password))
+        if password
+        else Strength(0, 0.0, "")
+        for password in passwords
+    ]
+
+
+class Estimator:
+    """Estimates one password field's text on every keystroke.
+
+    The matches ending each prefix typed so far are memoized, so a keystroke
+    only costs the matches ending at the new character. The memo holds the
+    typed password, keep one per field and `clear` it with the field.
+    """
+
+    # Prefixes memoized before the memo starts over.
+    MAX_PREFIXES = 4096
+
+    def __init__(self):
+        self.memo = {}
+
+    def matches_ending(self, prefix):
+        matches = self.memo.get(prefix)
+        if matches is None:
+            if len(self.memo) >= self.MAX_PREFIXES:
+                self.memo.clear()
+            matches = self.memo[prefix] = find_matches_ending(prefix)
+        return matches
+
+    def estimate(self, password, user_inputs=()):
+        """See `estimate`."""
+        return estimate(password, user_inputs, self.matches_ending)
+
+    def clear(self):
+        self.memo.clear()
@@ -0,0 +1,216 @@
+from collections import namedtuple
+
+import telemetry
+from utils import auth_get_request, auth_patch_request, auth_post_request
+from vault_crypto import (
+    ENCRYPTED_FIELDS,
+    SEALED_FIELDS,
+    DecryptionError,
+    is_bound,
+    require_cipher,
+)
+from workers import run_concurrently
+
+# A fetched page of entries, decrypted but for their `SEALED_FIELDS`.
+# `entries` is None unless the response is a 200. `failed` holds the ids of
+# the entries that could not be decrypted, they are left encrypted.
+# `unbound` counts the entries whose fields are not bound to them yet, see
+# `rekey_vault`.
+Page = namedtuple(
+    "Page", ["response", "entries", "next_page", "count", "failed", "unbound"]
+)
+
+
+def read_page(data):
+    """Splits a response of the database endpoint into entries and next page.
+
+    The endpoint either returns every entry as one list or, when the server
+    paginates (page number, limit/offset or cursor pagination), an object
+    holding one page of entries in `results` and the url of the next one in
+    `next`.
+
+    Returns:
+        tuple: (entries, url of the next page or None, total count or None)
+    """
+    if isinstance(data, list):
+        return data, None, len(data)
+    return data.get("results") or [], data.get("next"), data.get("count")
+
+
+def decrypt_page(response):
+    """Reads and decrypts a response of the database endpoint.
+
+    Runs on the background worker that fetched it, so a large vault is not
+    decrypted in the GUI thread.
+
+    Returns: Page
+    """
+    if response.status_code != 200:
+        return Page(response, None, None, None, [], 0)
+    entries, next_page, count = read_page(response.json())
+    unbound = sum(1 for entry in entries if not is_bound(entry))
+    # one unreadable entry must not hide the rest of the vault
+    failed = []
+    entries = require_cipher().decrypt_entries(entries, SEALED_FIELDS, failed)
+    return Page(response, entries, next_page, count, failed, unbound)
+
+
+def create_entry(endpoint, entry, post=auth_post_request):
+    """Creates an entry and binds its encrypted fields to it.
+
+    The server gives the entry its id, so the fields are sent bound to their
+    names only and sent again bound to the entry once it exists. If that
+    second request fails the entry is readable all the same, its fields are
+    bound the next time the vault is encrypted again, see `rekey_vault`.
+
+    Args:
+        endpoint (str): The database endpoint.
+        entry (dict): Fields of the new entry, in plain text.
+        post (callable): Sends the creation, e.g. with retries.
+
+    Returns:
+        requests.Response: The 200 of the update once the fields are bound,
+        otherwise the response of the creation.
+    """
+    import requests
+
+    cipher = require_cipher()
+    response = post(endpoint, cipher.encrypt_entry(entry))
+    if response.status_code != 201:
+        return response
+    id_url = response.json().get("id")
+    if not id_url:
+        return response
+    fields = {
+        name: cipher.encrypt_field(name, entry[name], id_url)
+        for name in ENCRYPTED_FIELDS
+        if entry.get(name)
+    }
+    if not fields:
+        return response
+    try:
+        bound = auth_patch_request(id_url, fields)
+    except requests.RequestException:
+        return response
+    return bound if bound.status_code == 200 else response
+
+
+class VaultSync:
+    """Revalidates the saved passwords with conditional requests.
+
+    The validators (`ETag` and `Last-Modified`) of the last full response are
+    sent back with the next fetch, so an unchanged vault is answered with a
+    bodyless 304 instead of the whole list. A paginated vault is not
+    revalidated this way, see `remember`.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.etag = None
+        self.last_modified = None
+
+    def fetch(self):
+        """Requests the entries list. Runs on a background worker.
+
+        Returns: Page
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        with telemetry.timed(telemetry.PHASE_SECONDS, "reload.fetch"):
+            response = auth_get_request(self.endpoint, headers=headers)
+        with telemetry.timed(telemetry.PHASE_SECONDS, "reload.parse"):
+            return decrypt_page(response)
+
+    def fetch_page(self, url):
+        """Requests a further page of entries. Runs on a background worker.
+
+        Returns: Page
+        """
+        with telemetry.timed(telemetry.PHASE_SECONDS, "page.fetch"):
+            response = auth_get_request(url)
+        with telemetry.timed(telemetry.PHASE_SECONDS, "page.parse"):
+            return decrypt_page(response)
+
+    def remember(self, page):
+        """Keeps the validators of a 200 response for the next fetch.
+
+        The validators of a paginated list only cover its first page, a 304
+        would leave the other pages unchecked. They are only kept when the
+        response holds the whole vault, otherwise every fetch downloads it.
+        """
+        if page.next_page is not None:
+            self.invalidate()
+            return
+        self.etag = page.response.headers.get("ETag")
+        self.last_modified = page.response.headers.get("Last-Modified")
+
+    def invalidate(self):
+        """Forgets the validators so the next fetch downloads the full list."""
+        self.etag = None
+        self.last_modified = None
+
+
+def rekey_vault(endpoint, workers, progress=None):
+    """Encrypts the vault again with the current key after the account
+    password or email changed, binding the fields to their entries.
+
+    Entries still encrypted with the previous key or not bound to their
+    entry are decrypted and saved again. Entries already done are skipped,
+    so an interrupted run is finished by the next one. Entries no key of the
+    session can decrypt are left alone, the table already reports them.
+
+    Args:
+        endpoint (str): The database endpoint.
+        workers (int): Number of concurrent requests.
+        progress (callable): Called with (done, total) after every request.
+
+    Returns:
+        list: (id_url, error message) of the entries that could not be saved.
+    """
+    from utils import get_error_message
+
+    cipher = require_cipher()
+    entries = []
+    url = endpoint
+    while url:
+        response = auth_get_request(url)
+        if response.status_code != 200:
+            return [(url, f"Error {response.status_code}")]
+        page, url, _ = read_page(response.json())
+        entries.extend(entry for entry in page if not cipher.is_current(entry))
+
+    def save(entry):
+        try:
+            fields = {
+                name: cipher.decrypt_field(name, entry.get(name) or "", entry["id"])
+                for name in ENCRYPTED_FIELDS
+            }
+        except DecryptionError:
+            return None  # left out, see above
+        return auth_patch_request(
+            entry["id"], cipher.encrypt_entry(fields, entry["id"])
+        )
+
+    errors = []
+    done = 0
+    for entry, response, error in run_concurrently(
+        save,
+        entries,
+        workers,
+    ):
+        done += 1
+        if error is not None:
+            errors.append((entry["id"], str(error)))
+        elif response is not None and response.status_code != 200:
+            errors.append(
+                (
+                    entry["id"],
+                    f"Error {response.status_code}: {get_error_message(response)}",
+                )
+            )
+        if progress:
+            progress(done, len(entries))
+    return errors
@@ -0,0 +1,251 @@
+"""Client side latency telemetry behind `python src/main.py --telemetry`.
+
+Records how long requests take, per endpoint, and how long the UI phases
+take (fetching, parsing and rendering the vault, searching, building the
+dialogs) in histograms from which the 50th, 95th and 99th percentiles are
+read. The numbers stay on the machine: they are shown in the diagnostics
+panel (Ctrl+Shift+D in the main window) and saved to a file from there.
+
+When telemetry is off every call returns at once, `timed` hands out one
+shared no-op context and `start` returns None, so the instrumented code
+pays for a function call and nothing else.
+
+Histograms use buckets that grow by `BUCKET_GROWTH`, so their memory does
+not depend on the number of samples and a percentile is read to within
+5% of the sampled value.
+"""
+
+import json
+import math
+import re
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from urllib.parse import urlsplit
+
+FLAG = "--telemetry"
+# Ratio between the upper bounds of two consecutive histogram buckets.
+BUCKET_GROWTH = 1.1
+# Upper bound of the first bucket, in seconds.
+MIN_SECONDS = 1e-6
+QUANTILES = (0.5, 0.95, 0.99)
+# Prefix of the metric names in the Prometheus text format.
+PROMETHEUS_PREFIX = "passify_"
+
+# Metric names, each has one histogram or counter per name label.
+REQUEST_SECONDS = "request_seconds"  # per "METHOD /path/"
+PHASE_SECONDS = "phase_seconds"  # per UI phase, e.g. "reload.render"
+REQUEST_ERRORS = "request_errors"  # per HTTP status code
+
+# Path segments that identify one entry or user, folded into one endpoint.
+ID_SEGMENT = re.compile(r"^(\d+|[0-9a-fA-F-]{32,36})$")
+
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}  # (metric, name) -> Histogram
+_counters = {}  # (metric, name) -> int
+_no_op = nullcontext()
+
+
+class Histogram:
+    """Counts samples in exponentially growing buckets."""
+
+    def __init__(self):
+        self.buckets = {}  # bucket index -> samples
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        index = bucket_index(seconds)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        """Returns the middle of the bucket holding the `q` quantile, 0 if
+        there are no samples."""
+        rank = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                middle = bucket_upper_bound(index) / math.sqrt(BUCKET_GROWTH)
+                return min(middle, self.max)
+        return self.max
+
+    def cumulative_buckets(self):
+        """Yields (upper bound, samples up to it) of the non-empty buckets."""
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            yield bucket_upper_bound(index), seen
+
+
+def bucket_index(seconds):
+    if seconds <= MIN_SECONDS:
+        return 0
+    return math.ceil(math.log(seconds / MIN_SECONDS, BUCKET_GROWTH))
+
+
+def bucket_upper_bound(index):
+    return MIN_SECONDS * BUCKET_GROWTH**index
+
+
+def start_if_requested(argv):
+    """Turns telemetry on if `FLAG` is in `argv` and removes it from there."""
+    if FLAG in argv:
+        argv.remove(FLAG)
+        enable()
+
+
+def enable(enabled=True):
+    global _enabled
+    _enabled = enabled
+
+
+def enabled():
+    return _enabled
+
+
+def observe(metric, name, seconds):
+    """Adds a duration to the histogram of `metric` for `name`."""
+    if not _enabled:
+        return
+    with _lock:
+        histogram = _histograms.get((metric, name))
+        if histogram is None:
+            histogram = _histograms[(metric, name)] = Histogram()
+        histogram.observe(seconds)
+
+
+def count(metric, name, increment=1):
+    """Adds to the counter of `metric` for `name`."""
+    if not _enabled:
+        return
+    with _lock:
+        _counters[(metric, name)] = _counters.get((metric, name), 0) + increment
+
+
+def start():
+    """Returns the time a measured span starts, None when telemetry is off.
+
+    For spans that start and end in different callbacks, see `stop`.
+    """
+    return time.perf_counter() if _enabled else None
+
+
+def stop(metric, name, started):
+    """Records the span that began at `started`, see `start`."""
+    if started is not None:
+        observe(metric, name, time.perf_counter() - started)
+
+
+def timed(metric, name):
+    """Returns a context manager recording how long its block takes.
+
+    Args:
+        metric (str): E.g. `PHASE_SECONDS`.
+        name (str): What is measured, e.g. "reload.render".
+    """
+    if not _enabled:
+        return _no_op
+    return _timed(metric, name)
+
+
+@contextmanager
+def _timed(metric, name):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(metric, name, time.perf_counter() - started)
+
+
+def endpoint_name(method, url):
+    """Returns the name a request is recorded under, its method and path
+    with the ids replaced by "{id}", so every entry shares one endpoint."""
+    segments = urlsplit(url).path.split("/")
+    path = "/".join("{id}" if ID_SEGMENT.match(part) else part for part in segments)
+    return f"{method} {path}"
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """Returns the metrics recorded so far.
+
+    Returns:
+        dict: "histograms", a list of dicts with the metric, the name, the
+            count and the sum, maximum and percentiles in seconds, and
+            "counters", a list of dicts with the metric, the name and the
+            value. Both are sorted by metric and name.
+    """
+    with _lock:
+        histograms = [
+            {
+                "metric": metric,
+                "name": name,
+                "count": histogram.count,
+                "sum": histogram.sum,
+                "max": histogram.max,
+                **{f"p{round(q * 100)}": histogram.quantile(q) for q in QUANTILES},
+            }
+            for (metric, name), histogram in sorted(_histograms.items())
+        ]
+        counters = [
+            {"metric": metric, "name": name, "value": value}
+            for (metric, name), value in sorted(_counters.items())
+        ]
+    return {"histograms": histograms, "counters": counters}
+
+
+def to_json():
+    return json.dumps(snapshot(), indent=4)
+
+
+def to_prometheus():
+    """Returns the metrics in the Prometheus text exposition format."""
+    with _lock:
+        histograms = {
+            key: (list(histogram.cumulative_buckets()), histogram.count, histogram.sum)
+            for key, histogram in sorted(_histograms.items())
+        }
+        counters = dict(sorted(_counters.items()))
+    lines = []
+    typed = set()
+    for (metric, name), (buckets, samples, total) in histograms.items():
+        full_name = PROMETHEUS_PREFIX + metric
+        if full_name not in typed:
+            typed.add(full_name)
+            lines.append(f"# TYPE {full_name} histogram")
+        label = f'name="{escape_label(name)}"'
+        for upper_bound, seen in buckets:
+            lines.append(f'{full_name}_bucket{{{label},le="{upper_bound:.6g}"}} {seen}')
+        lines.append(f'{full_name}_bucket{{{label},le="+Inf"}} {samples}')
+        lines.append(f"{full_name}_sum{{{label}}} {total:.9g}")
+        lines.append(f"{full_name}_count{{{label}}} {samples}")
+    for (metric, name), value in counters.items():
+        full_name = f"{PROMETHEUS_PREFIX}{metric}_total"
+        if full_name not in typed:
+            typed.add(full_name)
+            lines.append(f"# TYPE {full_name} counter")
+        lines.append(f'{full_name}{{name="{escape_label(name)}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+
+def escape_label(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def dump(path):
+    """Saves the metrics to a file, in the Prometheus text format if its
+    extension is .prom or .txt and as JSON otherwise."""
+    text = to_prometheus() if path.endswith((".prom", ".txt")) else to_json()
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(text)
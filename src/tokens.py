@@ -0,0 +1,130 @@
+import base64
+import json
+import threading
+import time
+
+from PyQt5.QtCore import QObject, QSettings, QTimer
+
+from utils import get_session, post_request, set_access_token
+from workers import get_executor
+
+settings = QSettings("Passify", "Passify")
+
+# Seconds before expiry at which the access token is renewed.
+REFRESH_MARGIN = 60
+# Seconds to wait before trying again after a failed renewal.
+RETRY_INTERVAL = 30
+# Longest single timer interval, Qt timers are limited to 32-bit milliseconds.
+MAX_TIMER_INTERVAL = 24 * 60 * 60
+
+# Held while a refresh request is in flight, see `refresh_access_token`.
+_refresh_lock = threading.Lock()
+
+
+def token_expiry(access_token):
+    """Returns the `exp` claim of a JWT as a timestamp, or `None`.
+
+    The signature is not checked, the server does that; the claim is only
+    used to renew the token in time.
+    """
+    try:
+        payload = access_token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (AttributeError, IndexError, KeyError, TypeError, ValueError):
+        return None
+
+
+def refresh_access_token(stale_authorization=None):
+    """Gets a new access token with the refresh token. Blocks, run it on a worker.
+
+    Concurrent callers share a single request: they queue on a lock and the
+    ones that were holding the same stale token as the first caller find it
+    already replaced when their turn comes, so they return without sending
+    anything.
+
+    Args:
+        stale_authorization (str): The Authorization header the caller used.
+            Nothing is sent if the session has moved on from it already.
+
+    Returns:
+        bool: True if the session holds a fresh access token.
+    """
+    with _refresh_lock:
+        session = get_session()
+        if (
+            stale_authorization is not None
+            and session.headers.get("Authorization") != stale_authorization
+        ):
+            return True
+        refresh_token = settings.value("REFRESH_TOKEN")
+        if not refresh_token:
+            return False
+        response = post_request(
+            settings.value("REFRESH_TOKEN_ENDPOINT"),
+            {"refresh": refresh_token},
+        )
+        if response.status_code != 200:
+            return False
+        try:
+            tokens = response.json()
+        except ValueError:
+            return False
+        # a reply without a token leaves the current one, retrying with no
+        # token at all could only fail again
+        if not isinstance(tokens, dict) or not tokens.get("access"):
+            return False
+        set_access_token(tokens["access"])
+        if tokens.get("refresh"):  # the server rotates refresh tokens
+            from vault_crypto import wrap_vault_key
+
+            settings.setValue("REFRESH_TOKEN", tokens["refresh"])
+            wrap_vault_key(tokens["refresh"])
+        return True
+
+
+class TokenRefresher(QObject):
+    """Renews the access token in the background shortly before it expires.
+
+    Requests that still get a 401 are retried once by the request helpers in
+    `utils` after a refresh, this only saves them the failed round trip.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.schedule)
+        self.task = None
+
+    def schedule(self):
+        """Starts the timer for the current token, refreshing it if it is due."""
+        expiry = token_expiry(settings.value("ACCESS_TOKEN"))
+        if expiry is None or self.task:
+            return
+        delay = expiry - REFRESH_MARGIN - time.time()
+        if delay > 0:
+            self.timer.start(int(min(delay, MAX_TIMER_INTERVAL) * 1000))
+            return
+        self.task = get_executor().submit(
+            refresh_access_token,
+            get_session().headers.get("Authorization"),
+        )
+        self.task.succeeded.connect(self.on_refreshed)
+        self.task.failed.connect(lambda error: self.on_refreshed(False))
+
+    def on_refreshed(self, refreshed):
+        self.task = None
+        expiry = token_expiry(settings.value("ACCESS_TOKEN"))
+        if refreshed:
+            self.schedule()
+        elif expiry and time.time() < expiry:
+            # try again while the current token still works, after that the
+            # next request's 401 takes over
+            self.timer.start(RETRY_INTERVAL * 1000)
+
+    def stop(self):
+        self.timer.stop()
+        if self.task:
+            self.task.cancel()
+            self.task = None
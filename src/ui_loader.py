@@ -0,0 +1,117 @@
+"""Builds the windows from their Qt Designer forms.
+
+Parsing a .ui file with `PyQt5.uic.loadUi` every time a window opens is slow,
+so the forms are compiled to Python modules once and kept in `ui/compiled`.
+Outside a frozen build a module older than its .ui file is compiled again on
+first use, so edits made in Designer show up without a manual step.
+
+Run this module to compile every form ahead of time, e.g. before a build:
+
+    python src/ui_loader.py
+"""
+
+import importlib.util
+import os
+import sys
+
+from PyQt5.QtCore import QSettings
+
+settings = QSettings("Passify", "Passify")
+
+COMPILED_DIRECTORY_NAME = "compiled"
+
+# compiled path -> form class, so every form module is executed only once
+_form_classes = {}
+
+
+def get_compiled_path(ui_file):
+    directory, file_name = os.path.split(ui_file)
+    return os.path.join(
+        directory,
+        COMPILED_DIRECTORY_NAME,
+        f"ui_{os.path.splitext(file_name)[0]}.py",
+    )
+
+
+def is_stale(ui_file, compiled_path):
+    try:
+        return os.path.getmtime(compiled_path) < os.path.getmtime(ui_file)
+    except OSError:
+        return True
+
+
+def compile_ui(ui_file, compiled_path):
+    """Compiles a .ui file to a Python module.
+
+    The module is written under a temporary name and moved in place, so an
+    interrupted compile never leaves a broken module behind.
+    """
+    from PyQt5.uic import compileUi
+
+    os.makedirs(os.path.dirname(compiled_path), exist_ok=True)
+    temp_path = f"{compiled_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as file:
+        compileUi(ui_file, file)
+    os.replace(temp_path, compiled_path)
+
+
+def get_form_class(compiled_path):
+    form_class = _form_classes.get(compiled_path)
+    if form_class is None:
+        name = os.path.splitext(os.path.basename(compiled_path))[0]
+        spec = importlib.util.spec_from_file_location(name, compiled_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        form_class = next(
+            value for key, value in vars(module).items() if key.startswith("Ui_")
+        )
+        _form_classes[compiled_path] = form_class
+    return form_class
+
+
+def load_ui(ui_file_name, widget):
+    """Sets up `widget` from a form, like `PyQt5.uic.loadUi(ui_file, widget)`.
+
+    The child widgets of the form become attributes of `widget`.
+
+    Args:
+        ui_file_name (str): Name of the form in the UI directory.
+        widget (QWidget): The window to set up.
+
+    Returns:
+        QWidget: `widget`, for the `self.ui = load_ui(...)` idiom.
+    """
+    ui_file = os.path.join(settings.value("UI_DIRECTORY"), ui_file_name)
+    compiled_path = get_compiled_path(ui_file)
+    if compiled_path not in _form_classes and not getattr(sys, "frozen", False):
+        if is_stale(ui_file, compiled_path):
+            try:
+                compile_ui(ui_file, compiled_path)
+            except OSError:
+                pass  # read-only install, fall back to parsing the form
+    if not os.path.exists(compiled_path):
+        from PyQt5.uic import loadUi
+
+        return loadUi(ui_file, widget)
+    form = get_form_class(compiled_path)()
+    form.setupUi(widget)
+    for name, child in vars(form).items():
+        setattr(widget, name, child)
+    return widget
+
+
+def compile_all(ui_directory):
+    """Compiles every form in the directory. Returns the compiled paths."""
+    compiled = []
+    for file_name in sorted(os.listdir(ui_directory)):
+        if file_name.endswith(".ui"):
+            ui_file = os.path.join(ui_directory, file_name)
+            compiled_path = get_compiled_path(ui_file)
+            compile_ui(ui_file, compiled_path)
+            compiled.append(compiled_path)
+    return compiled
+
+
+if __name__ == "__main__":
+    for path in compile_all(os.path.join(os.path.dirname(__file__), "..", "ui")):
+        print(f"Compiled {os.path.normpath(path)}")
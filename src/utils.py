@@ -1,11 +1,68 @@
 import platform
 import re
 
-import requests
 from PyQt5.QtCore import QSettings
 
+from workers import run_concurrently
+
 settings = QSettings("Passify", "Passify")
 
+_session = None
+
+
+def get_user_agent():
+    os_details = f"{platform.system()} {platform.release()}"
+    return f"{settings.value('PROJECT_NAME')} Desktop/1.0 ({os_details})"
+    # return "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Passify-Desktop/125.0"
+
+
+def get_session():
+    """Returns the HTTP session shared by all the request helpers.
+
+    The session keeps connections to the backend alive between requests and
+    carries the default headers, including the JWT Authorization header, so
+    they are not rebuilt for every call.
+    """
+    global _session
+    if _session is None:
+        # requests is slow to import, it is loaded with the first request
+        # instead of delaying the first window
+        import requests
+
+        from http_adapter import TimeoutHTTPAdapter
+
+        session = requests.Session()
+        adapter = TimeoutHTTPAdapter(
+            pool_connections=1,
+            # one connection for every request that may run at the same time
+            pool_maxsize=max(
+                int(settings.value("MAX_IN_FLIGHT_REQUESTS", 4)),
+                int(settings.value("BULK_WORKERS", 8)),
+            ),
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers["User-Agent"] = get_user_agent()
+        access_token = settings.value("ACCESS_TOKEN")
+        if access_token:
+            session.headers["Authorization"] = f"JWT {access_token}"
+        _session = session
+    return _session
+
+
+def set_access_token(access_token):
+    """Stores the access token and updates the session's Authorization header.
+
+    Passing `None` signs the session out.
+    """
+    session = get_session()
+    if access_token:
+        settings.setValue("ACCESS_TOKEN", access_token)
+        session.headers["Authorization"] = f"JWT {access_token}"
+    else:
+        settings.remove("ACCESS_TOKEN")
+        session.headers.pop("Authorization", None)
+
 
 def is_valid_email(email_address):
     pattern = r"^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$"
@@ -14,9 +71,46 @@ def is_valid_email(email_address):
     return False
 
 
+def validate_password_strength(password, user_inputs=()):
+    """Checks that an account password is not too easy to guess.
+
+    Args:
+        password (str): The new password.
+        user_inputs (tuple): The user's names and email address.
+
+    Raises: Exception: If the password scores below `MIN_ACCOUNT_SCORE`.
+    """
+    from strength import MIN_ACCOUNT_SCORE, estimate
+
+    strength = estimate(password, tuple(user_inputs))
+    if strength.score < MIN_ACCOUNT_SCORE:
+        raise Exception(f"The password is too easy to guess. {strength.warning}")
+
+
+def validate_entry(entry: dict) -> dict:
+    """Checks an entry before it is sent to the server.
+
+    Args: entry (dict): Entry fields, missing optional fields are allowed.
+
+    Returns: dict: The fields expected by the database endpoint.
+
+    Raises: Exception: If a required field is empty.
+    """
+    if not (entry.get("title") and entry.get("username") and entry.get("password")):
+        raise Exception("Please fill in all the required fields.")
+    return {
+        "title": entry["title"],
+        "username": entry["username"],
+        "password": entry["password"],
+        "url": entry.get("url") or "",
+        "notes": entry.get("notes") or "",
+    }
+
+
 def get_error_message(response):
-    print(response)
-    print(response.text)
+    import telemetry
+
+    telemetry.count(telemetry.REQUEST_ERRORS, str(response.status_code))
     try:
         error_messages = []
         for v in response.json().values():
@@ -26,77 +120,113 @@ def get_error_message(response):
                 for vv in v:
                     error_messages.append(vv)
         return "\n".join(error_messages)
-    except Exception as e:
-        print(e)
+    except Exception:
         return response.text
 
 
+def auth_request(method, endpoint, **kwargs):
+    """Sends an authenticated request.
+
+    A request rejected with a 401 because the access token expired is sent
+    again once after the token has been refreshed.
+    """
+    from tokens import refresh_access_token
+
+    session = get_session()
+    authorization = session.headers.get("Authorization")
+    response = session.request(method, endpoint, **kwargs)
+    if (
+        response.status_code == 401
+        and authorization
+        and refresh_access_token(authorization)
+    ):
+        response = session.request(method, endpoint, **kwargs)
+    return response
+
+
 def auth_put_request(endpoint, data: dict):
-    response = requests.put(
+    response = auth_request(
+        "PUT",
         endpoint,
         json=data,
-        headers={
-            "Authorization": f"JWT {settings.value('ACCESS_TOKEN')}",
-        },
     )
     return response
 
 
 def auth_patch_request(endpoint, data: dict):
-    response = requests.patch(
+    response = auth_request(
+        "PATCH",
         endpoint,
         json=data,
-        headers={
-            "Authorization": f"JWT {settings.value('ACCESS_TOKEN')}",
-        },
     )
     return response
 
 
 def auth_post_request(endpoint, data: dict):
-    response = requests.post(
+    response = auth_request(
+        "POST",
         endpoint,
         json=data,
-        headers={
-            "Authorization": f"JWT {settings.value('ACCESS_TOKEN')}",
-        },
     )
     return response
 
 
-def auth_get_request(endpoint):
-    response = requests.get(
+def auth_get_request(endpoint, headers: dict = None):
+    response = auth_request(
+        "GET",
         endpoint,
-        headers={
-            "Authorization": f"JWT {settings.value('ACCESS_TOKEN')}",
-        },
+        headers=headers,
     )
     return response
 
 
 def auth_delete_request(endpoint, data: dict):
-    response = requests.delete(
+    response = auth_request(
+        "DELETE",
         endpoint,
         json=data,
-        headers={
-            "Authorization": f"JWT {settings.value('ACCESS_TOKEN')}",
-        },
     )
     return response
 
 
-def post_request(endpoint, data: dict):
-    os_details = f"{platform.system()} {platform.release()}"
-    user_agent = f"{settings.value('PROJECT_NAME')} Desktop/1.0 ({os_details})"
-    # user_agent = f"Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:125.0) Gecko/20100101 Passify-Desktop/125.0"
+def delete_entries(id_urls, workers, progress=None, cancel_event=None):
+    """Deletes several entries, sending up to `workers` requests at once.
+
+    Args:
+        id_urls (list): Ids of the entries to delete.
+        workers (int): Number of concurrent requests.
+        progress (callable): Called with (done, total) after every request.
+        cancel_event (threading.Event): Stops sending requests once set.
+
+    Returns:
+        tuple: The ids that are gone from the server and a list of
+        (id_url, error message) for the ones that could not be deleted.
+    """
+    deleted, errors = [], []
+    for id_url, response, error in run_concurrently(
+        lambda id_url: auth_delete_request(id_url, {}),
+        id_urls,
+        workers,
+        cancel_event,
+    ):
+        if error is not None:
+            errors.append((id_url, str(error)))
+        elif response.status_code in (204, 404):  # 404: deleted elsewhere
+            deleted.append(id_url)
+        else:
+            errors.append(
+                (id_url, f"Error {response.status_code}: {get_error_message(response)}")
+            )
+        if progress:
+            progress(len(deleted) + len(errors), len(id_urls))
+    return deleted, errors
 
-    headers = {
-        "User-Agent": user_agent,
-    }
 
-    response = requests.post(
+def post_request(endpoint, data: dict):
+    response = get_session().post(
         endpoint,
         json=data,
-        headers=headers,
+        # unauthenticated endpoints must not receive the session's token
+        headers={"Authorization": None},
     )
     return response
@@ -0,0 +1,117 @@
+import json
+import mmap
+import os
+
+from PyQt5.QtCore import QSettings, QStandardPaths
+
+settings = QSettings("Passify", "Passify")
+
+CACHE_FILE_NAME = "vault.cache"
+# file layout: MAGIC | 12 byte nonce | AES-GCM ciphertext of the entries json
+MAGIC = b"PVC1"
+NONCE_SIZE = 12
+# HKDF info of the cache key, see `vault_crypto.derive_subkey`.
+CACHE_KEY_INFO = b"passify vault cache"
+
+
+def get_cache_path():
+    return os.path.join(
+        QStandardPaths.writableLocation(QStandardPaths.GenericDataLocation),
+        settings.value("PROJECT_NAME") or "Passify",
+        CACHE_FILE_NAME,
+    )
+
+
+def get_cache_key():
+    """Returns the key that encrypts the vault cache, None before sign in.
+
+    It is derived from the vault key, so no key of its own is stored. A saved
+    session unwraps the vault key at launch, see `vault_crypto.resume_vault`,
+    so the cache is shown before the server answers, and the same account
+    reads it again after signing out and in.
+    """
+    from vault_crypto import derive_subkey, get_cipher
+
+    cipher = get_cipher()
+    if cipher is None:
+        return None
+    return derive_subkey(cipher.key, CACHE_KEY_INFO)
+
+
+def save_cache(entries, key):
+    """Encrypts the entries and writes them to the cache file.
+
+    The file is written next to the old one and swapped in, so a crash never
+    leaves a half written cache behind.
+    """
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    path = get_cache_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    nonce = os.urandom(NONCE_SIZE)
+    ciphertext = AESGCM(key).encrypt(
+        nonce,
+        json.dumps(entries, separators=(",", ":")).encode(),
+        MAGIC,
+    )
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(nonce)
+        file.write(ciphertext)
+    os.replace(temp_path, path)
+
+
+def load_cache(key):
+    """Returns the cached entries, or `None` if there is no usable cache.
+
+    The file is memory-mapped so it is paged in straight from the OS cache
+    instead of being copied through a read buffer first.
+    """
+    # cryptography is slow to import, only pay for it when there is a cache
+    from cryptography.exceptions import InvalidTag
+    from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+    path = get_cache_path()
+    header_size = len(MAGIC) + NONCE_SIZE
+    try:
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size <= header_size:
+                return None
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[: len(MAGIC)] != MAGIC:
+                    return None
+                plaintext = AESGCM(key).decrypt(
+                    data[len(MAGIC) : header_size],
+                    data[header_size:],
+                    MAGIC,
+                )
+    except (OSError, InvalidTag):
+        return None
+    return json.loads(plaintext)
+
+
+def claim_cache(email):
+    """Deletes the cache of another account before `email` signs in.
+
+    Args:
+        email (str): The email of the account signing in.
+    """
+    owner = settings.value("CACHE_EMAIL")
+    if owner and owner.lower() != email.lower():
+        clear_cache()
+    set_cache_owner(email)
+
+
+def set_cache_owner(email):
+    settings.setValue("CACHE_EMAIL", email)
+
+
+def clear_cache():
+    # earlier versions kept a cache key in the settings
+    settings.remove("CACHE_KEY")
+    settings.remove("CACHE_EMAIL")
+    try:
+        os.remove(get_cache_path())
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,456 @@
+"""Client side encryption of the entry fields the server must not read.
+
+The password and the notes of an entry are encrypted before they are sent and
+decrypted after they are received, so the server only ever stores
+ciphertext. The account password never leaves the device: a master key is
+derived from it with scrypt, which is slow and memory hard on purpose, and
+both the login password sent to the server and the vault key are derived
+from the master key, see `derive_account_keys`. That happens once when the
+user signs in and the keys are kept for the session rather than derived per
+entry. Between launches the vault key is saved wrapped with a key derived
+from the session's refresh token, so a saved session opens without the
+password and goes away with the session, see `resume_vault`.
+
+An encrypted field is `PREFIX` followed by the urlsafe base64 of a random
+12 byte nonce and the AES-GCM ciphertext. The field name and the id of the
+entry are authenticated along with it, so the server can not move a
+ciphertext to another field or another entry unnoticed. A new entry has no
+id until the server creates it, so its fields are sent with
+`UNBOUND_PREFIX`, authenticated with the field name only, and bound to the
+entry right after, see `sync.create_entry`. Fields saved that way by
+earlier versions are still read and are bound when the vault is encrypted
+again, see `sync.rekey_vault`. Values without either prefix were saved
+before encryption was introduced and are read as they are.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from PyQt5.QtCore import QSettings
+
+settings = QSettings("Passify", "Passify")
+
+ENCRYPTED_FIELDS = ("password", "notes")
+# Encrypted fields left encrypted when entries are decrypted for the table
+# model and the entry cache: the password is only decrypted when it is
+# copied, revealed or edited.
+SEALED_FIELDS = ("password",)
+PREFIX = "pfy2:"
+UNBOUND_PREFIX = "pfy1:"
+NONCE_SIZE = 12
+# scrypt cost, about half a second and 128 MiB on a laptop
+SCRYPT_N = 2**17
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_MAXMEM = 256 * 2**20
+# Entries decrypted per task when a batch is split across threads.
+DECRYPT_CHUNK_SIZE = 1024
+DECRYPT_WORKERS = 4
+# HKDF info of the keys derived from the master key.
+LOGIN_PASSWORD_INFO = b"passify login password"
+VAULT_KEY_INFO = b"passify vault key"
+# HKDF info of the value the vault key is recognized by, see `is_vault_key`.
+KEY_CHECK_INFO = b"passify vault key check"
+# HKDF info of the key the vault key is saved with between launches.
+SESSION_KEY_INFO = b"passify session key"
+# Name the previous key is authenticated with when it is saved encrypted.
+PREVIOUS_KEY_FIELD = "previous vault key"
+# Name the vault key is authenticated with when it is saved for the session.
+SESSION_KEY_FIELD = "session vault key"
+
+# What a session derives from the account password, see `derive_account_keys`.
+AccountKeys = namedtuple("AccountKeys", ["login_password", "vault_key", "master_key"])
+
+
+class DecryptionError(ValueError):
+    """A field was encrypted with a key this session does not have."""
+
+
+class VaultLocked(Exception):
+    """The vault key is gone, the user signed out."""
+
+
+def derive_master_key(email, password):
+    """Derives the master key, from which the other keys are derived.
+
+    The salt comes from the email address alone, so every device the user
+    signs in from derives the same key. It is the salt the vault key used
+    before the login password was derived as well, so the master key is the
+    vault key of an account that still signs in with its password.
+
+    Args:
+        email (str): Email address of the account.
+        password (str): Account password.
+
+    Returns:
+        bytes: The 256-bit key.
+    """
+    salt = hashlib.sha256(b"passify vault key\0" + email.lower().encode()).digest()
+    return hashlib.scrypt(
+        password.encode(),
+        salt=salt,
+        n=SCRYPT_N,
+        r=SCRYPT_R,
+        p=SCRYPT_P,
+        maxmem=SCRYPT_MAXMEM,
+        dklen=32,
+    )
+
+
+def derive_account_keys(email, password):
+    """Derives the login password and the vault key from the account password.
+
+    The server is only ever sent the login password. Neither the account
+    password nor the vault key can be worked out from it, so the server can
+    not decrypt the vault.
+
+    Args:
+        email (str): Email address of the account.
+        password (str): Account password.
+
+    Returns:
+        AccountKeys: The login password as text, the vault key and the
+            master key, see `derive_master_key`.
+    """
+    master_key = derive_master_key(email, password)
+    login_password = base64.urlsafe_b64encode(
+        derive_subkey(master_key, LOGIN_PASSWORD_INFO)
+    ).decode("ascii")
+    return AccountKeys(
+        login_password, derive_subkey(master_key, VAULT_KEY_INFO), master_key
+    )
+
+
+def derive_subkey(key, info):
+    """Derives a key for one purpose from another key with HKDF-SHA256.
+
+    Args:
+        key (bytes): The key it is derived from, e.g. the vault key.
+        info (bytes): What the key is for, each purpose gets its own.
+
+    Returns:
+        bytes: The 256-bit key.
+    """
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+    return HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=info).derive(key)
+
+
+class VaultCipher:
+    """Encrypts and decrypts entry fields with the vault key.
+
+    Args:
+        key (bytes): The vault key, see `derive_account_keys`.
+        previous_key (bytes): The key before the last password or email
+            change, still tried for the entries not encrypted again yet.
+    """
+
+    def __init__(self, key, previous_key=None):
+        # cryptography is slow to import, only pay for it once it is needed
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+        self.key = key
+        self.previous_key = previous_key
+        self.aead = AESGCM(key)
+        self.previous_aead = AESGCM(previous_key) if previous_key else None
+
+    def encrypt_field(self, name, value, id_url=None):
+        """Encrypts a field, bound to its entry when the entry's id is given.
+
+        Args:
+            name (str): Name of the field, e.g. "password".
+            value (str): The plaintext.
+            id_url (str): Id of the entry, None for an entry not created yet.
+        """
+        if not value:
+            return value
+        nonce = os.urandom(NONCE_SIZE)
+        if id_url is None:
+            prefix, associated_data = UNBOUND_PREFIX, name.encode()
+        else:
+            prefix, associated_data = PREFIX, bind(name, id_url)
+        ciphertext = self.aead.encrypt(nonce, value.encode(), associated_data)
+        return prefix + base64.urlsafe_b64encode(nonce + ciphertext).decode("ascii")
+
+    def decrypt_field(self, name, value, id_url=None):
+        """Returns the plaintext of a field, legacy plaintext as it is.
+
+        Args:
+            id_url (str): Id of the entry the field belongs to, needed for
+                the fields bound to their entry.
+
+        Raises:
+            DecryptionError: If the field was encrypted with another key,
+                belongs to another entry or was tampered with.
+        """
+        from cryptography.exceptions import InvalidTag
+
+        if not is_encrypted(value):
+            return value
+        if value.startswith(UNBOUND_PREFIX):
+            associated_data = name.encode()
+        elif id_url is None:
+            raise DecryptionError(f"The {name} of an entry was read without its id.")
+        else:
+            associated_data = bind(name, id_url)
+        try:
+            # both prefixes have the same length
+            data = base64.urlsafe_b64decode(value[len(PREFIX) :])
+        except ValueError:
+            raise DecryptionError(f"The {name} of an entry is corrupted.") from None
+        nonce, ciphertext = data[:NONCE_SIZE], data[NONCE_SIZE:]
+        for aead in (self.aead, self.previous_aead):
+            if aead is None:
+                continue
+            try:
+                return aead.decrypt(nonce, ciphertext, associated_data).decode()
+            except InvalidTag:
+                pass
+        raise DecryptionError(
+            f"The {name} of an entry could not be decrypted, it was encrypted "
+            "with a different account password or for another entry."
+        )
+
+    def is_current(self, entry):
+        """Tells whether the encrypted fields of an entry use the current key
+        and are bound to the entry."""
+        from cryptography.exceptions import InvalidTag
+
+        for name in ENCRYPTED_FIELDS:
+            value = entry.get(name)
+            if not value:
+                continue
+            if not value.startswith(PREFIX) or not entry.get("id"):
+                return False
+            try:
+                data = base64.urlsafe_b64decode(value[len(PREFIX) :])
+                self.aead.decrypt(
+                    data[:NONCE_SIZE], data[NONCE_SIZE:], bind(name, entry["id"])
+                )
+            except (ValueError, InvalidTag):
+                return False
+        return True
+
+    def encrypt_entry(self, entry, id_url=None):
+        """Returns a copy of the entry with its sensitive fields encrypted.
+
+        Args:
+            entry (dict): The entry's fields.
+            id_url (str): Id the fields are bound to, by default the entry's
+                own id; unbound if it has none yet.
+        """
+        id_url = id_url or entry.get("id")
+        encrypted = dict(entry)
+        for name in ENCRYPTED_FIELDS:
+            if name in encrypted:
+                encrypted[name] = self.encrypt_field(name, encrypted[name], id_url)
+        return encrypted
+
+    def decrypt_entry(self, entry, sealed=()):
+        """Returns a copy of the entry with its sensitive fields decrypted.
+
+        Args:
+            entry (dict): Entry as returned by the database endpoint.
+            sealed (tuple): Fields to leave encrypted, e.g. `SEALED_FIELDS`.
+        """
+        decrypted = dict(entry)
+        for name in ENCRYPTED_FIELDS:
+            if name in decrypted and name not in sealed:
+                decrypted[name] = self.decrypt_field(
+                    name, decrypted[name], entry.get("id")
+                )
+        return decrypted
+
+    def decrypt_entries(self, entries, sealed=(), failed=None):
+        """Decrypts a batch of entries, split across a few threads when large.
+
+        Args:
+            failed (list): If given, an entry that can not be decrypted is
+                kept with its encrypted fields left as they are and its id is
+                added here, instead of failing the whole batch.
+
+        Returns:
+            list: Decrypted copies of the entries, in order.
+        """
+
+        def decrypt(entry):
+            if failed is None:
+                return self.decrypt_entry(entry, sealed)
+            try:
+                return self.decrypt_entry(entry, sealed)
+            except DecryptionError:
+                failed.append(entry.get("id"))
+                return dict(entry)
+
+        if len(entries) <= DECRYPT_CHUNK_SIZE:
+            return [decrypt(entry) for entry in entries]
+        chunks = [
+            entries[start : start + DECRYPT_CHUNK_SIZE]
+            for start in range(0, len(entries), DECRYPT_CHUNK_SIZE)
+        ]
+        with ThreadPoolExecutor(min(DECRYPT_WORKERS, len(chunks))) as executor:
+            decrypted = []
+            for chunk in executor.map(
+                lambda chunk: [decrypt(entry) for entry in chunk],
+                chunks,
+            ):
+                decrypted.extend(chunk)
+        return decrypted
+
+
+def is_encrypted(value):
+    return bool(value) and value.startswith((PREFIX, UNBOUND_PREFIX))
+
+
+def is_bound(entry):
+    """Tells whether every sensitive field of an entry is encrypted and bound
+    to it, without decrypting anything."""
+    return all(
+        not entry.get(name) or entry[name].startswith(PREFIX)
+        for name in ENCRYPTED_FIELDS
+    )
+
+
+def bind(name, id_url):
+    """Returns the associated data of a field bound to its entry.
+
+    Only the last segment of the id url, the entry's key, is used, so the
+    fields stay readable if the server moves to another domain or path.
+    """
+    entry_key = id_url.rstrip("/").rsplit("/", 1)[-1]
+    return f"{name}\0{entry_key}".encode()
+
+
+_cipher = None
+
+
+def set_vault_key(key, previous_key=None):
+    """Keeps the vault key for the session.
+
+    The key is saved wrapped with the session's refresh token, see
+    `wrap_vault_key`, and a key derived from the account password later on
+    is recognized by the value saved here, see `is_vault_key`. While the
+    vault is encrypted again the previous key is saved too, encrypted with
+    the new key, so a run cut short is finished in the next session.
+
+    Args:
+        key (bytes): The new key.
+        previous_key (bytes): The key the vault is still encrypted with while
+            it is encrypted again, see `sync.rekey_vault`.
+    """
+    global _cipher
+    _cipher = VaultCipher(key, previous_key)
+    settings.setValue("VAULT_KEY_CHECK", key_check(key))
+    if previous_key:
+        settings.setValue(
+            "PREVIOUS_VAULT_KEY",
+            _cipher.encrypt_field(PREVIOUS_KEY_FIELD, previous_key.hex()),
+        )
+    else:
+        settings.remove("PREVIOUS_VAULT_KEY")
+    wrap_vault_key(settings.value("REFRESH_TOKEN"))
+
+
+def session_cipher(refresh_token):
+    return VaultCipher(derive_subkey(refresh_token.encode(), SESSION_KEY_INFO))
+
+
+def wrap_vault_key(refresh_token):
+    """Saves the vault key for the next launch, wrapped with the refresh
+    token. Called again when the server rotates the refresh token.
+
+    Args:
+        refresh_token (str): The session's refresh token.
+    """
+    cipher = _cipher
+    if cipher is None or not refresh_token:
+        return
+    settings.setValue(
+        "SESSION_VAULT_KEY",
+        session_cipher(refresh_token).encrypt_field(
+            SESSION_KEY_FIELD, cipher.key.hex()
+        ),
+    )
+
+
+def resume_vault():
+    """Opens the vault of a saved session without the account password.
+
+    Returns:
+        bool: True if the saved key could be unwrapped and is the vault key
+        of the saved session.
+    """
+    refresh_token = settings.value("REFRESH_TOKEN")
+    wrapped = settings.value("SESSION_VAULT_KEY")
+    if not (refresh_token and wrapped):
+        return False
+    try:
+        key = bytes.fromhex(
+            session_cipher(refresh_token).decrypt_field(SESSION_KEY_FIELD, wrapped)
+        )
+    except (DecryptionError, ValueError):
+        # wrapped with a refresh token that was replaced since
+        return False
+    if not is_vault_key(key):
+        return False
+    open_vault(key)
+    return True
+
+
+def open_vault(key):
+    """Keeps the vault key of a new session, along with the previous key of
+    an unfinished re-encryption if it was saved with this key."""
+    previous_key = settings.value("PREVIOUS_VAULT_KEY")
+    try:
+        previous_key = previous_key and bytes.fromhex(
+            VaultCipher(key).decrypt_field(PREVIOUS_KEY_FIELD, previous_key)
+        )
+    except (DecryptionError, ValueError):
+        # saved by another account
+        previous_key = None
+    set_vault_key(key, previous_key)
+
+
+def key_check(key):
+    return derive_subkey(key, KEY_CHECK_INFO).hex()
+
+
+def is_vault_key(key):
+    """Tells whether a key is the vault key of the saved session."""
+    saved = settings.value("VAULT_KEY_CHECK")
+    return bool(saved) and hmac.compare_digest(saved, key_check(key))
+
+
+def get_previous_vault_key():
+    return _cipher.previous_key if _cipher else None
+
+
+def get_cipher() -> VaultCipher:
+    """Returns the cipher of the session's vault key, None before sign in."""
+    return _cipher
+
+
+def require_cipher() -> VaultCipher:
+    """Returns the cipher of the session's vault key, for the code running
+    on workers, which may outlive the session.
+
+    Raises:
+        VaultLocked: If there is no session.
+    """
+    cipher = _cipher
+    if cipher is None:
+        raise VaultLocked("The vault is locked, please sign in again.")
+    return cipher
+
+
+def clear_vault_key():
+    global _cipher
+    # the previous key stays, it can only be read with the vault key
+    settings.remove("VAULT_KEY_CHECK")
+    settings.remove("SESSION_VAULT_KEY")
+    _cipher = None
@@ -0,0 +1,258 @@
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+
+# Order of the columns shown in the entries table.
+COLUMNS = ("title", "username", "password", "url", "notes", "id")
+HEADERS = ("Title", "User Name", "Password", "URL", "Notes", "id")
+
+TITLE_COLUMN = 0
+USERNAME_COLUMN = 1
+PASSWORD_COLUMN = 2
+URL_COLUMN = 3
+NOTES_COLUMN = 4
+ID_COLUMN = 5
+
+
+class VaultTableModel(QAbstractTableModel):
+    """Table model serving the saved passwords to a `QTableView`.
+
+    Entries are kept column by column (one list of strings per field) instead
+    of one Qt item per cell, so loading a vault only costs a few list builds
+    and the view asks `data()` for the cells it actually paints.
+
+    When the server paginates the vault only the pages fetched so far are
+    held. `next_page` is the url of the following one, the view asks for it
+    through `fetchMore` once it is scrolled near the last loaded row.
+    """
+
+    # the view wants the page at `next_page`
+    more_requested = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._columns = [[] for _ in COLUMNS]
+        self._rows = {}  # id url -> row
+        self.next_page = None
+
+    def set_entries(self, entries: list, next_page: str = None) -> None:
+        """Replaces the model content with the given entries.
+
+        Args:
+            entries (list): Entries as returned by the database endpoint.
+            next_page (str): Url of the page that follows, if any.
+
+        Returns: None
+        """
+        self.beginResetModel()
+        self._columns = [
+            [entry.get(key) or "" for entry in entries] for key in COLUMNS
+        ]
+        self._reindex()
+        self.next_page = next_page
+        self.endResetModel()
+
+    def append_page(self, entries: list, next_page: str) -> None:
+        """Adds a further page of entries below the loaded ones.
+
+        Entries already in the table, which offset pagination repeats when
+        the vault changes in between pages, update their row instead.
+
+        Args:
+            entries (list): Entries of the page.
+            next_page (str): Url of the page that follows, if any.
+
+        Returns: None
+        """
+        self.next_page = next_page
+        self.upsert_entries(entries)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.next_page is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if self.canFetchMore(parent):
+            self.more_requested.emit()
+
+    def apply_entries(self, entries: list) -> int:
+        """Brings the model in line with a fresh copy of the entries.
+
+        Unlike `set_entries` only the rows that were added, removed or
+        modified are touched, so the view repaints just those.
+
+        Args: entries (list): Entries as returned by the database endpoint.
+
+        Returns: int: The number of rows that changed.
+        """
+        self.next_page = None
+        incoming = {entry["id"]: entry for entry in entries}
+        removed = [
+            row
+            for row, id_url in enumerate(self._columns[ID_COLUMN])
+            if id_url not in incoming
+        ]
+        self._remove_rows(removed)
+        changed = len(removed)
+        added = []
+        for id_url, entry in incoming.items():
+            row = self._rows.get(id_url)
+            if row is None:
+                added.append(entry)
+            elif self._update_row(row, entry):
+                changed += 1
+        self._append_rows(added)
+        return changed + len(added)
+
+    def upsert_entry(self, entry: dict) -> bool:
+        """Adds the entry, or updates the row holding the same id.
+
+        Args: entry (dict): Entry as returned by the database endpoint.
+
+        Returns: bool: False if the row already held the same values.
+        """
+        row = self._rows.get(entry["id"])
+        if row is None:
+            self._append_rows([entry])
+            return True
+        return self._update_row(row, entry)
+
+    def upsert_entries(self, entries: list) -> None:
+        """Adds or updates several entries, new rows are inserted in one go.
+
+        Args: entries (list): Entries as returned by the database endpoint.
+
+        Returns: None
+        """
+        added = []
+        for entry in entries:
+            row = self._rows.get(entry["id"])
+            if row is None:
+                added.append(entry)
+            else:
+                self._update_row(row, entry)
+        self._append_rows(added)
+
+    def remove_entry(self, id_url: str) -> None:
+        """Removes the row holding the given id, if any.
+
+        Args: id_url (str): Id of the entry to remove.
+
+        Returns: None
+        """
+        row = self._rows.get(id_url)
+        if row is not None:
+            self._remove_rows([row])
+
+    def remove_entries(self, id_urls) -> None:
+        """Removes the rows holding any of the given ids.
+
+        Args: id_urls (iterable): Ids of the entries to remove.
+
+        Returns: None
+        """
+        self._remove_rows(
+            list({self._rows[id_url] for id_url in id_urls if id_url in self._rows})
+        )
+
+    def _reindex(self):
+        self._rows = {
+            id_url: row for row, id_url in enumerate(self._columns[ID_COLUMN])
+        }
+
+    def _update_row(self, row, entry):
+        values = [entry.get(key) or "" for key in COLUMNS]
+        if all(
+            self._columns[column][row] == value
+            for column, value in enumerate(values)
+        ):
+            return False
+        for column, value in enumerate(values):
+            self._columns[column][row] = value
+        self.dataChanged.emit(
+            self.index(row, 0),
+            self.index(row, len(COLUMNS) - 1),
+        )
+        return True
+
+    def _append_rows(self, entries):
+        if not entries:
+            return
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        for column, key in enumerate(COLUMNS):
+            self._columns[column].extend(entry.get(key) or "" for entry in entries)
+        for row, entry in enumerate(entries, first):
+            self._rows[entry["id"]] = row
+        self.endInsertRows()
+
+    def _remove_rows(self, rows):
+        if not rows:
+            return
+        # remove contiguous ranges from the bottom up so earlier rows keep
+        # their position while we go
+        rows = sorted(rows, reverse=True)
+        last = first = rows[0]
+        for row in rows[1:] + [None]:
+            if row is not None and row == first - 1:
+                first = row
+                continue
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for values in self._columns:
+                del values[first : last + 1]
+            self.endRemoveRows()
+            if row is not None:
+                last = first = row
+        self._reindex()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._columns[ID_COLUMN])
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self._columns[index.column()][index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal:
+            if role == Qt.DisplayRole:
+                return HEADERS[section]
+            if role == Qt.TextAlignmentRole:
+                return int(Qt.AlignLeading | Qt.AlignTop)
+            return None
+        if role == Qt.DisplayRole:
+            return section + 1
+        return None
+
+    def text(self, row: int, column: int) -> str:
+        return self._columns[column][row]
+
+    def row(self, id_url: str) -> int:
+        """Returns the row holding the given id, or None."""
+        return self._rows.get(id_url)
+
+    def id_url(self, row: int) -> str:
+        return self._columns[ID_COLUMN][row]
+
+    def entry(self, row: int) -> dict:
+        return {key: self._columns[column][row] for column, key in enumerate(COLUMNS)}
+
+    def columns(self, keys, rows=None) -> list:
+        """Returns copies of the given columns, optionally of some rows only.
+
+        Only the lists are copied, not the strings, so this is cheap even for
+        a large vault and the copies can be read from another thread.
+        """
+        columns = [self._columns[COLUMNS.index(key)] for key in keys]
+        if rows is None:
+            return [list(column) for column in columns]
+        return [[column[row] for row in rows] for column in columns]
+
+    def entries(self) -> list:
+        return [dict(zip(COLUMNS, values)) for values in zip(*self._columns)]
@@ -0,0 +1,160 @@
+"""Word list for passphrases, bundled as one packed file.
+
+Holding thousands of words as a Python list costs an object per word, so the
+list is kept as the file's bytes: a table of offsets followed by the words
+run together. Looking a word up slices it out of the blob, which is O(1).
+The file is only read the first time a passphrase is generated.
+
+The words come from `data/eff_large_wordlist.txt`, the EFF large word list.
+The packed file is built from it ahead of a build and, outside a frozen
+build, again on first use when it is missing or older than the text list.
+
+Layout (integers are little endian uint32):
+
+    b"PWL1" | count | offsets[count + 1] | words
+
+Word `i` is `words[offsets[i]:offsets[i + 1]]`.
+
+Run this module to pack the word list, e.g. before a build. A text list of
+one word per line or of dice rolls and a word per line may be given instead:
+
+    python src/wordlist.py [data/eff_large_wordlist.txt [data/wordlist.bin]]
+"""
+
+import argparse
+import os
+import struct
+import sys
+from array import array
+
+from PyQt5.QtCore import QSettings
+
+settings = QSettings("Passify", "Passify")
+
+MAGIC = b"PWL1"
+HEADER = struct.Struct("<4sI")
+
+
+class Wordlist:
+    """Read only view of a packed word list.
+
+    Args:
+        data (bytes): Content of a packed word list file.
+
+    Raises:
+        ValueError: If `data` is not a packed word list.
+    """
+
+    def __init__(self, data):
+        if len(data) < HEADER.size:
+            raise ValueError("The word list file is truncated.")
+        magic, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("The file is not a packed word list.")
+        words_start = HEADER.size + 4 * (count + 1)
+        self.offsets = array("I", data[HEADER.size : words_start])
+        if sys.byteorder == "big":
+            self.offsets.byteswap()
+        self.words = data[words_start:]
+        if len(self.offsets) != count + 1 or self.offsets[-1] != len(self.words):
+            raise ValueError("The word list file is truncated.")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        return self.words[self.offsets[index] : self.offsets[index + 1]].decode("ascii")
+
+
+def pack(words):
+    """Returns the packed word list file content for a sequence of words."""
+    encoded = [word.encode("ascii") for word in words]
+    offsets = array("I", [0])
+    for word in encoded:
+        offsets.append(offsets[-1] + len(word))
+    if sys.byteorder == "big":
+        offsets.byteswap()
+    return HEADER.pack(MAGIC, len(encoded)) + offsets.tobytes() + b"".join(encoded)
+
+
+def read_source(file):
+    """Reads the words of a text word list, skipping blanks, comments (lines
+    starting with #) and duplicates.
+
+    The word is the last column of a line, so both plain lists and diceware
+    lists with their dice rolls in front are accepted. Words may hold a
+    hyphen, like "t-shirt" in the EFF list.
+    """
+    words = []
+    seen = set()
+    for line in file:
+        columns = line.split()
+        if not columns or columns[0].startswith("#"):
+            continue
+        word = columns[-1].lower()
+        if not word.isascii() or not word.replace("-", "").isalpha():
+            raise ValueError(f"Not a plain ascii word: {word!r}")
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def is_stale(source_path, packed_path):
+    try:
+        return os.path.getmtime(packed_path) < os.path.getmtime(source_path)
+    except OSError:
+        return True
+
+
+def pack_file(source_path, packed_path):
+    """Packs a text word list into a file. Returns the packed content.
+
+    The file is written under a temporary name and moved in place, so an
+    interrupted pack never leaves a truncated word list behind.
+    """
+    with open(source_path, encoding="utf-8") as source:
+        data = pack(read_source(source))
+    temp_path = f"{packed_path}.tmp"
+    with open(temp_path, "wb") as output:
+        output.write(data)
+    os.replace(temp_path, packed_path)
+    return data
+
+
+_wordlist = None
+
+
+def get_wordlist() -> Wordlist:
+    """Returns the bundled word list, reading it on first use."""
+    global _wordlist
+    if _wordlist is None:
+        packed_path = settings.value("WORDLIST_FILE")
+        source_path = settings.value("WORDLIST_SOURCE_FILE")
+        data = None
+        if not getattr(sys, "frozen", False) and is_stale(source_path, packed_path):
+            try:
+                data = pack_file(source_path, packed_path)
+            except OSError:
+                pass  # read-only install, use the packed file if there is one
+        if data is None:
+            with open(packed_path, "rb") as file:
+                data = file.read()
+        _wordlist = Wordlist(data)
+    return _wordlist
+
+
+if __name__ == "__main__":
+    data_directory = os.path.join(os.path.dirname(__file__), "..", "data")
+    parser = argparse.ArgumentParser(description="Packs a text word list.")
+    parser.add_argument(
+        "source",
+        nargs="?",
+        default=os.path.join(data_directory, "eff_large_wordlist.txt"),
+    )
+    parser.add_argument(
+        "packed", nargs="?", default=os.path.join(data_directory, "wordlist.bin")
+    )
+    args = parser.parse_args()
+    count = len(Wordlist(pack_file(args.source, args.packed)))
+    print(f"Packed {count} words into {os.path.normpath(args.packed)}")
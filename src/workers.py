@@ -0,0 +1,157 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from PyQt5.QtCore import QObject, QRunnable, QSettings, QThreadPool, pyqtSignal
+
+settings = QSettings("Passify", "Passify")
+
+
+class RequestSignals(QObject):
+    # Emitted from the worker thread, delivered in the GUI thread.
+    done = pyqtSignal(object, object)
+    # Public signals, only emitted for tasks that were not cancelled.
+    succeeded = pyqtSignal(object)
+    failed = pyqtSignal(object)
+    finished = pyqtSignal()
+    # Emitted instead of them for a task cancelled after it started.
+    abandoned = pyqtSignal()
+
+
+class RequestTask(QRunnable):
+    """A blocking call (usually one of the request helpers in `utils`) run on
+    the request thread pool.
+
+    Connect to `succeeded`, `failed` and `finished` to get the outcome back in
+    the GUI thread. Once `cancel()` has been called none of them fire, even if
+    the request itself already went out; `abandoned` fires then instead, so
+    whoever sent a request that changes the vault can revalidate it.
+    """
+
+    def __init__(self, executor, fn, args, kwargs):
+        super().__init__()
+        self.setAutoDelete(False)
+        self.executor = executor
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = RequestSignals()
+        self.signals.done.connect(self._deliver)
+        self.succeeded = self.signals.succeeded
+        self.failed = self.signals.failed
+        self.finished = self.signals.finished
+        self.abandoned = self.signals.abandoned
+        self._cancelled = threading.Event()
+
+    def run(self):
+        if self._cancelled.is_set():
+            return
+        result, error = None, None
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            error = e
+        self.signals.done.emit(result, error)
+
+    def _deliver(self, result, error):
+        self.executor.discard(self)
+        if self._cancelled.is_set():
+            # the call ran, what it sent may have been applied
+            self.abandoned.emit()
+            return
+        if error is None:
+            self.succeeded.emit(result)
+        else:
+            self.failed.emit(error)
+        self.finished.emit()
+
+    def cancel(self):
+        """Drops the task and its result.
+
+        A task that has not started yet is removed from the queue, a running
+        one is left to finish in the background but its signals are muted,
+        only `abandoned` fires once it is done.
+        """
+        self._cancelled.set()
+        if self.executor.pool.tryTake(self):
+            self.executor.discard(self)
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+
+class RequestExecutor:
+    """Runs request tasks on a dedicated thread pool.
+
+    The pool size caps how many requests can be in flight at the same time;
+    further tasks wait in the pool's queue.
+    """
+
+    def __init__(self, max_in_flight):
+        self.pool = QThreadPool()
+        self.pool.setMaxThreadCount(max_in_flight)
+        self.tasks = set()
+
+    def submit(self, fn, *args, **kwargs) -> RequestTask:
+        task = RequestTask(self, fn, args, kwargs)
+        self.tasks.add(task)
+        self.pool.start(task)
+        return task
+
+    def discard(self, task):
+        self.tasks.discard(task)
+
+    def in_flight(self):
+        return len(self.tasks)
+
+
+_executor = None
+
+
+def get_executor() -> RequestExecutor:
+    """Returns the application wide request executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        _executor = RequestExecutor(
+            int(settings.value("MAX_IN_FLIGHT_REQUESTS", 4)),
+        )
+    return _executor
+
+
+def run_concurrently(fn, items, workers, cancel_event=None):
+    """Calls `fn(item)` for every item on a pool of `workers` threads.
+
+    Meant for bulk work that already runs in the background, like an import.
+    Items are pulled from `items` only as calls complete, at most two per
+    worker are pending, so a lazy iterable is never read far ahead.
+
+    Args:
+        fn (callable): Called with one item, usually sends one request.
+        items (iterable): The items, may be a generator.
+        workers (int): Number of concurrent calls.
+        cancel_event (threading.Event): Stops submitting new items once set,
+            calls already started are still waited for.
+
+    Yields:
+        tuple: (item, result, error) in the order the calls complete.
+    """
+    pending = {}  # future -> item
+
+    def collect(futures):
+        for future in futures:
+            item = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                yield item, None, e
+            else:
+                yield item, result, None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for item in items:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            pending[pool.submit(fn, item)] = item
+            if len(pending) >= workers * 2:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                yield from collect(done)
+        yield from collect(wait(pending).done)